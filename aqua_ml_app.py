@@ -26,16 +26,31 @@ Gereksinimler:
 - ui_specs/drug_map.xlsx: İlaç adı ve kod eşleştirmeleri
 """
 
+import time
+from contextlib import contextmanager
 from pathlib import Path
-import json
 from io import BytesIO
 
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import warnings
 
+from src.sweeps import run_sweeps, SWEEP_GRIDS
+from src.config import (
+    have, PRED_DISK_CACHE, EXCEL_MAX_ROWS, MODEL_PATH, META_PATH,
+    TRACE_PANEL, TRACE_FILE, PROFILE_ONCE, TRACE_DIR, PROFILE_INTERVAL_MS,
+    SLIDER_SPEC, NUMBER_INPUT_SPEC, DRUG_MAP_PATH, ATMOSPHERES,
+)
+from src.artifacts import load_artifacts as load_model_artifacts
+from src.batch_scoring import (
+    open_chunk_reader, content_digest, export_key, score_cached, export_bytes, prune_exports, touch_export,
+)
+from src.prediction_cache import PredictionCache, DiskPredictionStore, file_stamp
+from src.fast_predict import FastPredictor
+from src.fe_metrics import FE_METRICS
+from src import tracing
+
 # (Yalnızca Plotly'nin "keyword args deprecated" FutureWarning'ini sustur)
 warnings.filterwarnings(
     "ignore",
@@ -52,6 +67,61 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# -------------------------------------------------
+# PERFORMANS İZLEME (opsiyonel)
+# -------------------------------------------------
+# AQUAML_TRACE=1 veya URL'de ?perf=1 → sonuçların altında "Performans" paneli;
+# AQUAML_TRACE_FILE → her script çalışması JSONL iz dosyasına bir satır;
+# AQUAML_PROFILE=1 → tahmin yapan ilk isteğin örnekleme profili TRACE_DIR'e yazılır.
+SHOW_PERF = TRACE_PANEL or st.query_params.get("perf") == "1"
+
+@st.cache_resource(show_spinner=False)
+def _profile_state() -> dict:
+    """AQUAML_PROFILE=1 iken süreç başına yalnız bir istek profillenir."""
+    return {"done": False, "path": None}
+
+@contextmanager
+def profile_once(tag: str):
+    """
+    AQUAML_PROFILE=1 iken süreçteki ilk tahmin bölümünü örnekler. Profil yalnız bu blok boyunca açıktır;
+    blok st.stop() veya hata ile kesilse de durdurulup TRACE_DIR'e yazılır.
+    """
+    state = _profile_state()
+    if not PROFILE_ONCE or state["done"]:
+        yield
+        return
+    state["done"] = True  # eşzamanlı oturumlar ikinci bir profil başlatmaz
+    profiler = tracing.SamplingProfiler(PROFILE_INTERVAL_MS / 1000).start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        state["path"] = profiler.save(TRACE_DIR, f"aquaml_profile_{tag}_{time.strftime('%Y%m%d_%H%M%S')}")
+
+TRACER = tracing.start_trace("page", enabled=SHOW_PERF or bool(TRACE_FILE))
+
+def render_perf_panel():
+    """Bu isteğin span özeti + FE ölçümleri (yalnız SHOW_PERF iken)."""
+    if not SHOW_PERF or TRACER is None:
+        return
+    with st.expander("⏱️ Performans", expanded=False):
+        spans = pd.DataFrame(TRACER.summary())
+        if len(spans):
+            spans["span"] = ["\u2003" * d + name for d, name in zip(spans["depth"], spans["span"])]
+            spans["share"] = (spans["share"] * 100).round(1)
+            st.dataframe(
+                spans[["span", "calls", "total_ms", "max_ms", "share"]].rename(
+                    columns={"calls": "çağrı", "total_ms": "toplam (ms)", "max_ms": "en uzun (ms)", "share": "pay (%)"}),
+                use_container_width=True, hide_index=True,
+            )
+        st.caption(f"Bu çalışmada şu ana kadar: {TRACER.now_ms():.1f} ms. "
+                   "plotly_serialize: figürün tarayıcıya gönderilmek üzere serileştirilmesi.")
+        st.caption("FE ölçümleri: süreç geneli toplam (sunucu başladığından beri, tüm oturumlar); "
+                   "yalnız bu isteğe ait değildir.")
+        st.json(FE_METRICS.snapshot(), expanded=False)
+        if _profile_state()["path"]:
+            st.caption(f"Örnekleme profili: {_profile_state()['path']}")
+
 # -------------------------------------------------
 # Plotly yardımcı (config=... standardına geçirir)
 # -------------------------------------------------
@@ -63,7 +133,8 @@ def show_plotly(fig, config=None, **maybe_old_kwargs):
     """
     merged = dict(config or {})
     merged.update(maybe_old_kwargs)
-    st.plotly_chart(fig, config=merged, use_container_width=True)
+    with tracing.span("plotly_serialize"):
+        st.plotly_chart(fig, config=merged, use_container_width=True)
 
 # -------------------------------------------------
 # TEMA / STİL
@@ -156,45 +227,63 @@ st.markdown("""
 # MODEL / META YÜKLEME
 # -------------------------------------------------
 @st.cache_resource(show_spinner=True)
-def load_artifacts():
-    """best_model.joblib ve best_model.meta.json dosyalarını yükle."""
+def load_artifacts(model_stamp: str = ""):
+    """
+    best_model.joblib ve best_model.meta.json dosyalarını yükle.
+    model_stamp (boyut+mtime) değişince yeniden yüklenir; dönen model_version
+    tahmin önbelleğinin anahtarına girer.
+    """
     try:
-        pipe = joblib.load("best_model.joblib")  # fit edilmiş sklearn Pipeline
-    except FileNotFoundError:
-        st.error("Model dosyası bulunamadı: best_model.joblib")
-        st.stop()
-    except Exception as e:
-        st.error(f"Model yüklenemedi: {type(e).__name__}: {e}")
+        return load_model_artifacts(MODEL_PATH, META_PATH)
+    except FileNotFoundError as e:
+        if e.filename == META_PATH:
+            st.error("best_model.meta.json bulunamadı. Lütfen meta dosyasını ekleyin.")
+        else:
+            st.error("Model dosyası bulunamadı: best_model.joblib")
         st.stop()
-
-    try:
-        with open("best_model.meta.json", "r", encoding="utf-8") as f:
-            meta = json.load(f)
-            feats = meta.get("features", [])
-    except FileNotFoundError:
-        st.error("best_model.meta.json bulunamadı. Lütfen meta dosyasını ekleyin.")
+    except ValueError as e:
+        st.error(str(e))
         st.stop()
     except Exception as e:
-        st.error(f"Meta okunamadı: {type(e).__name__}: {e}")
+        st.error(f"Model/meta yüklenemedi: {type(e).__name__}: {e}")
         st.stop()
 
-    if not feats:
-        st.error("Meta içinde 'features' anahtarı boş görünüyor.")
-        st.stop()
-    return pipe, feats
+@st.cache_resource(show_spinner=False)
+def get_prediction_cache(model_version: str, _pipe) -> PredictionCache:
+    """
+    Süreç genelinde (tüm oturumlar) paylaşılan LRU tahmin önbelleği; model sürümü başına bir tane.
+    AQUAML_PRED_CACHE_DB tanımlıysa SQLite deposu ikinci katman olarak eklenir (süreçler arası ortak).
+    """
+    store = None
+    if PRED_DISK_CACHE:
+        try:
+            store = DiskPredictionStore(PRED_DISK_CACHE)
+        except Exception as e:
+            st.warning(f"Kalıcı tahmin önbelleği açılamadı, yalnız bellek kullanılacak: {type(e).__name__}: {e}")
+    # traced_predict: pipe.predict ile aynı; izleme açıkken DomainFE ve model süresi ayrı ölçülür
+    return PredictionCache(tracing.traced_predict(_pipe), model_version=model_version, store=store)
+
+@st.cache_resource(show_spinner=False)
+def get_fast_predictor(model_version: str, _pipe, features: tuple) -> FastPredictor:
+    """Tek satır tahmin için pandas'sız hızlı yol; şema uymazsa Pipeline'a düşer."""
+    return FastPredictor(_pipe, features)
 
 @st.cache_data
 def load_drug_mapping():
     """İlaç haritasını yükle."""
     try:
-        df = pd.read_excel("ui_specs/drug_map.xlsx")
+        df = pd.read_excel(DRUG_MAP_PATH)
         return df
     except Exception as e:
         st.error(f"İlaç haritası yüklenemedi: {type(e).__name__}: {e}")
         st.stop()
 
-pipe, FEATURES = load_artifacts()
+_span = tracing.begin("load_artifacts")
+pipe, FEATURES, MODEL_VERSION = load_artifacts(file_stamp(MODEL_PATH))
+PRED_CACHE = get_prediction_cache(MODEL_VERSION, pipe)
+FAST_PREDICTOR = get_fast_predictor(MODEL_VERSION, pipe, tuple(FEATURES))
 drug_mapping = load_drug_mapping()
+tracing.end(_span)
 
 # Solute parametreleri (E, S, A, B, V değerleri)
 solute_params = {
@@ -240,36 +329,6 @@ solute = ["E", "S", "A", "B", "V"]
 categorical = ["Activation_Atmosphere"]
 target_phar = ["Target_Phar"]
 
-# Slider tanımları (min, max, step)
-SLIDER_SPEC = {
-    "Solution_pH": (0.5, 13.5, 0.1),
-    "Temperature(K)": (290.0, 340.0, 1.0),
-    "Dosage(g/L)": (0.05, 18.0, 0.1),
-    "Contact_Time(min)": (0.0, 6000.0, 1.0),
-    "Initial_Concentration(mg/L)": (0.0, 1000.0, 1.0),
-    "Agitation_speed(rpm)": (0.0, 700.0, 10.0),
-    "C_percent": (0.0, 100.0, 0.1),
-    "H_percent": (0.0, 10.0, 0.1),
-    "O_percent": (0.0, 50.0, 0.1),
-    "N_percent": (0.0, 20.0, 0.1),
-    "S_percent": (0.0, 5.0, 0.1),
-}
-
-# Number input (oklu kutu) tanımları (min, max, step, default)
-NUMBER_INPUT_SPEC = {
-    "BET_Surface_Area(m2/g)": (0.0, 3000.0, 10.0, None),
-    "Total_Pore_Volume(cm3/g)": (0.0, 5.0, 0.01, None),
-    "Micropore_Volume(cm3/g)": (0.0, 2.0, 0.01, None),
-    "Average_Pore_Diameter(nm)": (0.0, 50.0, 0.1, None),
-    "pHpzc": (0.0, 14.0, 0.1, None),
-    "Agent/Sample(g/g)": (0.0, 10.0, 0.01, None),
-    "Soaking_Time(min)": (0.0, 6000.0, 5.0, None),
-    "Soaking_Temp(K)": (273.0, 500.0, 1.0, None),
-    "Activation_Time(min)": (0.0, 360.0, 5.0, None),
-    "Activation_Temp(K)": (550.0, 1200.0, 10.0, None),
-    "Activation_Heating_Rate (K/min)": (0.0, 50.0, 1.0, None),
-}
-
 # Özel başlangıç değerleri (orta değer yerine)
 SLIDER_DEFAULTS = {
     "H_percent": 1.0,
@@ -361,7 +420,7 @@ def render_block(title: str, fields: list[str], values: dict):
             else:
                 values[name] = None
         elif name == "Activation_Atmosphere":
-            atmosphere_options = ["N2", "Air", "SG"]
+            atmosphere_options = list(ATMOSPHERES)
             atmosphere_labels = ["Nitrogen (N₂)", "Air", "Self-generated atmosphere"]
             selected_atmosphere = c.radio(
                 display_name,
@@ -379,6 +438,76 @@ def align_and_cast(df: pd.DataFrame) -> pd.DataFrame:
     """Veriyi model için hazırla - model kendi preprocessing'ini yapacak"""
     return df
 
+# -------------------------------------------------
+# DUYARLILIK EĞRİLERİ
+# -------------------------------------------------
+# Her eğri: (ad, değişen kolon, değerler, başlık, açıklama, x etiketi, renk)
+# Kolon + değer ızgaraları src/sweeps.py::SWEEP_GRIDS'te (HTTP servisi de kullanır);
+# tüm eğriler tek DataFrame'de toplanıp tek predict ile hesaplanır.
+SYNTHESIS_SWEEPS = [
+    ("agent", *SWEEP_GRIDS["agent"],
+     "🧪 Ajan/Numune Oranı Duyarlılığı", "Aktivasyon ajanı oranının adsorpsiyon kapasitesi üzerindeki etkisi",
+     "Ajan/Numune Oranı (g/g)", "#e74c3c"),
+    ("soaking_time", *SWEEP_GRIDS["soaking_time"],
+     "⏰ Emdirim Süresi Duyarlılığı", "Emdirim süresinin adsorpsiyon kapasitesi üzerindeki etkisi",
+     "Emdirim Süresi (dk)", "#9b59b6"),
+    ("activation_time", *SWEEP_GRIDS["activation_time"],
+     "⏲️ Aktivasyon Süresi Duyarlılığı", "Aktivasyon süresinin adsorpsiyon kapasitesi üzerindeki etkisi",
+     "Aktivasyon Süresi (dk)", "#f39c12"),
+    ("activation_temp", *SWEEP_GRIDS["activation_temp"],
+     "🔥 Aktivasyon Sıcaklığı Duyarlılığı", "Aktivasyon sıcaklığının adsorpsiyon kapasitesi üzerindeki etkisi",
+     "Aktivasyon Sıcaklığı (K)", "#3498db"),
+]
+PROCESS_SWEEPS = [
+    ("concentration", *SWEEP_GRIDS["concentration"],
+     "📈 Konsantrasyon Duyarlılığı", "Başlangıç konsantrasyonunun adsorpsiyon kapasitesi üzerindeki etkisi",
+     "Başlangıç Konsantrasyonu (mg/L)", "#1abc9c"),
+    ("temperature", *SWEEP_GRIDS["temperature"],
+     "🌡️ Sıcaklık Duyarlılığı", "Çözelti sıcaklığının adsorpsiyon kapasitesi üzerindeki etkisi",
+     "Sıcaklık (K)", "#e67e22"),
+    ("ph", *SWEEP_GRIDS["ph"],
+     "🧪 pH Duyarlılığı", "Çözelti pH'ının adsorpsiyon kapasitesi üzerindeki etkisi",
+     "pH", "#27ae60"),
+    ("dosage", *SWEEP_GRIDS["dosage"],
+     "⚖️ Dozaj Duyarlılığı", "Adsorban dozajının adsorpsiyon kapasitesi üzerindeki etkisi",
+     "Dozaj (g/L)", "#c0392b"),
+    ("contact_time", *SWEEP_GRIDS["contact_time"],
+     "⏱️ Temas Süresi Duyarlılığı", "Temas süresinin adsorpsiyon kapasitesi üzerindeki etkisi",
+     "Temas Süresi (dk)", "#8e44ad"),
+]
+# Antibiyotik karşılaştırması: aynı girdilerle tüm ilaç kodları
+DRUG_SWEEP = [("drugs", "Target_Phar", list(solute_params.keys()))]
+
+def render_sweep(spec, curve_df: pd.DataFrame):
+    """Tek bir duyarlılık eğrisini başlık + açıklama + Plotly çizgi grafiği olarak çizer."""
+    import plotly.express as px
+
+    _, col, _, title, caption, x_label, color = spec
+    st.markdown(f"""
+    <div style="margin: 15px 0;">
+        <h3 style="color:#374151; font-weight: 500; font-size: 16px; margin: 0;">{title}</h3>
+    </div>
+    """, unsafe_allow_html=True)
+    st.caption(caption)
+    if curve_df is None or curve_df.empty:
+        return
+    _span = tracing.begin("plotly_figure")
+    fig = px.line(
+        curve_df, x=col, y='qe',
+        labels={col: x_label, 'qe': 'Adsorpsiyon Kapasitesi, qe (mg/g)'},
+        line_shape='spline', markers=True, color_discrete_sequence=[color]
+    )
+    fig.update_layout(
+        height=350, showlegend=False, plot_bgcolor='#f8f9fa', paper_bgcolor='white',
+        margin=dict(l=50, r=30, t=30, b=50),
+        font=dict(size=11, family='Inter, sans-serif'),
+        xaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True),
+        yaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True)
+    )
+    fig.update_traces(line=dict(width=3), marker=dict(size=8, line=dict(width=1.5, color='white')))
+    tracing.end(_span)
+    show_plotly(fig)
+
 # -------------------------------------------------
 # SEKMELER
 # -------------------------------------------------
@@ -386,6 +515,7 @@ tab1, tab2 = st.tabs(["Tekil Giriş", "Excel Yükle"])
 
 # -------- Tekil Giriş --------
 with tab1:
+    _span_inputs = tracing.begin("render_inputs")
     st.subheader("Tekil Giriş")
     st.markdown('<div class="small-note">💡 İpucu: Parametreleri doldurun ve \'Tahmin Et\' butonuna basın.</div>', unsafe_allow_html=True)
 
@@ -431,7 +561,7 @@ with tab1:
             </div>
             """, unsafe_allow_html=True)
 
-            atmosphere_options = ["N2", "Air", "SG"]
+            atmosphere_options = list(ATMOSPHERES)
             atmosphere_labels = ["Nitrogen (N₂)", "Air", "Self-generated atmosphere"]
             selected_atmosphere = st.radio(
                 "Aktivasyon sırasında kullanılan atmosfer türünü seçiniz",
@@ -447,8 +577,12 @@ with tab1:
 
     with col_right:
         st.markdown("### 📊 Tahmin Sonuçları")
+    tracing.end(_span_inputs)
 
     if submitted:
+        if TRACER is not None:
+            TRACER.meta["flow"] = "single"
+        _span_validate = tracing.begin("validate")
         row: dict[str, float | str] = {}
         for k in [*synthesis, *adsorbent, *process_, *categorical, *target_phar]:
             v = vals.get(k, None)
@@ -456,10 +590,6 @@ with tab1:
                 v = _to_float_or_none(v)
             row[k] = v
 
-        X = pd.DataFrame([row])
-        X = align_and_cast(X)
-        base_params = {k: v for k, v in row.items() if k != "Target_Phar"}
-
         with col_right:
             if not vals.get("Target_Phar"):
                 st.error("⚠️ Lütfen bir ilaç seçiniz!")
@@ -502,9 +632,19 @@ with tab1:
             selected_display = drug_mapping[drug_mapping['Code'] == vals["Target_Phar"]]['Display_Name'].iloc[0]
             st.info(f"🎯 **Seçilen İlaç:** {selected_display} ({vals['Target_Phar']})")
 
+            tracing.end(_span_validate)
             try:
-                yhat = float(pipe.predict(X)[0])
-                st.success(f"🎯 **Model Tahmini:** {yhat:.3f} mg/g")
+                # Ana tahmin tek satırlık hızlı yoldan; grafikler toplu senaryo motorundan (taban satırı
+                # yeniden tahmin edilmez, base=yhat)
+                with profile_once("single"):
+                    with tracing.span("fast_predict"):
+                        yhat = FAST_PREDICTOR.predict_one(row)
+                    st.success(f"🎯 **Model Tahmini:** {yhat:.3f} mg/g")
+                    with tracing.span("sweeps"):
+                        sweep_res = run_sweeps(PRED_CACHE.predict, row,
+                                               [*DRUG_SWEEP, *SYNTHESIS_SWEEPS, *PROCESS_SWEEPS], base=yhat)
+                curves = sweep_res["curves"]
+                _span_charts = tracing.begin("charts")
 
                 # ==== Plotly: karşılaştırma ve duyarlılık grafikleri ====
                 import plotly.express as px
@@ -514,21 +654,12 @@ with tab1:
                 st.markdown("### 📊 Antibiyotik Karşılaştırması")
                 st.caption("Girdiğiniz parametreler sabit tutularak, farklı antibiyotikler için adsorpsiyon kapasitesi tahminleri karşılaştırılır.")
 
-                comparison_results = []
-                for drug_code, _ in solute_params.items():
-                    test_row = base_params.copy()
-                    test_row["Target_Phar"] = drug_code
-                    test_df = pd.DataFrame([test_row])
-                    test_df = align_and_cast(test_df)
-                    try:
-                        pred_qe = float(pipe.predict(test_df)[0])
-                        drug_name = drug_mapping[drug_mapping['Code'] == drug_code]['Display_Name'].iloc[0] if not drug_mapping[drug_mapping['Code'] == drug_code].empty else drug_code
-                        comparison_results.append({'Drug_Code': drug_code, 'Drug_Name': drug_name, 'Predicted_qe': pred_qe})
-                    except Exception as e:
-                        st.warning(f"⚠️ {drug_code} için tahmin yapılamadı: {e}")
-
-                if comparison_results:
-                    comparison_df = pd.DataFrame(comparison_results).sort_values('Predicted_qe', ascending=False)
+                code2name = dict(zip(drug_mapping['Code'], drug_mapping['Display_Name']))
+                comparison_df = curves["drugs"].rename(columns={"Target_Phar": "Drug_Code", "qe": "Predicted_qe"})
+                comparison_df["Drug_Name"] = comparison_df["Drug_Code"].map(lambda c: code2name.get(c, c))
+                comparison_df = comparison_df.sort_values('Predicted_qe', ascending=False)
+                if len(comparison_df):
+                    _span = tracing.begin("plotly_figure")
                     fig1 = px.bar(
                         comparison_df,
                         x='Drug_Name',
@@ -558,6 +689,7 @@ with tab1:
                         coloraxis_colorbar=dict(title_text='qe (mg/g)', thickness=15, len=0.7)
                     )
                     fig1.update_traces(marker=dict(line=dict(width=0.5, color='white')))
+                    tracing.end(_span)
                     show_plotly(fig1)
 
                 # ==== Duyarlılık Analizleri ====
@@ -573,155 +705,8 @@ with tab1:
                         <h2 style="color:#1e293b; font-weight: 600; font-size: 20px; border-bottom: 3px solid #3b82f6; padding-bottom: 10px; display: inline-block;">⚗️ Sentez Koşulları</h2>
                     </div>
                     """, unsafe_allow_html=True)
-
-                    # Agent/Sample ratio
-                    st.markdown("""
-                    <div style="margin: 15px 0;">
-                        <h3 style="color:#374151; font-weight: 500; font-size: 16px; margin: 0;">🧪 Ajan/Numune Oranı Duyarlılığı</h3>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.caption("Aktivasyon ajanı oranının adsorpsiyon kapasitesi üzerindeki etkisi")
-                    agent_ratios = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.2, 1.4, 1.6, 1.8, 2.0, 2.2, 2.4, 2.6, 2.8, 3.0, 3.2, 3.4, 3.6, 3.8, 4.0, 4.2, 4.4, 4.6, 4.8, 5.0, 5.5, 6.0, 6.5, 7.0, 7.5, 8.0, 8.5, 9.0, 9.5, 10.0]
-                    agent_results = []
-                    for ratio in agent_ratios:
-                        test_row = base_params.copy()
-                        test_row["Target_Phar"] = vals["Target_Phar"]
-                        test_row["Agent/Sample(g/g)"] = ratio
-                        test_df = pd.DataFrame([test_row])
-                        test_df = align_and_cast(test_df)
-                        try:
-                            pred_qe = float(pipe.predict(test_df)[0])
-                            agent_results.append({'Agent_Ratio': ratio, 'qe': pred_qe})
-                        except:
-                            pass
-                    if agent_results:
-                        import plotly.express as px
-                        agent_df = pd.DataFrame(agent_results)
-                        fig7 = px.line(
-                            agent_df, x='Agent_Ratio', y='qe',
-                            labels={'Agent_Ratio': 'Ajan/Numune Oranı (g/g)', 'qe': 'Adsorpsiyon Kapasitesi, qe (mg/g)'},
-                            line_shape='spline', markers=True, color_discrete_sequence=['#e74c3c']
-                        )
-                        fig7.update_layout(
-                            height=350, showlegend=False, plot_bgcolor='#f8f9fa', paper_bgcolor='white',
-                            margin=dict(l=50, r=30, t=30, b=50),
-                            font=dict(size=11, family='Inter, sans-serif'),
-                            xaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True),
-                            yaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True)
-                        )
-                        fig7.update_traces(line=dict(width=3), marker=dict(size=8, line=dict(width=1.5, color='white')))
-                        show_plotly(fig7)
-
-                    # Soaking Time
-                    st.markdown("""
-                    <div style="margin: 15px 0;">
-                        <h3 style="color:#374151; font-weight: 500; font-size: 16px; margin: 0;">⏰ Emdirim Süresi Duyarlılığı</h3>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.caption("Emdirim süresinin adsorpsiyon kapasitesi üzerindeki etkisi")
-                    soaking_times = [30, 45, 60, 75, 90, 105, 120, 135, 150, 165, 180, 195, 210, 225, 240, 255, 270, 285, 300, 315, 330, 345, 360, 375, 390, 405, 420, 435, 450, 465, 480, 495, 510, 525, 540, 600, 720, 900, 1200, 1500, 1800, 2000]
-                    soaking_results = []
-                    for time in soaking_times:
-                        test_row = base_params.copy()
-                        test_row["Target_Phar"] = vals["Target_Phar"]
-                        test_row["Soaking_Time(min)"] = time
-                        test_df = pd.DataFrame([test_row])
-                        test_df = align_and_cast(test_df)
-                        try:
-                            pred_qe = float(pipe.predict(test_df)[0])
-                            soaking_results.append({'Soaking_Time': time, 'qe': pred_qe})
-                        except:
-                            pass
-                    if soaking_results:
-                        soaking_df = pd.DataFrame(soaking_results)
-                        fig8 = px.line(
-                            soaking_df, x='Soaking_Time', y='qe',
-                            labels={'Soaking_Time': 'Emdirim Süresi (dk)', 'qe': 'Adsorpsiyon Kapasitesi, qe (mg/g)'},
-                            line_shape='spline', markers=True, color_discrete_sequence=['#9b59b6']
-                        )
-                        fig8.update_layout(
-                            height=350, showlegend=False, plot_bgcolor='#f8f9fa', paper_bgcolor='white',
-                            margin=dict(l=50, r=30, t=30, b=50),
-                            font=dict(size=11, family='Inter, sans-serif'),
-                            xaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True),
-                            yaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True)
-                        )
-                        fig8.update_traces(line=dict(width=3), marker=dict(size=8, line=dict(width=1.5, color='white')))
-                        show_plotly(fig8)
-
-                    # Activation Time
-                    st.markdown("""
-                    <div style="margin: 15px 0;">
-                        <h3 style="color:#374151; font-weight: 500; font-size: 16px; margin: 0;">⏲️ Aktivasyon Süresi Duyarlılığı</h3>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.caption("Aktivasyon süresinin adsorpsiyon kapasitesi üzerindeki etkisi")
-                    activation_times = [30, 45, 60, 75, 90, 105, 120, 150, 180, 210, 240, 270, 300, 330, 360]
-                    act_time_results = []
-                    for time in activation_times:
-                        test_row = base_params.copy()
-                        test_row["Target_Phar"] = vals["Target_Phar"]
-                        test_row["Activation_Time(min)"] = time
-                        test_df = pd.DataFrame([test_row])
-                        test_df = align_and_cast(test_df)
-                        try:
-                            pred_qe = float(pipe.predict(test_df)[0])
-                            act_time_results.append({'Activation_Time': time, 'qe': pred_qe})
-                        except:
-                            pass
-                    if act_time_results:
-                        act_time_df = pd.DataFrame(act_time_results)
-                        fig10 = px.line(
-                            act_time_df, x='Activation_Time', y='qe',
-                            labels={'Activation_Time': 'Aktivasyon Süresi (dk)', 'qe': 'Adsorpsiyon Kapasitesi, qe (mg/g)'},
-                            line_shape='spline', markers=True, color_discrete_sequence=['#f39c12']
-                        )
-                        fig10.update_layout(
-                            height=350, showlegend=False, plot_bgcolor='#f8f9fa', paper_bgcolor='white',
-                            margin=dict(l=50, r=30, t=30, b=50),
-                            font=dict(size=11, family='Inter, sans-serif'),
-                            xaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True),
-                            yaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True)
-                        )
-                        fig10.update_traces(line=dict(width=3), marker=dict(size=8, line=dict(width=1.5, color='white')))
-                        show_plotly(fig10)
-
-                    # Activation Temperature
-                    st.markdown("""
-                    <div style="margin: 15px 0;">
-                        <h3 style="color:#374151; font-weight: 500; font-size: 16px; margin: 0;">🔥 Aktivasyon Sıcaklığı Duyarlılığı</h3>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.caption("Aktivasyon sıcaklığının adsorpsiyon kapasitesi üzerindeki etkisi")
-                    activation_temps = [550, 575, 600, 625, 650, 675, 700, 725, 750, 775, 800, 825, 850, 875, 900, 925, 950, 975, 1000, 1025, 1050, 1075, 1100, 1125, 1150, 1175, 1200]
-                    act_temp_results = []
-                    for temp in activation_temps:
-                        test_row = base_params.copy()
-                        test_row["Target_Phar"] = vals["Target_Phar"]
-                        test_row["Activation_Temp(K)"] = temp
-                        test_df = pd.DataFrame([test_row])
-                        test_df = align_and_cast(test_df)
-                        try:
-                            pred_qe = float(pipe.predict(test_df)[0])
-                            act_temp_results.append({'Activation_Temp': temp, 'qe': pred_qe})
-                        except:
-                            pass
-                    if act_temp_results:
-                        act_temp_df = pd.DataFrame(act_temp_results)
-                        fig9 = px.line(
-                            act_temp_df, x='Activation_Temp', y='qe',
-                            labels={'Activation_Temp': 'Aktivasyon Sıcaklığı (K)', 'qe': 'Adsorpsiyon Kapasitesi, qe (mg/g)'},
-                            line_shape='spline', markers=True, color_discrete_sequence=['#3498db']
-                        )
-                        fig9.update_layout(
-                            height=350, showlegend=False, plot_bgcolor='#f8f9fa', paper_bgcolor='white',
-                            margin=dict(l=50, r=30, t=30, b=50),
-                            font=dict(size=11, family='Inter, sans-serif'),
-                            xaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True),
-                            yaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True)
-                        )
-                        fig9.update_traces(line=dict(width=3), marker=dict(size=8, line=dict(width=1.5, color='white')))
-                        show_plotly(fig9)
+                    for spec in SYNTHESIS_SWEEPS:
+                        render_sweep(spec, curves[spec[0]])
 
                 with col_process:
                     st.markdown("""
@@ -729,192 +714,10 @@ with tab1:
                         <h2 style="color:#1e293b; font-weight: 600; font-size: 20px; border-bottom: 3px solid #3b82f6; padding-bottom: 10px; display: inline-block;">🔬 Proses Koşulları</h2>
                     </div>
                     """, unsafe_allow_html=True)
-
-                    # Konsantrasyon
-                    st.markdown("""
-                    <div style="margin: 15px 0;">
-                        <h3 style="color:#374151; font-weight: 500; font-size: 16px; margin: 0;">📈 Konsantrasyon Duyarlılığı</h3>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.caption("Başlangıç konsantrasyonunun adsorpsiyon kapasitesi üzerindeki etkisi")
-                    concentrations = [50, 100, 150, 200, 250, 300, 350, 400, 450, 500, 600, 700, 800, 900, 1000, 1200, 1400, 1600, 1800, 2000, 2200, 2400, 2600, 2800, 3000]
-                    conc_results = []
-                    for conc in concentrations:
-                        test_row = base_params.copy()
-                        test_row["Target_Phar"] = vals["Target_Phar"]
-                        test_row["Initial_Concentration(mg/L)"] = conc
-                        test_df = pd.DataFrame([test_row])
-                        test_df = align_and_cast(test_df)
-                        try:
-                            pred_qe = float(pipe.predict(test_df)[0])
-                            conc_results.append({'Concentration': conc, 'qe': pred_qe})
-                        except:
-                            pass
-                    if conc_results:
-                        conc_df = pd.DataFrame(conc_results)
-                        fig2 = px.line(
-                            conc_df, x='Concentration', y='qe',
-                            labels={'Concentration': 'Başlangıç Konsantrasyonu (mg/L)', 'qe': 'Adsorpsiyon Kapasitesi, qe (mg/g)'},
-                            line_shape='spline', markers=True, color_discrete_sequence=['#1abc9c']
-                        )
-                        fig2.update_layout(
-                            height=350, showlegend=False, plot_bgcolor='#f8f9fa', paper_bgcolor='white',
-                            margin=dict(l=50, r=30, t=30, b=50),
-                            font=dict(size=11, family='Inter, sans-serif'),
-                            xaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True),
-                            yaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True)
-                        )
-                        fig2.update_traces(line=dict(width=3), marker=dict(size=8, line=dict(width=1.5, color='white')))
-                        show_plotly(fig2)
-
-                    # Sıcaklık
-                    st.markdown("""
-                    <div style="margin: 15px 0;">
-                        <h3 style="color:#374151; font-weight: 500; font-size: 16px; margin: 0;">🌡️ Sıcaklık Duyarlılığı</h3>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.caption("Çözelti sıcaklığının adsorpsiyon kapasitesi üzerindeki etkisi")
-                    temperatures = [290, 295, 300, 305, 310, 315, 320, 325, 330, 335, 340]
-                    temp_results = []
-                    for temp in temperatures:
-                        test_row = base_params.copy()
-                        test_row["Target_Phar"] = vals["Target_Phar"]
-                        test_row["Temperature(K)"] = temp
-                        test_df = pd.DataFrame([test_row])
-                        test_df = align_and_cast(test_df)
-                        try:
-                            pred_qe = float(pipe.predict(test_df)[0])
-                            temp_results.append({'Temperature': temp, 'qe': pred_qe})
-                        except:
-                            pass
-                    if temp_results:
-                        temp_df = pd.DataFrame(temp_results)
-                        fig3 = px.line(
-                            temp_df, x='Temperature', y='qe',
-                            labels={'Temperature': 'Sıcaklık (K)', 'qe': 'Adsorpsiyon Kapasitesi, qe (mg/g)'},
-                            line_shape='spline', markers=True, color_discrete_sequence=['#e67e22']
-                        )
-                        fig3.update_layout(
-                            height=350, showlegend=False, plot_bgcolor='#f8f9fa', paper_bgcolor='white',
-                            margin=dict(l=50, r=30, t=30, b=50),
-                            font=dict(size=11, family='Inter, sans-serif'),
-                            xaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True),
-                            yaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True)
-                        )
-                        fig3.update_traces(line=dict(width=3), marker=dict(size=8, line=dict(width=1.5, color='white')))
-                        show_plotly(fig3)
-
-                    # pH
-                    st.markdown("""
-                    <div style="margin: 15px 0;">
-                        <h3 style="color:#374151; font-weight: 500; font-size: 16px; margin: 0;">🧪 pH Duyarlılığı</h3>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.caption("Çözelti pH'ının adsorpsiyon kapasitesi üzerindeki etkisi")
-                    ph_values = [2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, 5.5, 6.0, 6.5, 7.0, 7.5, 8.0, 8.5, 9.0, 9.5, 10.0, 10.5, 11.0, 11.5, 12.0]
-                    ph_results = []
-                    for ph in ph_values:
-                        test_row = base_params.copy()
-                        test_row["Target_Phar"] = vals["Target_Phar"]
-                        test_row["Solution_pH"] = ph
-                        test_df = pd.DataFrame([test_row])
-                        test_df = align_and_cast(test_df)
-                        try:
-                            pred_qe = float(pipe.predict(test_df)[0])
-                            ph_results.append({'pH': ph, 'qe': pred_qe})
-                        except:
-                            pass
-                    if ph_results:
-                        ph_df = pd.DataFrame(ph_results)
-                        fig4 = px.line(
-                            ph_df, x='pH', y='qe',
-                            labels={'pH': 'pH', 'qe': 'Adsorpsiyon Kapasitesi, qe (mg/g)'},
-                            line_shape='spline', markers=True, color_discrete_sequence=['#27ae60']
-                        )
-                        fig4.update_layout(
-                            height=350, showlegend=False, plot_bgcolor='#f8f9fa', paper_bgcolor='white',
-                            margin=dict(l=50, r=30, t=30, b=50),
-                            font=dict(size=11, family='Inter, sans-serif'),
-                            xaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True),
-                            yaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True)
-                        )
-                        fig4.update_traces(line=dict(width=3), marker=dict(size=8, line=dict(width=1.5, color='white')))
-                        show_plotly(fig4)
-
-                    # Dozaj
-                    st.markdown("""
-                    <div style="margin: 15px 0;">
-                        <h3 style="color:#374151; font-weight: 500; font-size: 16px; margin: 0;">⚖️ Dozaj Duyarlılığı</h3>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.caption("Adsorban dozajının adsorpsiyon kapasitesi üzerindeki etkisi")
-                    dosages = [0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0, 12.0, 13.0, 14.0, 15.0, 16.0, 17.0, 18.0, 19.0, 20.0]
-                    dosage_results = []
-                    for dosage in dosages:
-                        test_row = base_params.copy()
-                        test_row["Target_Phar"] = vals["Target_Phar"]
-                        test_row["Dosage(g/L)"] = dosage
-                        test_df = pd.DataFrame([test_row])
-                        test_df = align_and_cast(test_df)
-                        try:
-                            pred_qe = float(pipe.predict(test_df)[0])
-                            dosage_results.append({'Dosage': dosage, 'qe': pred_qe})
-                        except:
-                            pass
-                    if dosage_results:
-                        dosage_df = pd.DataFrame(dosage_results)
-                        fig5 = px.line(
-                            dosage_df, x='Dosage', y='qe',
-                            labels={'Dosage': 'Dozaj (g/L)', 'qe': 'Adsorpsiyon Kapasitesi, qe (mg/g)'},
-                            line_shape='spline', markers=True, color_discrete_sequence=['#c0392b']
-                        )
-                        fig5.update_layout(
-                            height=350, showlegend=False, plot_bgcolor='#f8f9fa', paper_bgcolor='white',
-                            margin=dict(l=50, r=30, t=30, b=50),
-                            font=dict(size=11, family='Inter, sans-serif'),
-                            xaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True),
-                            yaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True)
-                        )
-                        fig5.update_traces(line=dict(width=3), marker=dict(size=8, line=dict(width=1.5, color='white')))
-                        show_plotly(fig5)
-
-                    # Contact Time
-                    st.markdown("""
-                    <div style="margin: 15px 0;">
-                        <h3 style="color:#374151; font-weight: 500; font-size: 16px; margin: 0;">⏱️ Temas Süresi Duyarlılığı</h3>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.caption("Temas süresinin adsorpsiyon kapasitesi üzerindeki etkisi")
-                    contact_times = [10, 20, 30, 40, 50, 60, 80, 100, 120, 140, 160, 180, 200, 220, 240, 260, 280, 300, 320, 340, 360, 380, 400, 420, 440, 460, 480, 500, 600, 720, 900, 1200, 1500, 1800, 2400, 3000, 3600, 4200, 4800, 5400, 6000]
-                    time_results = []
-                    for time in contact_times:
-                        test_row = base_params.copy()
-                        test_row["Target_Phar"] = vals["Target_Phar"]
-                        test_row["Contact_Time(min)"] = time
-                        test_df = pd.DataFrame([test_row])
-                        test_df = align_and_cast(test_df)
-                        try:
-                            pred_qe = float(pipe.predict(test_df)[0])
-                            time_results.append({'Contact_Time': time, 'qe': pred_qe})
-                        except:
-                            pass
-                    if time_results:
-                        time_df = pd.DataFrame(time_results)
-                        fig6 = px.line(
-                            time_df, x='Contact_Time', y='qe',
-                            labels={'Contact_Time': 'Temas Süresi (dk)', 'qe': 'Adsorpsiyon Kapasitesi, qe (mg/g)'},
-                            line_shape='spline', markers=True, color_discrete_sequence=['#8e44ad']
-                        )
-                        fig6.update_layout(
-                            height=350, showlegend=False, plot_bgcolor='#f8f9fa', paper_bgcolor='white',
-                            margin=dict(l=50, r=30, t=30, b=50),
-                            font=dict(size=11, family='Inter, sans-serif'),
-                            xaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True),
-                            yaxis=dict(showgrid=True, gridcolor='#e0e0e0', showline=True, linewidth=2, linecolor='#2c3e50', mirror=True)
-                        )
-                        fig6.update_traces(line=dict(width=3), marker=dict(size=8, line=dict(width=1.5, color='white')))
-                        show_plotly(fig6)
-
+                    for spec in PROCESS_SWEEPS:
+                        render_sweep(spec, curves[spec[0]])
+                tracing.end(_span_charts)
+                render_perf_panel()
             except Exception as e:
                 error_msg = str(e)
                 if "NaN" in error_msg or "missing" in error_msg.lower() or "nan" in error_msg.lower():
@@ -961,9 +764,18 @@ with tab2:
     }
     template_df = pd.DataFrame(template_data)
 
+    @st.cache_data(show_spinner=False)
+    def template_files(df):
+        """Şablon dosyaları süreç başına bir kez üretilir (her rerun'da değil)."""
+        buf = BytesIO()
+        with pd.ExcelWriter(buf, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False, sheet_name='Template')
+        return df.to_csv(index=False).encode('utf-8'), buf.getvalue()
+
+    template_csv, template_xlsx = template_files(template_df)
+
     col_temp1, col_temp2 = st.columns(2)
     with col_temp1:
-        template_csv = template_df.to_csv(index=False).encode('utf-8')
         st.download_button(
             label="📥 Şablon İndir (CSV)",
             data=template_csv,
@@ -973,13 +785,9 @@ with tab2:
             use_container_width=True
         )
     with col_temp2:
-        template_buffer = BytesIO()
-        with pd.ExcelWriter(template_buffer, engine='openpyxl') as writer:
-            template_df.to_excel(writer, index=False, sheet_name='Template')
-        template_buffer.seek(0)
         st.download_button(
             label="📥 Şablon İndir (Excel)",
-            data=template_buffer,
+            data=template_xlsx,
             file_name="aquaml_template.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             help="Excel şablonunu indirin",
@@ -987,65 +795,107 @@ with tab2:
         )
 
     st.markdown("---")
-    file = st.file_uploader("Dosya seç", type=["xlsx", "csv"])
+    upload_types = ["xlsx", "csv"] + (["parquet", "arrow", "feather"] if have.get("pyarrow", False) else [])
+    file = st.file_uploader("Dosya seç", type=upload_types)
 
     if file is not None:
-        try:
-            if file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            st.error(f"Dosya okunamadı: {type(e).__name__}: {e}")
-            st.stop()
-
         st.info("💡 **Not:** Model pipeline'ı tüm preprocessing'i yapacak (percent→molar, solute params, vs.)")
 
-        required_cols = ["Target_Phar", "Activation_Atmosphere"]
-        missing_required = [col for col in required_cols if col not in df.columns]
-        if missing_required:
-            st.error(f"Eksik gerekli kolon(lar): {missing_required}")
-            st.info("Excel'inizde Target_Phar ve Activation_Atmosphere kolonları olmalı.")
-            st.stop()
+        # Anahtar: (yükleme içeriği özeti, model sürümü). Özet file_id başına bir kez hesaplanır;
+        # aynı içerik tekrar yüklenirse skor dosyası diskten okunur, yeniden skorlanmaz.
+        if TRACER is not None:
+            TRACER.meta["flow"] = "batch"
+        digests = st.session_state.setdefault("upload_digests", {})
+        if file.file_id not in digests:
+            with tracing.span("upload_digest"):
+                digests[file.file_id] = content_digest(file)
+        batch_key = export_key(digests[file.file_id], MODEL_VERSION)
+        res = st.session_state.get("batch_result")
+
+        def _rescore(progress=None):
+            # Bellek LRU'su atlanır; disk deposu varsa daha önce skorlanmış satırlar yeniden hesaplanmaz
+            return score_cached(
+                lambda X: PRED_CACHE.predict(X, memory=False),
+                lambda: open_chunk_reader(file, file.name),
+                batch_key,
+                progress=progress,
+            )
+
+        # Skor dosyası başka bir oturumun TTL temizliğiyle silindiyse yeniden skorlanır
+        if res is not None and res.get("key") == batch_key and Path(res["out_path"]).exists():
+            touch_export(batch_key)   # ekrandaki sonucun dosyaları TTL'e takılmasın
+        else:
+            st.session_state.pop("batch_result", None)
+            prune_exports(keep=(batch_key,))
 
-        extra = [c for c in df.columns if c not in required_cols and not c.startswith(('Agent', 'Soaking', 'Activation', 'BET', 'Total', 'Micropore', 'Average', 'pHpzc', 'C_percent', 'H_percent', 'O_percent', 'N_percent', 'S_percent', 'Solution', 'Temperature', 'Initial', 'Dosage', 'Contact', 'Agitation'))]
-        if extra:
-            st.warning(f"Tanınmayan kolon(lar) yoksayılacak: {extra}")
+            bar = st.progress(0.0, text="Tahmin ediliyor...")
 
-        X = align_and_cast(df)
+            def _on_progress(frac, n_rows):
+                bar.progress(frac if frac is not None else 0.0, text=f"Tahmin ediliyor... {n_rows:,} satır")
 
-        try:
-            yhat = pipe.predict(X)
-        except Exception as e:
-            st.error(f"Tahmin sırasında hata: {type(e).__name__}: {e}")
-            st.stop()
+            try:
+                with profile_once("batch"), tracing.span("batch_score"):
+                    res = _rescore(progress=_on_progress)
+            except KeyError as e:
+                bar.empty()
+                st.error(str(e).strip("'\""))
+                st.info("Excel'inizde Target_Phar ve Activation_Atmosphere kolonları olmalı.")
+                st.stop()
+            except Exception as e:
+                bar.empty()
+                st.error(f"Dosya okunamadı / tahmin sırasında hata: {type(e).__name__}: {e}")
+                st.stop()
+            bar.empty()
+
+            res["key"] = batch_key
+            st.session_state["batch_result"] = res
+
+        if res["extra_cols"]:
+            st.warning(f"Tanınmayan kolon(lar) yoksayılacak: {res['extra_cols']}")
 
-        out = df.copy()
-        out["Pred_qe"] = yhat
-        st.success(f"✅ {len(out)} satır tahmin edildi.")
-        st.dataframe(out.head(20), use_container_width=True)
+        src_note = "önceki skorlamadan" if res.get("cached") else f"{res['seconds']:.1f} sn"
+        st.success(f"✅ {res['rows']:,} satır tahmin edildi ({src_note}).")
+        with tracing.span("preview_render"):
+            st.dataframe(res["preview"], use_container_width=True)
 
-        col1, col2 = st.columns(2)
+        # Çıktılar yalnız butona tıklanınca üretilir (data=callable) ve anahtar başına diskte saklanır
+        def _download(fmt):
+            try:
+                return export_bytes(batch_key, fmt)
+            except FileNotFoundError:
+                _rescore()   # gösterim ile tıklama arasında silindiyse: yeniden üret
+                return export_bytes(batch_key, fmt)
+
+        col1, col2, col3 = st.columns(3)
         with col1:
             st.download_button(
                 label="📥 Sonuçları İndir (CSV)",
-                data=out.to_csv(index=False).encode("utf-8"),
+                data=lambda: _download("csv"),
                 file_name="aquaml_predictions.csv",
                 mime="text/csv",
                 use_container_width=True
             )
         with col2:
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                out.to_excel(writer, index=False, sheet_name='Predictions')
-            buffer.seek(0)
-            st.download_button(
-                label="📥 Sonuçları İndir (Excel)",
-                data=buffer,
-                file_name="aquaml_predictions.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+            if res["rows"] <= EXCEL_MAX_ROWS:
+                st.download_button(
+                    label="📥 Sonuçları İndir (Excel)",
+                    data=lambda: _download("xlsx"),
+                    file_name="aquaml_predictions.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
+            else:
+                st.caption(f"Excel çıktısı {EXCEL_MAX_ROWS:,} satırla sınırlıdır; lütfen CSV'yi indirin.")
+        with col3:
+            if have.get("pyarrow", False):
+                st.download_button(
+                    label="📥 Sonuçları İndir (Parquet)",
+                    data=lambda: _download("parquet"),
+                    file_name="aquaml_predictions.parquet",
+                    mime="application/vnd.apache.parquet",
+                    use_container_width=True
+                )
+        render_perf_panel()
 
 # -------------------------------------------------
 # İPUÇLARI - Sayfa Altı
@@ -1068,7 +918,14 @@ with col_guide2:
     **📊 Excel Yükleme:**
     - Şablon dosyasını indirin ve doldurun.
     - Target_Phar ve Activation_Atmosphere zorunludur.
-    - Sonuçlar CSV veya Excel olarak indirilebilir.
+    - CSV, Excel, Parquet ve Arrow (Feather) dosyaları yüklenebilir.
+    - Sonuçlar CSV, Excel veya Parquet olarak indirilebilir.
     """)
 
 st.info("⚠️ **Önemli:** Micropore Volume, Total Pore Volume'den küçük olmalıdır.")
+
+# -------------------------------------------------
+# İZ KAYDI (script sonu; st.stop() ile kesilen çalışmalar yazılmaz — profil profile_once içinde yazılır)
+# -------------------------------------------------
+if TRACER is not None and TRACE_FILE:
+    tracing.write_jsonl(TRACE_FILE, TRACER.record())
@@ -0,0 +1,87 @@
+"""
+bench_cold_start.py
+-------------------
+
+Soğuk başlangıç ve süreç belleği: joblib Pipeline ↔ yerel model paketi (src/inference.py).
+- Her yükleyici ayrı, taze bir Python sürecinde çalıştırılır
+- import + yükleme süresi, ilk tahmin gecikmesi ve en yüksek RSS (ru_maxrss) ölçülür
+
+Kullanım:
+    python -m src.inference export --out model_bundle
+    python -m benchmarks.bench_cold_start --bundle model_bundle --repeat 3
+
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+import pandas as pd
+
+from src.config import BUNDLE_DIR, MODEL_PATH, META_PATH
+
+# Alt süreçte çalışan ölçüm kodu; sonucu tek satır JSON olarak yazar
+_CHILD = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+mode, model_path, meta_path, bundle_dir = sys.argv[1:5]
+if mode == "joblib":
+    from src.artifacts import load_artifacts
+    model = load_artifacts(model_path, meta_path)[0]
+else:
+    from src.inference import load_bundle
+    model = load_bundle(bundle_dir)
+t_load = time.perf_counter() - t0
+import pandas as pd
+from src.config import INPUT_COLS
+row = {c: 1.0 for c in INPUT_COLS}
+row.update({"Target_Phar": "CIP", "Activation_Atmosphere": "N2", "C_percent": 80.0})
+X = pd.DataFrame([row])
+t1 = time.perf_counter()
+model.predict(X)
+t_first = time.perf_counter() - t1
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({"load_s": t_load, "first_predict_ms": t_first * 1000, "total_s": time.perf_counter() - t0,
+                  "max_rss_mb": rss_mb, "sklearn_loaded": "sklearn" in sys.modules}))
+"""
+
+
+def measure(mode: str, model_path: str, meta_path: str, bundle_dir: str) -> Dict:
+    out = subprocess.run([sys.executable, "-c", _CHILD, mode, model_path, meta_path, bundle_dir],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(repeat: int, model_path: str, meta_path: str, bundle_dir: str) -> List[Dict]:
+    res = []
+    for mode in ("joblib", "bundle"):
+        for i in range(repeat):
+            r = measure(mode, model_path, meta_path, bundle_dir)
+            r.update({"mode": mode, "run": i})
+            res.append(r)
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Soğuk başlangıç / RSS karşılaştırması")
+    ap.add_argument("--bundle", default=BUNDLE_DIR)
+    ap.add_argument("--model", default=MODEL_PATH)
+    ap.add_argument("--meta", default=META_PATH)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", default=None, help="sonuçların yazılacağı JSON dosyası")
+    args = ap.parse_args()
+
+    res = run(args.repeat, args.model, args.meta, args.bundle)
+    df = pd.DataFrame(res)
+    print(df.groupby("mode")[["load_s", "first_predict_ms", "total_s", "max_rss_mb"]].median()
+            .to_string(float_format=lambda x: f"{x:.3f}"))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+        print(f"[OK] Sonuçlar yazıldı: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+bench_formats.py
+----------------
+
+Toplu skorlama girdi/çıktı biçimlerinin karşılaştırması (CSV, Excel, Parquet, Arrow IPC).
+- parse: dosyanın app'teki parça okuyucusuyla (open_chunk_reader) tamamen okunması
+- serialize: skor tablosunun ilgili biçime yazılması
+
+Kullanım:
+    python -m benchmarks.bench_formats --rows 20000 --json bench_formats.json
+
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.config import INPUT_COLS, have
+from src.batch_scoring import open_chunk_reader
+from src.features import pharm_codes
+
+
+def _synthetic_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """Biçim karşılaştırması için basit rastgele ham girdi tablosu."""
+    rng = np.random.default_rng(seed)
+    cols = {c: rng.uniform(0, 100, n) for c in INPUT_COLS if c not in ("Target_Phar", "Activation_Atmosphere")}
+    df = pd.DataFrame(cols)
+    df["Activation_Atmosphere"] = rng.choice(["N2", "Air", "SG"], n)
+    df["Target_Phar"] = rng.choice(pharm_codes(), n)
+    return df
+
+
+def _read_all(path: str) -> int:
+    with open(path, "rb") as f:
+        reader = open_chunk_reader(f, path)
+        n = 0
+        try:
+            while True:
+                chunk = reader.get_chunk(50_000)
+                if chunk is None:
+                    break
+                n += len(chunk)
+        finally:
+            reader.close()
+    return n
+
+
+def _writers() -> Dict[str, tuple]:
+    w = {
+        "csv": (".csv", lambda df, p: df.to_csv(p, index=False)),
+        "xlsx": (".xlsx", lambda df, p: df.to_excel(p, index=False)),
+    }
+    if have.get("pyarrow", False):
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        w["parquet"] = (".parquet", lambda df, p: df.to_parquet(p, index=False))
+        w["arrow"] = (".arrow", lambda df, p: feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), p))
+    return w
+
+
+def run(rows: int = 20_000, repeat: int = 3, formats: List[str] = None) -> List[Dict]:
+    df = _synthetic_frame(rows)
+    df["Pred_qe"] = 0.0
+    results = []
+    with tempfile.TemporaryDirectory(prefix="aquaml_bench_") as d:
+        for fmt, (ext, write) in _writers().items():
+            if formats and fmt not in formats:
+                continue
+            path = os.path.join(d, f"data{ext}")
+            t_write, t_read = [], []
+            for _ in range(repeat):
+                t0 = time.perf_counter(); write(df, path); t_write.append(time.perf_counter() - t0)
+                t0 = time.perf_counter(); n = _read_all(path); t_read.append(time.perf_counter() - t0)
+            assert n == rows, f"{fmt}: {n} != {rows}"
+            results.append({
+                "format": fmt,
+                "rows": rows,
+                "serialize_s": float(np.median(t_write)),
+                "parse_s": float(np.median(t_read)),
+                "size_mb": os.path.getsize(path) / 1e6,
+            })
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Girdi/çıktı biçimi karşılaştırması")
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--formats", nargs="*", default=None, help="örn. csv parquet")
+    ap.add_argument("--json", default=None, help="sonuçların yazılacağı JSON dosyası")
+    args = ap.parse_args()
+
+    res = run(args.rows, args.repeat, args.formats)
+    print(pd.DataFrame(res).to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+        print(f"[OK] Sonuçlar yazıldı: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
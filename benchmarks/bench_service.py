@@ -0,0 +1,147 @@
+"""
+bench_service.py
+----------------
+
+Yerel HTTP servisinin eşzamanlı tekil isteklerde verimi (istek/sn).
+- Aynı süreçte boş bir porta servis açılır; N istemci iş parçacığı keep-alive bağlantıyla /predict atar
+- Mikro-yığın pencereleri karşılaştırılır (0 ms = yalnız kuyruktakiler birleşir)
+- Referans: aynı satırların tek pipe.predict çağrısıyla skorlanması (yığın verimi)
+- --bulk-rows: toplu uçların karşılaştırması (/predict_batch JSON ↔ /score_arrow Arrow IPC akışı)
+
+Kullanım:
+    python -m benchmarks.bench_service --clients 16 --requests 100 --windows 0 2 5
+    python -m benchmarks.bench_service --windows --bulk-rows 200000
+
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+from src.config import MODEL_PATH, META_PATH, have
+from src.artifacts import load_artifacts
+from src.service import PredictionService, make_server, score_arrow_remote
+from benchmarks.bench_formats import _synthetic_frame
+
+
+def _client(port: int, rows: List[dict], errors: List[str]) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        for row in rows:
+            conn.request("POST", "/predict", body=json.dumps({"row": row}),
+                         headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            body = resp.read()
+            if resp.status != 200:
+                errors.append(body.decode("utf-8", "replace"))
+    finally:
+        conn.close()
+
+
+def _rows(n: int, seed: int) -> List[dict]:
+    df = _synthetic_frame(n, seed=seed)
+    return json.loads(df.to_json(orient="records"))
+
+
+def run_bulk(pipe, version: str, n: int) -> List[Dict]:
+    """Aynı n satırı /predict_batch (JSON) ve /score_arrow (Arrow IPC) ile skorlar."""
+    df = _synthetic_frame(n, seed=12345)
+    service = PredictionService(pipe, version, disk_cache=None)
+    server = make_server(service, "127.0.0.1", 0)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    res = []
+    try:
+        # JSON gövdesi SERVICE_MAX_BODY_MB ile sınırlı → en fazla 20k satır gönderilir
+        n_json = min(n, 20_000)
+        t = time.perf_counter()
+        body = json.dumps({"rows": json.loads(df.head(n_json).to_json(orient="records"))})
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+        conn.request("POST", "/predict_batch", body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        json.loads(resp.read())
+        conn.close()
+        dt = time.perf_counter() - t
+        res.append({"mode": "/predict_batch json", "rows": n_json, "seconds": dt, "rows_per_s": n_json / dt})
+
+        if have.get("pyarrow", False):
+            import pyarrow as pa
+
+            service.cache.clear()
+            t = time.perf_counter()
+            tbl = pa.Table.from_pandas(df, preserve_index=False)
+            got = sum(b.num_rows for b in score_arrow_remote(tbl.to_batches(max_chunksize=10_000), port=port))
+            dt = time.perf_counter() - t
+            res.append({"mode": "/score_arrow ipc", "rows": got, "seconds": dt, "rows_per_s": got / dt})
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+    return res
+
+
+def run(clients: int, requests: int, windows: List[float], model_path: str, meta_path: str) -> List[Dict]:
+    pipe, _, version = load_artifacts(model_path, meta_path)
+    n = clients * requests
+
+    res = []
+    # Yığın referansı (önbelleksiz)
+    X = pd.DataFrame(_rows(n, seed=999))
+    t = time.perf_counter()
+    pipe.predict(X)
+    dt = time.perf_counter() - t
+    res.append({"mode": "batch predict", "rows": n, "seconds": dt, "rows_per_s": n / dt, "micro_batches": 1})
+
+    for i, w in enumerate(windows):
+        # Her koşu farklı satırlar: önbellek isabeti ölçümü bozmasın
+        rows = _rows(n, seed=i)
+        service = PredictionService(pipe, version, window_ms=w, disk_cache=None)
+        server = make_server(service, "127.0.0.1", 0)
+        port = server.server_address[1]
+        th = threading.Thread(target=server.serve_forever, daemon=True)
+        th.start()
+        errors: List[str] = []
+        workers = [threading.Thread(target=_client, args=(port, rows[k::clients], errors)) for k in range(clients)]
+        t = time.perf_counter()
+        for wk in workers:
+            wk.start()
+        for wk in workers:
+            wk.join()
+        dt = time.perf_counter() - t
+        server.shutdown()
+        server.server_close()
+        service.close()
+        res.append({"mode": f"/predict window={w:g}ms", "rows": n, "seconds": dt, "rows_per_s": n / dt,
+                    "micro_batches": service.batcher.batches, "errors": len(errors)})
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HTTP servis mikro-yığın verimi")
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=50, help="istemci başına istek")
+    ap.add_argument("--windows", type=float, nargs="*", default=[0.0, 2.0, 5.0])
+    ap.add_argument("--bulk-rows", type=int, default=0, help=">0 ise toplu uçlar da karşılaştırılır")
+    ap.add_argument("--model", default=MODEL_PATH)
+    ap.add_argument("--meta", default=META_PATH)
+    ap.add_argument("--json", default=None, help="sonuçların yazılacağı JSON dosyası")
+    args = ap.parse_args()
+
+    res = run(args.clients, args.requests, args.windows, args.model, args.meta)
+    if args.bulk_rows > 0:
+        pipe, _, version = load_artifacts(args.model, args.meta)
+        res += run_bulk(pipe, version, args.bulk_rows)
+    print(pd.DataFrame(res).to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+        print(f"[OK] Sonuçlar yazıldı: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
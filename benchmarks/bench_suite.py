@@ -0,0 +1,349 @@
+"""
+bench_suite.py
+--------------
+
+Uçtan uca performans ölçüm paketi; sonuçlar JSON'a yazılır, kayıtlı taban çizgiyle karşılaştırılabilir.
+- artifact_load: best_model.joblib + meta yükleme süresi
+- single_predict: tek satır gecikmesi (p50 / p99) — hızlı yol (FastPredictor) ve tam Pipeline
+- batch_predict: 1k / 10k / 100k / 1M satırda Pipeline.predict verimi (satır/sn)
+- domain_fe: DomainFE.transform satır başı maliyeti (µs/satır)
+- single_submit: tekil form gönderimi (ana tahmin + ilaç karşılaştırması + dokuz duyarlılık eğrisi)
+- export: skor tablosunun CSV / xlsx / Parquet'e yazılması (uygulamadaki dışa aktarım fonksiyonları)
+
+Girdiler bu dosyadaki basit rastgele üreticiyle oluşturulur; eğitim Excel'i gerekmez. best_model.joblib yoksa sentetik veride
+küçük bir model eğitilip geçici dizine kaydedilir (sonuç dosyasında "model_source": "synthetic").
+
+--baseline verilirse her metrik taban çizgiyle karşılaştırılır; tolerans aşılırsa çıkış kodu 1 (CI'da kullanılabilir).
+
+Kullanım:
+    python -m benchmarks.bench_suite --out bench.json
+    python -m benchmarks.bench_suite --quick --baseline bench.json --tolerance 0.3
+    python -m benchmarks.bench_suite --input yeni.json --baseline bench.json   # yalnız karşılaştırma
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    have, MODEL_PATH, META_PATH, INPUT_COLS, CAT_INPUT_COLS, BENCH_BATCH_SIZES, BENCH_REGRESSION_TOL,
+)
+from src.features import pharm_codes, pharm_table
+
+CASES = ["artifact_load", "single_predict", "batch_predict", "domain_fe", "single_submit", "export"]
+
+# Metrik adı sonekine göre yön: süreler küçük, verim büyük olmalı
+_LOWER_IS_BETTER = ("_s", "_ms", "_us")
+_HIGHER_IS_BETTER = ("_per_s",)
+
+
+# ----------------------- Yardımcılar -----------------------
+def _timeit(fn: Callable[[], Any], repeat: int) -> List[float]:
+    out = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def _result(case: str, params: Dict[str, Any], **metrics) -> Dict[str, Any]:
+    return {"case": case, "params": params, "metrics": {k: round(float(v), 6) for k, v in metrics.items()}}
+
+
+def _drug_codes() -> List[str]:
+    return pharm_codes()
+
+
+def _synthetic_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """Ölçüm için basit rastgele ham girdi tablosu (INPUT_COLS sırasında; aynı seed → aynı tablo)."""
+    rng = np.random.default_rng(seed)
+    cols = {}
+    for c in INPUT_COLS:
+        if c == "Activation_Atmosphere":
+            cols[c] = rng.choice(["N2", "Air", "SG"], n)
+        elif c == "Target_Phar":
+            cols[c] = rng.choice(_drug_codes(), n)
+        else:
+            cols[c] = rng.uniform(0, 100, n)
+    return pd.DataFrame(cols)
+
+
+def _synthetic_target(df: pd.DataFrame, seed: int = 0) -> np.ndarray:
+    """Sentetik model eğitmek için gürültülü hedef (fiziksel bir model değildir)."""
+    rng = np.random.default_rng(seed)
+    size = df["Target_Phar"].map({code: vals["V"] for code, vals in pharm_table().items()}).to_numpy(dtype=float)
+    qe = (df["BET_Surface_Area(m2/g)"].to_numpy() / 10
+          + df["Initial_Concentration(mg/L)"].to_numpy() / (2 + df["Dosage(g/L)"].to_numpy())
+          + 20 * size)
+    return qe + rng.normal(0, 5, len(df))
+
+
+def _versions() -> Dict[str, str]:
+    import sklearn
+
+    v = {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+         "sklearn": sklearn.__version__}
+    for mod in ("catboost", "lightgbm", "xgboost"):
+        if have.get(mod, False):
+            v[mod] = __import__(mod).__version__
+    return v
+
+
+def _train_synthetic_model(out_dir: str, rows: int = 2_000) -> tuple:
+    """best_model.joblib yokken: sentetik veride DomainFE → CatBoost/LightGBM Pipeline eğitip kaydeder."""
+    import joblib
+    from sklearn.pipeline import Pipeline
+    from src.artifacts import load_meta
+    from src.preprocessing import DomainFE
+    from src.estimators import CatBoostSk, LGBMSk
+
+    features = load_meta(META_PATH)["features"]
+    cat_feats = [f for f in features if f in CAT_INPUT_COLS]
+    num_feats = [f for f in features if f not in cat_feats]
+    if have.get("catboost", False):
+        reg = CatBoostSk(cat_features=cat_feats, n_estimators=300, depth=6)
+    elif have.get("lightgbm", False):
+        reg = LGBMSk(categorical_feature=cat_feats, n_estimators=300)
+    else:
+        raise RuntimeError("Sentetik model için CatBoost veya LightGBM gerekli.")
+
+    X = _synthetic_frame(rows, seed=0)
+    pipe = Pipeline([("fe", DomainFE(num_feats=num_feats, cat_feats=cat_feats)), ("reg", reg)])
+    pipe.fit(X, _synthetic_target(X, seed=0))
+    model_path = os.path.join(out_dir, "best_model.joblib")
+    meta_path = os.path.join(out_dir, "best_model.meta.json")
+    joblib.dump(pipe, model_path)
+    shutil.copyfile(META_PATH, meta_path)
+    return model_path, meta_path
+
+
+# ----------------------- Ölçümler -----------------------
+def bench_artifact_load(model_path: str, meta_path: str, repeat: int) -> List[Dict]:
+    from src.artifacts import load_artifacts
+
+    times = _timeit(lambda: load_artifacts(model_path, meta_path), repeat)
+    return [_result("artifact_load", {}, median_s=np.median(times), min_s=min(times))]
+
+
+def bench_single_predict(pipe, features: List[str], calls: int) -> List[Dict]:
+    from src.fast_predict import FastPredictor
+
+    rows = _synthetic_frame(calls, seed=1).to_dict("records")
+    fast = FastPredictor(pipe, features)
+    out = []
+    for name, fn in (("fast", fast.predict_one), ("pipeline", lambda r: pipe.predict(pd.DataFrame([r])))):
+        fn(rows[0])  # ısınma
+        lat = []
+        for r in rows:
+            t0 = time.perf_counter()
+            fn(r)
+            lat.append(time.perf_counter() - t0)
+        lat_ms = np.asarray(lat) * 1000
+        out.append(_result("single_predict", {"path": name, "calls": calls},
+                           p50_ms=np.percentile(lat_ms, 50), p99_ms=np.percentile(lat_ms, 99)))
+    return out
+
+
+def bench_batch_predict(pipe, sizes: Sequence[int], repeat: int) -> List[Dict]:
+    out = []
+    for n in sizes:
+        X = _synthetic_frame(n, seed=2)
+        times = _timeit(lambda: pipe.predict(X), 1 if n >= 1_000_000 else repeat)
+        t = float(np.median(times))
+        out.append(_result("batch_predict", {"rows": n}, median_s=t, rows_per_s=n / t))
+    return out
+
+
+def bench_domain_fe(pipe, rows: int, repeat: int) -> List[Dict]:
+    fe = pipe.steps[0][1]
+    X = _synthetic_frame(rows, seed=3)
+    t = float(np.median(_timeit(lambda: fe.transform(X), repeat)))
+    return [_result("domain_fe", {"rows": rows}, median_s=t, per_row_us=t / rows * 1e6)]
+
+
+def bench_single_submit(pipe, features: List[str], repeat: int) -> List[Dict]:
+    """Uygulamadaki tekil akış: hızlı yoldan ana tahmin + tek predict'te ilaç karşılaştırması ve 9 eğri."""
+    from src.fast_predict import FastPredictor
+    from src.sweeps import default_sweeps, run_sweeps
+
+    fast = FastPredictor(pipe, features)
+    row = _synthetic_frame(1, seed=4).iloc[0].to_dict()
+    sweeps = [("drugs", "Target_Phar", _drug_codes()), *default_sweeps()]
+
+    def submit():
+        run_sweeps(pipe.predict, row, sweeps, base=fast.predict_one(row))
+
+    submit()  # ısınma
+    times = _timeit(submit, repeat)
+    n_rows = 1 + sum(len(s[2]) for s in sweeps)
+    return [_result("single_submit", {"scenarios": n_rows}, median_ms=np.median(times) * 1000)]
+
+
+def bench_export(pipe, rows: int, repeat: int) -> List[Dict]:
+    from src.batch_scoring import csv_to_parquet, csv_to_xlsx
+
+    df = _synthetic_frame(rows, seed=5)
+    df["Pred_qe"] = pipe.predict(df)
+    out = []
+    with tempfile.TemporaryDirectory(prefix="aquaml_bench_") as d:
+        csv_path = os.path.join(d, "scored.csv")
+        writers = {
+            "csv": lambda: df.to_csv(csv_path, index=False),
+            "xlsx": lambda: csv_to_xlsx(csv_path, os.path.join(d, "scored.xlsx")),
+        }
+        if have.get("pyarrow", False):
+            writers["parquet"] = lambda: csv_to_parquet(csv_path, os.path.join(d, "scored.parquet"))
+        for fmt, write in writers.items():
+            t = float(np.median(_timeit(write, repeat)))
+            out.append(_result("export", {"format": fmt, "rows": rows}, median_s=t))
+    return out
+
+
+def run(cases: Sequence[str], sizes: Sequence[int], repeat: int = 3, calls: int = 500,
+        fe_rows: int = 100_000, export_rows: int = 20_000) -> Dict[str, Any]:
+    from src.artifacts import load_artifacts
+
+    tmp = None
+    model_path, meta_path, source = MODEL_PATH, META_PATH, "best_model.joblib"
+    if not os.path.exists(MODEL_PATH):
+        tmp = tempfile.mkdtemp(prefix="aquaml_bench_model_")
+        print(f"  {MODEL_PATH} yok; sentetik veride model eğitiliyor...", file=sys.stderr)
+        model_path, meta_path = _train_synthetic_model(tmp)
+        source = "synthetic"
+    try:
+        pipe, features, model_version = load_artifacts(model_path, meta_path)
+        results: List[Dict] = []
+        for case in cases:
+            t0 = time.perf_counter()
+            if case == "artifact_load":
+                results += bench_artifact_load(model_path, meta_path, repeat)
+            elif case == "single_predict":
+                results += bench_single_predict(pipe, features, calls)
+            elif case == "batch_predict":
+                results += bench_batch_predict(pipe, sizes, repeat)
+            elif case == "domain_fe":
+                results += bench_domain_fe(pipe, fe_rows, repeat)
+            elif case == "single_submit":
+                results += bench_single_submit(pipe, features, repeat)
+            elif case == "export":
+                results += bench_export(pipe, export_rows, repeat)
+            else:
+                raise ValueError(f"Bilinmeyen ölçüm: {case}")
+            print(f"  {case}: {time.perf_counter() - t0:.2f} sn", file=sys.stderr)
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "host": platform.node(),
+            "cpu_count": os.cpu_count(),
+            "model_source": source,
+            "model_version": model_version,
+            "model": type(pipe.steps[-1][1]).__name__,
+            "versions": _versions(),
+        },
+        "results": results,
+    }
+
+
+# ----------------------- Karşılaştırma -----------------------
+def _key(r: Dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(r["params"].items()))
+    return f"{r['case']}[{params}]"
+
+
+def _direction(metric: str) -> int:
+    """+1: büyük iyi, -1: küçük iyi, 0: yönsüz (karşılaştırılmaz)."""
+    if metric.endswith(_HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(_LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = BENCH_REGRESSION_TOL) -> List[Dict]:
+    """
+    Ortak (ölçüm, parametre, metrik) üçlüleri için değişim oranı.
+    change > 0 iyileşme, change < 0 kötüleşme; -change > tolerance → regression=True.
+    """
+    base = {_key(r): r["metrics"] for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        old = base.get(_key(r))
+        if old is None:
+            continue
+        for metric, new_v in r["metrics"].items():
+            sign = _direction(metric)
+            old_v = old.get(metric)
+            if sign == 0 or not old_v:
+                continue
+            change = sign * (new_v - old_v) / abs(old_v)
+            rows.append({"benchmark": _key(r), "metric": metric, "baseline": old_v, "current": new_v,
+                         "change": round(change, 4), "regression": change < -tolerance})
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Aqua-ML performans ölçüm paketi")
+    ap.add_argument("--cases", nargs="*", default=CASES, choices=CASES)
+    ap.add_argument("--sizes", nargs="*", type=int, default=list(BENCH_BATCH_SIZES), help="batch_predict satır sayıları")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--calls", type=int, default=500, help="single_predict tekil çağrı sayısı")
+    ap.add_argument("--quick", action="store_true", help="küçük boyutlar (1M satır yok); hızlı duman testi")
+    ap.add_argument("--out", default=None, help="sonuçların yazılacağı JSON dosyası")
+    ap.add_argument("--input", default=None, help="ölçüm yapmadan bu sonuç dosyasını kullan")
+    ap.add_argument("--baseline", default=None, help="karşılaştırılacak taban çizgi JSON dosyası")
+    ap.add_argument("--tolerance", type=float, default=BENCH_REGRESSION_TOL, help="izin verilen kötüleşme oranı")
+    args = ap.parse_args()
+
+    if args.input:
+        with open(args.input, "r", encoding="utf-8") as f:
+            res = json.load(f)
+    else:
+        if args.quick:
+            sizes = [s for s in args.sizes if s <= 10_000]
+            res = run(args.cases, sizes, repeat=args.repeat, calls=min(args.calls, 200), fe_rows=20_000,
+                      export_rows=5_000)
+        else:
+            res = run(args.cases, args.sizes, repeat=args.repeat, calls=args.calls)
+
+    table = pd.DataFrame([{"benchmark": _key(r), **r["metrics"]} for r in res["results"]])
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.4g}"))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
+        print(f"[OK] Sonuçlar yazıldı: {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        if base["meta"].get("model_version") != res["meta"].get("model_version"):
+            print("[UYARI] Taban çizgi farklı bir modelle ölçülmüş; farklar modelden kaynaklanabilir.")
+        diff = compare(res, base, args.tolerance)
+        if not diff:
+            print("[UYARI] Taban çizgiyle ortak ölçüm yok.")
+            return
+        print()
+        print(pd.DataFrame(diff).to_string(index=False, float_format=lambda x: f"{x:.4g}"))
+        bad = [d for d in diff if d["regression"]]
+        if bad:
+            print(f"[HATA] {len(bad)} metrik %{args.tolerance * 100:.0f} toleransın ötesinde kötüleşti.")
+            raise SystemExit(1)
+        print(f"[OK] Kötüleşme yok (tolerans %{args.tolerance * 100:.0f}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+bench_training.py
+-----------------
+
+Eğitim tarafı süre ölçümleri (sentetik veri; eğitim Excel'i gerekmez).
+- eval: model havuzu değerlendirmesi — seri döngü (model model run_cv + tam fit) ↔ süreç havuzu
+  (src/eval_pool.py; (model, fold) görevleri, memmap veri). Duvar saati ve hızlanma raporlanır.
+- hpo: run_hpo_top2 duvar saati, farklı dış × iç thread bölmelerinde (src/thread_budget.py)
+- es: run_hpo_top2 erken durdurma kapalı ↔ açık (EARLY_STOPPING_ROUNDS); duvar saati ve aday başına CV R2
+
+Kullanım:
+    python -m benchmarks.bench_training --rows 5000
+    python -m benchmarks.bench_training --rows 20000 --json bench_training.json
+    python -m benchmarks.bench_training --cases hpo --splits 8x1 4x2 2x4 1x8 --n-iter 8
+    python -m benchmarks.bench_training --cases es --n-iter 8
+
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import pandas as pd
+from sklearn.model_selection import KFold
+
+from src.config import META_PATH, CAT_INPUT_COLS, EARLY_STOPPING_ROUNDS, N_JOBS, RANDOM_STATE
+from src.synthetic import synthetic_frame, synthetic_target
+from src.thread_budget import parse_budget
+
+CASES = ["eval", "hpo", "es"]
+
+
+def _dataset(rows: int) -> Tuple[pd.DataFrame, pd.Series, pd.DataFrame, List[str], List[str], Any]:
+    """Sentetik train/test + DomainFE kolonları + OHE ön işlemcisi (prepare_ml_data ile aynı yapı)."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+    from src.artifacts import load_meta
+
+    features = load_meta(META_PATH)["features"]
+    cat_feats = [f for f in features if f in CAT_INPUT_COLS]
+    num_feats = [f for f in features if f not in cat_feats]
+    X = synthetic_frame(rows + rows // 4, seed=0)
+    y = pd.Series(synthetic_target(X, seed=0), index=X.index, name="qe(mg/g)")
+    pre_ohe = ColumnTransformer(
+        [("num", "passthrough", num_feats),
+         ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), cat_feats)],
+        remainder="drop",
+    )
+    return X.iloc[:rows], y.iloc[:rows], X.iloc[rows:], num_feats, cat_feats, pre_ohe
+
+
+def bench_eval(rows: int, n_jobs: int, cv_splits: int = 5) -> Dict[str, Any]:
+    from src.cv_engine import run_cv
+    from src.eval_pool import evaluate_pool
+    from src.feature_cache import FEATURE_CACHE, precompute, without_fe
+    from src.pipelines import build_model_pool
+
+    X_train, y_train, X_test, num_feats, cat_feats, pre_ohe = _dataset(rows)
+    models = build_model_pool(pre_ohe, num_feats, cat_feats)
+    cv = KFold(n_splits=cv_splits, shuffle=True, random_state=RANDOM_STATE)
+
+    # Seri döngü (scheduler="serial" ile aynı iş: model başına run_cv + tam fit/predict)
+    FEATURE_CACHE.clear()
+    t0 = time.perf_counter()
+    for _, pipe in models:
+        if pipe is None:
+            continue
+        run_cv(pipe, X_train, y_train, cv=cv, n_jobs=1)
+        _, (Xt_tr, Xt_te) = precompute(pipe, X_train, X_test)
+        with without_fe(pipe) as body:
+            body.fit(Xt_tr, y_train)
+            body.predict(Xt_tr)
+            body.predict(Xt_te)
+    serial = time.perf_counter() - t0
+
+    FEATURE_CACHE.clear()
+    t0 = time.perf_counter()
+    pool = evaluate_pool(models, X_train, y_train, X_test, cv=cv, n_jobs=n_jobs)
+    wall = time.perf_counter() - t0
+
+    return {
+        "case": "eval",
+        "params": {"rows": rows, "n_jobs": n_jobs, "cv_splits": cv_splits,
+                   "models": [name for name, pipe in models if pipe is not None]},
+        "metrics": {"serial_s": round(serial, 3), "pool_s": round(wall, 3),
+                    "pool_tasks_s": round(pool["timing"]["wall_s"], 3),
+                    "speedup": round(serial / wall, 3) if wall > 0 else None},
+    }
+
+
+def _default_splits(total: int) -> List[Tuple[int, int]]:
+    """total çekirdek için dış × iç bölmeleri: total×1, ..., 1×total (2'nin kuvvetleri)."""
+    out, outer = [], total
+    while outer >= 1:
+        out.append((outer, max(1, total // outer)))
+        outer //= 2
+    if out[-1][0] != 1:
+        out.append((1, total))
+    return out
+
+
+def _hpo_setup(rows: int):
+    """(X_train, y_train, models, top2): top-2 = ilk kurulu booster + HistGBR (her zaman var)."""
+    from src.pipelines import build_model_pool
+
+    X_train, y_train, _, num_feats, cat_feats, pre_ohe = _dataset(rows)
+    models = build_model_pool(pre_ohe, num_feats, cat_feats)
+    names = [name for name, pipe in models if pipe is not None]
+    top2 = [n for n in names if n != "HistGBR"][:1] + ["HistGBR"]
+    return X_train, y_train, models, top2
+
+
+def bench_hpo(rows: int, splits: Sequence[Tuple[int, int]], n_iter: int) -> List[Dict[str, Any]]:
+    from src.tunning import run_hpo_top2
+
+    X_train, y_train, models, top2 = _hpo_setup(rows)
+    res_sorted = pd.DataFrame({"model": top2})
+
+    out = []
+    for outer, inner in splits:
+        t0 = time.perf_counter()
+        run_hpo_top2(models, res_sorted, X_train, y_train, n_iter=n_iter, thread_split=(outer, inner))
+        wall = time.perf_counter() - t0
+        out.append({
+            "case": "hpo",
+            "params": {"rows": rows, "n_iter": n_iter, "models": top2, "outer": outer, "inner": inner},
+            "metrics": {"wall_s": round(wall, 3)},
+        })
+    return out
+
+
+def bench_es(rows: int, n_iter: int, rounds: int = EARLY_STOPPING_ROUNDS) -> List[Dict[str, Any]]:
+    """Aynı arama erken durdurma kapalı (0) ve açık (rounds): duvar saati + aday başına en iyi CV R2."""
+    from src.tunning import run_hpo_top2
+
+    X_train, y_train, models, top2 = _hpo_setup(rows)
+    res_sorted = pd.DataFrame({"model": top2})
+
+    out = []
+    for es in (0, rounds):
+        t0 = time.perf_counter()
+        _, _, _, hp_results, _ = run_hpo_top2(models, res_sorted, X_train, y_train, n_iter=n_iter,
+                                              early_stopping_rounds=es, trial_store=None)
+        wall = time.perf_counter() - t0
+        out.append({
+            "case": "es",
+            "params": {"rows": rows, "n_iter": n_iter, "models": top2, "early_stopping_rounds": es},
+            "metrics": {"wall_s": round(wall, 3),
+                        **{f"cv_r2[{r['model']}]": round(r["cv_r2"], 4) for r in hp_results
+                           if r.get("cv_r2") is not None}},
+        })
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Eğitim tarafı süre ölçümleri")
+    ap.add_argument("--rows", type=int, default=5_000)
+    ap.add_argument("--n-jobs", type=int, default=N_JOBS)
+    ap.add_argument("--cases", nargs="+", default=CASES, choices=CASES)
+    ap.add_argument("--splits", nargs="+", default=None, help="HPO için DIŞxİÇ bölmeleri, örn. 8x1 4x2 1x8")
+    ap.add_argument("--n-iter", type=int, default=8, help="HPO deneme sayısı (aday başına)")
+    ap.add_argument("--json", default=None, help="sonuçların yazılacağı JSON dosyası")
+    args = ap.parse_args()
+
+    res: List[Dict[str, Any]] = []
+    if "eval" in args.cases:
+        res.append(bench_eval(args.rows, args.n_jobs))
+    if "hpo" in args.cases:
+        splits = [parse_budget(s) for s in args.splits] if args.splits else _default_splits(args.n_jobs)
+        res.extend(bench_hpo(args.rows, splits, args.n_iter))
+    if "es" in args.cases:
+        res.extend(bench_es(args.rows, args.n_iter))
+    for r in res:
+        tag = (f"{r['params']['outer']}x{r['params']['inner']}" if r["case"] == "hpo"
+               else f"rounds={r['params']['early_stopping_rounds']}" if r["case"] == "es" else "")
+        print(f"[{r['case']}{' ' + tag if tag else ''}] " + " | ".join(f"{k}={v}" for k, v in r["metrics"].items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+        print(f"[OK] Sonuçlar yazıldı: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
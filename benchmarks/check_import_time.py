@@ -0,0 +1,87 @@
+"""
+check_import_time.py
+--------------------
+
+İçe aktarma (import) süresi bütçe kontrolü; aşımda sıfırdan farklı çıkış kodu (CI'da kullanılabilir).
+- Modül her denemede taze bir Python sürecinde import edilir; en iyi (en kısa) süre bütçeyle karşılaştırılır
+- Opsiyonel ağır kütüphaneler (catboost, lightgbm, xgboost, interpret, matplotlib, optuna) import sırasında
+  yüklenmişse de hata verilir: bunlar ilk kullanımda yüklenmelidir
+- --top N: `python -X importtime` çıktısından en pahalı N modülü listeler
+
+Kullanım:
+    python -m benchmarks.check_import_time
+    python -m benchmarks.check_import_time --module src.service --budget 1.0 --top 10
+
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+from src.config import IMPORT_BUDGET_S
+
+# Import sırasında yüklenmemesi gereken modüller (config.have yalnız spec kontrolü yapar)
+LAZY_MODULES = ["catboost", "lightgbm", "xgboost", "interpret", "matplotlib", "optuna"]
+
+_CHILD = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+__import__(sys.argv[1])
+dt = time.perf_counter() - t0
+lazy = [m for m in sys.argv[2:] if m in sys.modules]
+print(json.dumps({"seconds": dt, "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "loaded": lazy}))
+"""
+
+
+def measure(module: str) -> Dict:
+    out = subprocess.run([sys.executable, "-c", _CHILD, module, *LAZY_MODULES],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def top_imports(module: str, n: int) -> List[tuple]:
+    """-X importtime çıktısından kümülatif süreye göre en pahalı n modül: [(ms, ad), ...]."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]) / 1000, parts[2].strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import süresi bütçe kontrolü")
+    ap.add_argument("--module", default="src.pipelines")
+    ap.add_argument("--budget", type=float, default=IMPORT_BUDGET_S, help="saniye")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--top", type=int, default=0, help=">0 ise en pahalı modüller listelenir")
+    args = ap.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(1, args.repeat))]
+    best = min(r["seconds"] for r in runs)
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+    print(f"import {args.module}: en iyi {best:.3f} sn / bütçe {args.budget:.3f} sn "
+          f"(RSS {runs[0]['max_rss_mb']:.0f} MB, {len(runs)} deneme)")
+    for ms, name in top_imports(args.module, args.top) if args.top > 0 else []:
+        print(f"  {ms:9.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"[HATA] Import sırasında yüklenmemesi gereken modüller: {loaded}")
+        failed = True
+    if best > args.budget:
+        print("[HATA] Import süresi bütçeyi aşıyor.")
+        failed = True
+    if failed:
+        raise SystemExit(1)
+    print("[OK] Import süresi bütçe içinde.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+check_parity.py
+---------------
+
+Fark testi (differential testing): her hızlandırılmış yol, joblib'den yüklenen referans Pipeline ile
+aynı rastgele girdilerde karşılaştırılır; uyuşmazlıkta sıfırdan farklı çıkış kodu (CI'da kullanılabilir).
+- Referans: Pipeline'ın model adımı + DomainFE'nin özgün zinciri
+  (add_pharm_features → clean_pharm_features → add_elemental_ratios → tip güvenliği → kolon seçimi)
+- Girdiler: src/synthetic.py satırları + bozucular: NaN'lar, sıfır / negatif C_percent,
+  bilinmeyen ilaç kodları, küçük-büyük harf karışık ve boşluklu kodlar
+- Kayıtlı yollar (PATHS): domain_fe (özellik matrisi), pipeline, fast_predict, inference_bundle,
+  inference_bundle_es, prediction_cache, sweeps, batch_scoring, traced_predict
+- inference_bundle_es: kayıtlı modelden bağımsız, erken durdurulmuş bir XGBoost Pipeline'ı sentetik veride
+  eğitilir, paketlenir ve kendi referansıyla karşılaştırılır (best_iteration sonrası ağaçlar kullanılmamalı)
+- Rapor: yol başına en büyük mutlak fark, uyuşmayan satır sayısı ve referansa göre verim oranı
+- test_model.py'deki "arayüz sonucu ile karşılaştır" kontrolünün tüm hızlı yollara genellenmiş hâli
+
+Kullanım:
+    python -m benchmarks.check_parity
+    python -m benchmarks.check_parity --rows 20000 --paths pipeline fast_predict --json parity.json
+
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import MODEL_PATH, META_PATH, INPUT_COLS, CAT_INPUT_COLS, PARITY_RTOL, PARITY_ATOL
+from src.synthetic import SyntheticGenerator, drug_codes
+
+# Referansla karşılaştırılacak yollar: ad → (kip, kurucu). Kurucu bağlamdan X → çıktı fonksiyonu döndürür
+# (kullanılamıyorsa _Skip fırlatır). kip "row": satır satır çağrılır, verim tekil referansla kıyaslanır.
+# Kendi modelini kuran yol referansını ctx["refs"][ad] içine yazar.
+PATHS: Dict[str, tuple] = {}
+
+
+class _Skip(Exception):
+    """Yol bu ortamda / modelde ölçülemiyor."""
+
+
+def register(name: str, mode: str = "batch"):
+    def deco(builder):
+        PATHS[name] = (mode, builder)
+        return builder
+    return deco
+
+
+# ----------------------- Girdiler -----------------------
+def adversarial_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """Sentetik ham girdi + FE'nin kenar durumları (NaN, C_percent ≤ 0, bilinmeyen / karışık harfli ilaç kodu)."""
+    rng = np.random.default_rng(seed)
+    X = SyntheticGenerator(seed).sample(n)
+    num_cols = [c for c in INPUT_COLS if c not in CAT_INPUT_COLS]
+    for c in num_cols:
+        X.loc[rng.random(n) < 0.03, c] = np.nan
+    u = rng.random(n)
+    X.loc[u < 0.05, "C_percent"] = 0.0
+    X.loc[(u >= 0.05) & (u < 0.10), "C_percent"] = -rng.uniform(0.1, 10.0, n)[(u >= 0.05) & (u < 0.10)]
+
+    codes = X["Target_Phar"].to_numpy(dtype=object)
+    u = rng.random(n)
+    unknown = u < 0.05
+    codes[unknown] = rng.choice(["XYZ", "ZZ9", "", "C1P"], int(unknown.sum()))
+    mixed = (u >= 0.05) & (u < 0.15)
+    codes[mixed] = [f" {c.lower()}" if i % 2 else f"{c.title()} " for i, c in enumerate(codes[mixed])]
+    X["Target_Phar"] = codes
+    return X
+
+
+# ----------------------- Referans -----------------------
+def legacy_domain_features(X: pd.DataFrame, num_feats: List[str], cat_feats: List[str]) -> pd.DataFrame:
+    """DomainFE.transform'un vektörleştirme öncesi (özgün) zinciri."""
+    from src.features import add_pharm_features, clean_pharm_features, add_elemental_ratios
+
+    df = X.copy()
+    df.columns = df.columns.astype(str).str.strip()
+    df = add_pharm_features(df)
+    df = clean_pharm_features(df)
+    df = add_elemental_ratios(df)
+    for c in num_feats:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    for c in cat_feats:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    return df[[c for c in (num_feats + cat_feats) if c in df.columns]]
+
+
+def reference_predict(pipe) -> Callable[[pd.DataFrame], np.ndarray]:
+    """Özgün FE zinciri + Pipeline'ın kalan adımları (ara dönüştürücüler + model)."""
+    fe = pipe.steps[0][1]
+    rest = [est for _, est in pipe.steps[1:]]
+
+    def predict(X):
+        Xt = legacy_domain_features(X, list(fe.num_feats), list(fe.cat_feats))
+        for est in rest[:-1]:
+            Xt = est.transform(Xt)
+        return np.asarray(rest[-1].predict(Xt), dtype=float).ravel()
+
+    return predict
+
+
+# ----------------------- Kayıtlı yollar -----------------------
+@register("domain_fe")
+def _domain_fe(ctx):
+    fe = ctx["pipe"].steps[0][1]
+    return fe.transform
+
+
+@register("pipeline")
+def _pipeline(ctx):
+    return ctx["pipe"].predict
+
+
+@register("traced_predict")
+def _traced(ctx):
+    from src import tracing
+
+    fn = tracing.traced_predict(ctx["pipe"])
+
+    def predict(X):
+        tracing.start_trace("parity")
+        try:
+            return fn(X)
+        finally:
+            tracing.start_trace("parity", enabled=False)
+
+    return predict
+
+
+@register("fast_predict", mode="row")
+def _fast(ctx):
+    from src.fast_predict import FastPredictor
+
+    fast = FastPredictor(ctx["pipe"], ctx["features"])
+    if not fast.enabled:
+        raise _Skip(f"hızlı yol kapalı: {fast.reason}")
+    ctx["notes"]["fast_predict"] = fast
+    return fast.predict_one
+
+
+@register("inference_bundle")
+def _bundle(ctx):
+    from src.inference import export_bundle, load_bundle
+
+    out = os.path.join(ctx["tmp"], "bundle")
+    try:
+        export_bundle(out, ctx["model_path"], ctx["meta_path"])
+    except ValueError as e:
+        raise _Skip(str(e))
+    return load_bundle(out).predict
+
+
+@register("inference_bundle_es")
+def _bundle_es(ctx):
+    """Erken durdurulmuş XGBoost: paket tahmini XGBRegressor.predict (en iyi iterasyon) ile aynı olmalı."""
+    import joblib
+    from sklearn.base import clone
+    from sklearn.pipeline import Pipeline
+    from src.config import have
+    from src.estimators import XGBSk
+    from src.inference import export_bundle, load_bundle
+    from src.synthetic import synthetic_target
+
+    if not have.get("xgboost", False):
+        raise _Skip("XGBoost yüklü değil")
+    fe = ctx["pipe"].steps[0][1]
+    X_fit = SyntheticGenerator(1).sample(2_000)
+    # çok ağaç + yüksek öğrenme oranı → erken durdurma kesin devreye girer
+    pipe = Pipeline([("fe", clone(fe)),
+                     ("reg", XGBSk(n_estimators=2_000, learning_rate=0.3, early_stopping_rounds=10))])
+    pipe.fit(X_fit, synthetic_target(X_fit, seed=1))
+    best = pipe.steps[-1][1].best_iteration_
+    if best is None or best + 1 >= pipe.steps[-1][1].n_estimators:
+        raise _Skip("erken durdurma devreye girmedi")
+
+    model_path = os.path.join(ctx["tmp"], "es_model.joblib")
+    meta_path = os.path.join(ctx["tmp"], "es_model.meta.json")
+    joblib.dump(pipe, model_path)
+    with open(ctx["meta_path"], "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({**meta, "best_name": "XGBoost-GBTree (ES)"}, f)
+    out = os.path.join(ctx["tmp"], "bundle_es")
+    export_bundle(out, model_path, meta_path)
+    ctx["refs"]["inference_bundle_es"] = reference_predict(pipe)
+    ctx["notes"]["inference_bundle_es"] = f"best_iteration={best} / {pipe.steps[-1][1].n_estimators}"
+    return load_bundle(out).predict
+
+
+@register("prediction_cache")
+def _cache(ctx):
+    from src.prediction_cache import PredictionCache
+
+    cache = PredictionCache(ctx["pipe"].predict, model_version="parity", maxsize=10 * len(ctx["X"]) + 1)
+    cache.predict(ctx["X"])  # önbelleği doldur; ölçülen çağrı yalnız önbellekten okur
+    return cache.predict
+
+
+@register("sweeps")
+def _sweeps(ctx):
+    """Toplu senaryo motoru: her satır taban senaryo, ayrıca ilaç ve 9 duyarlılık eğrisi tek predict'te."""
+    from src.sweeps import build_scenario_frame, default_sweeps, run_sweeps
+
+    sweeps = [("drugs", "Target_Phar", drug_codes()), *default_sweeps()]
+    bases = ctx["X"].head(20).to_dict("records")
+    # Referans ve yol aynı senaryo tablosunda karşılaştırılır
+    ctx["inputs"]["sweeps"] = pd.concat(
+        [build_scenario_frame(b, sweeps, include_base=True)[0] for b in bases], ignore_index=True)
+
+    def predict(_X):
+        out = []
+        for b in bases:
+            res = run_sweeps(ctx["pipe"].predict, b, sweeps)
+            out.append([res["base"]])
+            out += [res["curves"][name]["qe"].to_numpy() for name, *_ in sweeps]
+        return np.concatenate(out)
+
+    return predict
+
+
+@register("batch_scoring")
+def _batch(ctx):
+    """Parça parça akış skorlama (ChunkSizer + sink); girdi Parquet'ten (yoksa CSV) okunur."""
+    from src.config import have
+    from src.batch_scoring import ChunkSizer, open_chunk_reader, score_stream
+
+    ext = ".parquet" if have.get("pyarrow", False) else ".csv"
+    in_path = os.path.join(ctx["tmp"], f"batch_in{ext}")
+    if ext == ".parquet":
+        ctx["X"].to_parquet(in_path, index=False)
+    else:
+        ctx["X"].to_csv(in_path, index=False)
+
+    def predict(_X):
+        with open(in_path, "rb") as f:
+            reader = open_chunk_reader(f, in_path)
+            try:
+                res = score_stream(ctx["pipe"].predict, reader, fmt="csv",
+                                   sizer=ChunkSizer(start=700, min_rows=300, max_rows=3000))
+            finally:
+                reader.close()
+        try:
+            return pd.read_csv(res["out_path"])["Pred_qe"].to_numpy(dtype=float)
+        finally:
+            os.remove(res["out_path"])
+
+    return predict
+
+
+# ----------------------- Karşılaştırma -----------------------
+def _compare(ref, out, rtol: float, atol: float) -> Dict[str, Any]:
+    """Tahmin dizileri veya özellik matrisleri (sayısal kolonlar toleranslı, kategorikler birebir)."""
+    if isinstance(ref, pd.DataFrame):
+        if list(ref.columns) != list(out.columns) or len(ref) != len(out):
+            return {"max_abs_diff": float("inf"), "mismatches": len(ref), "note": "kolonlar / uzunluk farklı"}
+        bad = np.zeros(len(ref), dtype=bool)
+        max_diff = 0.0
+        for c in ref.columns:
+            a, b = ref[c], out[c]
+            if isinstance(a.dtype, pd.CategoricalDtype) or a.dtype == object:
+                x, y = a.astype(object).to_numpy(), b.astype(object).to_numpy()
+                bad |= ~((x == y) | (pd.isna(x) & pd.isna(y)))
+            else:
+                res = _compare(a.to_numpy(dtype=float), b.to_numpy(dtype=float), rtol, atol)
+                bad |= res.pop("_bad")
+                max_diff = max(max_diff, res["max_abs_diff"])
+        return {"max_abs_diff": max_diff, "mismatches": int(bad.sum())}
+
+    a, b = np.asarray(ref, dtype=float).ravel(), np.asarray(out, dtype=float).ravel()
+    if a.shape != b.shape:
+        return {"max_abs_diff": float("inf"), "mismatches": len(a), "note": f"uzunluk {len(b)} != {len(a)}"}
+    both_nan = np.isnan(a) & np.isnan(b)
+    ok = np.isclose(a, b, rtol=rtol, atol=atol) | both_nan
+    diff = np.where(both_nan, 0.0, np.abs(a - b))
+    return {"max_abs_diff": float(np.nanmax(diff)) if len(diff) else 0.0, "mismatches": int((~ok).sum()),
+            "_bad": ~ok}
+
+
+def _timed(fn: Callable, X: pd.DataFrame, mode: str):
+    t0 = time.perf_counter()
+    if mode == "row":
+        out = np.array([fn(r) for r in X.to_dict("records")], dtype=float)
+    else:
+        out = fn(X)
+    return out, time.perf_counter() - t0
+
+
+def run(rows: int = 5_000, seed: int = 0, paths: Optional[Sequence[str]] = None, row_limit: int = 300,
+        rtol: float = PARITY_RTOL, atol: float = PARITY_ATOL, model_path: str = MODEL_PATH,
+        meta_path: str = META_PATH) -> List[Dict[str, Any]]:
+    from src.artifacts import load_artifacts
+
+    pipe, features, _ = load_artifacts(model_path, meta_path)
+    fe = pipe.steps[0][1]
+    ref_predict = reference_predict(pipe)
+    ref_features = lambda X: legacy_domain_features(X, list(fe.num_feats), list(fe.cat_feats))  # noqa: E731
+
+    X = adversarial_frame(rows, seed)
+    tmp = tempfile.mkdtemp(prefix="aquaml_parity_")
+    ctx = {"pipe": pipe, "features": features, "X": X, "tmp": tmp, "model_path": model_path,
+           "meta_path": meta_path, "inputs": {}, "refs": {}, "notes": {}}
+    results = []
+    try:
+        for name in paths or list(PATHS):
+            mode, builder = PATHS[name]
+            row = {"path": name, "mode": mode}
+            try:
+                fn = builder(ctx)
+            except _Skip as e:
+                results.append({**row, "status": "SKIP", "note": str(e)})
+                continue
+            Xp = ctx["inputs"].get(name, X if mode == "batch" else X.head(row_limit))
+            ref_fn = ctx["refs"].get(name) or (ref_features if name == "domain_fe" else ref_predict)
+            ref_mode_fn = (lambda r: ref_fn(pd.DataFrame([r]))[0]) if mode == "row" else ref_fn
+
+            ref, t_ref = _timed(ref_mode_fn, Xp, mode)
+            out, t_path = _timed(fn, Xp, mode)
+            cmp = _compare(ref, out, rtol, atol)
+            cmp.pop("_bad", None)
+            results.append({
+                **row, "rows": len(Xp), **cmp,
+                "status": "OK" if cmp["mismatches"] == 0 else "FAIL",
+                "ref_rows_per_s": len(Xp) / max(t_ref, 1e-9),
+                "rows_per_s": len(Xp) / max(t_path, 1e-9),
+                "speedup": t_ref / max(t_path, 1e-9),
+            })
+        fast = ctx["notes"].get("fast_predict")
+        if fast is not None:
+            for r in results:
+                if r["path"] == "fast_predict":
+                    r["note"] = f"hızlı {fast.fast_calls}, Pipeline'a düşen {fast.fallback_calls}"
+        for r in results:
+            if r["path"] == "inference_bundle_es" and r["status"] != "SKIP":
+                r["note"] = ctx["notes"].get("inference_bundle_es")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Hızlı yollar ↔ referans Pipeline fark testi")
+    ap.add_argument("--rows", type=int, default=5_000)
+    ap.add_argument("--row-limit", type=int, default=300, help="satır satır yollar için satır sayısı")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--paths", nargs="*", default=None, choices=list(PATHS))
+    ap.add_argument("--rtol", type=float, default=PARITY_RTOL)
+    ap.add_argument("--atol", type=float, default=PARITY_ATOL)
+    ap.add_argument("--model", default=MODEL_PATH)
+    ap.add_argument("--meta", default=META_PATH)
+    ap.add_argument("--json", default=None, help="sonuçların yazılacağı JSON dosyası")
+    args = ap.parse_args()
+
+    res = run(args.rows, args.seed, args.paths, args.row_limit, args.rtol, args.atol, args.model, args.meta)
+    cols = ["path", "mode", "status", "rows", "mismatches", "max_abs_diff", "ref_rows_per_s", "rows_per_s",
+            "speedup", "note"]
+    table = pd.DataFrame(res).reindex(columns=cols)
+    print(table.to_string(index=False, na_rep="", float_format=lambda x: f"{x:.4g}"))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
+        print(f"[OK] Sonuçlar yazıldı: {args.json}")
+
+    failed = [r["path"] for r in res if r["status"] == "FAIL"]
+    if failed:
+        print(f"[HATA] Referanstan sapan yollar: {failed} (rtol={args.rtol:g}, atol={args.atol:g})")
+        raise SystemExit(1)
+    print("[OK] Tüm yollar referansla uyumlu.")
+
+
+if __name__ == "__main__":
+    main()
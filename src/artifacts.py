@@ -0,0 +1,39 @@
+"""
+artifacts.py
+------------
+
+Eğitilmiş model artefaktlarının ortak yükleyicisi.
+- best_model.joblib (DomainFE → model Pipeline) + best_model.meta.json (feature listesi)
+- Model sürümü (parmak izi) tahmin önbelleği anahtarlarına girer
+- Streamlit uygulaması, HTTP servisi ve test scripti aynı fonksiyonu kullanır
+
+"""
+
+import json
+from typing import Any, List, Tuple
+
+import joblib
+
+from src.config import MODEL_PATH, META_PATH
+from src.prediction_cache import model_fingerprint
+
+
+def load_meta(meta_path: str = META_PATH) -> dict:
+    """Meta dosyasını okur; 'features' boşsa ValueError fırlatır."""
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if not meta.get("features"):
+        raise ValueError("Meta içinde 'features' anahtarı boş görünüyor.")
+    return meta
+
+
+def load_artifacts(model_path: str = MODEL_PATH, meta_path: str = META_PATH) -> Tuple[Any, List[str], str]:
+    """
+    Pipeline + feature listesi + model sürümü döndürür.
+
+    Dosya yoksa FileNotFoundError (e.filename hangi dosya olduğunu söyler),
+    meta geçersizse ValueError; diğer hatalar olduğu gibi yükselir.
+    """
+    pipe = joblib.load(model_path)  # fit edilmiş sklearn Pipeline
+    meta = load_meta(meta_path)
+    return pipe, list(meta["features"]), model_fingerprint(model_path, meta_path)
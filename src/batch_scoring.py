@@ -0,0 +1,687 @@
+"""
+batch_scoring.py
+----------------
+
+Büyük Excel/CSV/Parquet/Arrow dosyaları için parça parça (streaming) toplu skorlama.
+- CSV: pandas okuyucusu ile değişken boyutlu parçalar
+- Excel: openpyxl read-only satır yineleyicisi (tüm sayfa belleğe alınmaz)
+- Parquet / Arrow IPC: pyarrow kayıt grupları; yalnız modelin okuduğu kolonlar okunur (projeksiyon)
+- Parça boyutu süre/bellek ölçümüne göre otomatik ayarlanır
+- Sonuçlar CSV veya Parquet dosyasına parça parça yazılır; bellekte yalnız önizleme tutulur
+- score_file: dosyadan dosyaya programatik skorlama API'si
+- score_arrow_stream: Arrow IPC akışından Arrow IPC akışına skorlama (HTTP servisi toplu ucu)
+- Dışa aktarım önbelleği: skor dosyası ve xlsx/parquet çıktıları (yükleme özeti, model sürümü)
+  anahtarıyla diskte tutulur; xlsx/parquet yalnız istendiğinde üretilir
+
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    have, INPUT_COLS, CAT_INPUT_COLS, DERIVED_COLS, BATCH_CHUNK_START, BATCH_CHUNK_MIN, BATCH_CHUNK_MAX,
+    BATCH_CHUNK_SECONDS, BATCH_CHUNK_MEM_MB, EXPORT_DIR, EXPORT_TTL_HOURS,
+)
+
+REQUIRED_COLS = ["Target_Phar", "Activation_Atmosphere"]
+# Pipeline'ın okuyabildiği tüm kolonlar (ham girdiler + hazır gelebilecek türetilmişler)
+MODEL_INPUT_COLS = list(dict.fromkeys(INPUT_COLS + DERIVED_COLS))
+
+ARROW_EXTS = (".parquet", ".pq", ".arrow", ".feather", ".ipc", ".arrows")
+
+
+# ----------------------- Parça boyutu ayarı -----------------------
+class ChunkSizer:
+    """
+    Bir sonraki parçanın satır sayısını önceki parçanın süresine ve
+    satır başı bellek kullanımına göre ayarlar (üstel yumuşatma ile).
+    """
+    def __init__(
+        self,
+        start: int = BATCH_CHUNK_START,
+        min_rows: int = BATCH_CHUNK_MIN,
+        max_rows: int = BATCH_CHUNK_MAX,
+        target_seconds: float = BATCH_CHUNK_SECONDS,
+        mem_mb: float = BATCH_CHUNK_MEM_MB,
+    ):
+        self.size = int(start)
+        self.min_rows = int(min_rows)
+        self.max_rows = int(max_rows)
+        self.target_seconds = float(target_seconds)
+        self.mem_bytes = float(mem_mb) * 1024 * 1024
+
+    def update(self, n_rows: int, seconds: float, nbytes: int) -> int:
+        if n_rows <= 0:
+            return self.size
+        by_time = self.target_seconds * n_rows / max(seconds, 1e-6)
+        by_mem = self.mem_bytes * n_rows / max(nbytes, 1)
+        want = min(by_time, by_mem)
+        # Ani sıçramaları önle: en fazla 4 kat büyüme, yarı yarıya yumuşatma
+        want = min(want, 4 * self.size)
+        self.size = int(np.clip(0.5 * self.size + 0.5 * want, self.min_rows, self.max_rows))
+        return self.size
+
+
+# ----------------------- Okuyucular -----------------------
+class _CsvChunks:
+    def __init__(self, src):
+        self._src = src
+        self._reader = pd.read_csv(src, iterator=True)
+
+    def get_chunk(self, n: int) -> Optional[pd.DataFrame]:
+        try:
+            return self._reader.get_chunk(n)
+        except StopIteration:
+            return None
+
+    def progress(self) -> Optional[float]:
+        """Okunan bayt oranı (dosya boyutu biliniyorsa)."""
+        try:
+            size = getattr(self._src, "size", None) or os.fstat(self._src.fileno()).st_size
+            return min(1.0, self._src.tell() / size) if size else None
+        except Exception:
+            return None
+
+    def close(self) -> None:
+        self._reader.close()
+
+
+def _dedup_names(names: Sequence[str]) -> List[str]:
+    """pd.read_excel / read_csv ile aynı: tekrar eden başlıklar 'X', 'X.1', 'X.2', ... olur."""
+    counts: Dict[str, int] = {}
+    out = []
+    for name in names:
+        cur = counts.get(name, 0)
+        while cur > 0:
+            counts[name] = cur + 1
+            name = f"{name}.{cur}"
+            cur = counts.get(name, 0)
+        out.append(name)
+        counts[name] = cur + 1
+    return out
+
+
+class _ExcelChunks:
+    def __init__(self, src):
+        from openpyxl import load_workbook  # geç import
+
+        self._wb = load_workbook(src, read_only=True, data_only=True)
+        ws = self._wb.worksheets[0]  # pd.read_excel varsayılanı: ilk sayfa
+        self._total = (ws.max_row - 1) if ws.max_row else None
+        self._rows = ws.iter_rows(values_only=True)
+        header = next(self._rows, None) or ()
+        # pandas ile aynı: isimsiz başlıklar "Unnamed: i", tekrar edenler "X.1", "X.2" (yoksa X[col] DataFrame döner)
+        self.columns = _dedup_names([str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)])
+        self._done = 0
+
+    def get_chunk(self, n: int) -> Optional[pd.DataFrame]:
+        buf: List[tuple] = []
+        for row in self._rows:
+            if all(v is None for v in row):
+                continue  # read-only kipte sondaki boş satırlar
+            buf.append(row)
+            if len(buf) >= n:
+                break
+        if not buf:
+            return None
+        self._done += len(buf)
+        width = len(self.columns)
+        buf = [tuple(r[:width]) + (None,) * (width - len(r)) for r in buf]
+        return pd.DataFrame.from_records(buf, columns=self.columns)
+
+    def progress(self) -> Optional[float]:
+        return min(1.0, self._done / self._total) if self._total else None
+
+    def close(self) -> None:
+        self._wb.close()
+
+
+class _ArrowChunks:
+    """
+    pyarrow RecordBatch akışını istenen boyutta pandas parçalarına çevirir.
+    Sayısal kolonlar Arrow tamponlarından NumPy'a satır bazlı Python nesnesi üretmeden aktarılır.
+    """
+    def __init__(self, batches: Iterator, total_rows: Optional[int], closer: Optional[Callable] = None):
+        self._batches = batches
+        self._total = total_rows
+        self._pending = None  # önceki parçadan artan RecordBatch dilimi
+        self._done = 0
+        self._closer = closer
+
+    def get_chunk(self, n: int) -> Optional[pd.DataFrame]:
+        import pyarrow as pa
+
+        parts, have_rows = [], 0
+        while have_rows < n:
+            b = self._pending if self._pending is not None else next(self._batches, None)
+            self._pending = None
+            if b is None:
+                break
+            need = n - have_rows
+            if b.num_rows > need:
+                self._pending = b.slice(need)
+                b = b.slice(0, need)
+            parts.append(b)
+            have_rows += b.num_rows
+        if not parts:
+            return None
+        self._done += have_rows
+        return pa.Table.from_batches(parts).to_pandas()
+
+    def progress(self) -> Optional[float]:
+        return min(1.0, self._done / self._total) if self._total else None
+
+    def close(self) -> None:
+        if self._closer is not None:
+            self._closer()
+
+
+def _projection(names: Sequence[str], columns) -> List[str]:
+    """columns=None → model kolonları (varsa); 'all' → tüm kolonlar; liste → model kolonları + liste."""
+    if columns == "all":
+        return list(names)
+    wanted = set(MODEL_INPUT_COLS) | set(columns or ())
+    return [c for c in names if c.strip() in wanted or c in wanted]
+
+
+def _open_parquet(src, columns=None, batch_size: int = 8192) -> _ArrowChunks:
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(src)
+    proj = _projection(pf.schema_arrow.names, columns)
+    return _ArrowChunks(pf.iter_batches(batch_size=batch_size, columns=proj),
+                        pf.metadata.num_rows, closer=pf.close)
+
+
+def _open_arrow_ipc(src, columns=None) -> _ArrowChunks:
+    """Arrow IPC dosya (Feather v2) veya akış (stream) biçimi; sihirli baytlara göre seçilir."""
+    import pyarrow.ipc as ipc
+
+    head = src.read(6)
+    src.seek(0)
+    if head == b"ARROW1":
+        schema = ipc.open_file(src).schema
+        src.seek(0)
+        fields = [i for i, f in enumerate(schema) if f.name in _projection(schema.names, columns)]
+        reader = ipc.open_file(src, options=ipc.IpcReadOptions(included_fields=fields))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        return _ArrowChunks(batches, None)
+
+    reader = ipc.open_stream(src)
+    proj = _projection(reader.schema.names, columns)
+    batches = (b.select(proj) for b in reader)
+    return _ArrowChunks(batches, None, closer=reader.close)
+
+
+def open_chunk_reader(src, filename: str, columns=None):
+    """
+    Dosya uzantısına göre parça okuyucu döndürür (get_chunk / progress / close).
+    columns: yalnız Parquet/Arrow için projeksiyon (None → model kolonları, 'all' → hepsi).
+    Kaynak başa sarılır: aynı yükleme (ör. Streamlit UploadedFile) ikinci kez okunabilir.
+    """
+    if hasattr(src, "seek"):
+        src.seek(0)
+    name = filename.lower()
+    if name.endswith(".csv"):
+        return _CsvChunks(src)
+    if name.endswith((".xlsx", ".xlsm")):
+        return _ExcelChunks(src)
+    if name.endswith(ARROW_EXTS):
+        if not have.get("pyarrow", False):
+            raise RuntimeError("Parquet/Arrow için pyarrow yüklü değil.")
+        if name.endswith((".parquet", ".pq")):
+            return _open_parquet(src, columns)
+        return _open_arrow_ipc(src, columns)
+    raise ValueError(f"Desteklenmeyen dosya türü: {filename}")
+
+
+# ----------------------- Yazıcılar -----------------------
+class _CsvSink:
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "w", encoding="utf-8", newline="")
+        self._header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self._f, header=self._header, index=False)
+        self._header = False
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class _ParquetSink:
+    """
+    Parquet yazıcı; şema parçalardan bağımsız ve sabittir: modelin sayısal girdileri (INPUT_COLS / DERIVED_COLS,
+    CAT_INPUT_COLS hariç) ve 'Pred_qe' float64 — model de bunları pd.to_numeric(errors="coerce") ile okur;
+    diğer tüm kolonlar (kategorikler, kimlikler, kullanıcı kolonları) metin. Metne çevirme değer kaybettirmez:
+    sonraki parçalarda harf içeren kimlikler NaN'a, tamsayı kimlikler float'a dönmez.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._writer = None
+        self._schema = None
+
+    @staticmethod
+    def _is_float(c: str) -> bool:
+        return c == "Pred_qe" or (c in MODEL_INPUT_COLS and c not in CAT_INPUT_COLS)
+
+    @staticmethod
+    def _as_str(s: pd.Series) -> pd.Series:
+        return s.map(lambda v: None if v is None or (isinstance(v, float) and v != v) else str(v))
+
+    def _cast(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Parçayı sabit şemaya çevirir (eksik kolon → boş, fazla kolon atılır)."""
+        import pyarrow as pa
+
+        cols = {}
+        for field in self._schema:
+            s = df[field.name] if field.name in df.columns else pd.Series([None] * len(df), index=df.index)
+            if pa.types.is_floating(field.type):
+                cols[field.name] = pd.to_numeric(s, errors="coerce").astype("float64")
+            else:
+                cols[field.name] = self._as_str(s)
+        return pd.DataFrame(cols)
+
+    def write(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = df.rename(columns=str)
+        if self._writer is None:
+            fields = [pa.field(c, pa.float64() if self._is_float(c) else pa.string()) for c in df.columns]
+            self._schema = pa.schema(fields)
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+        table = pa.Table.from_pandas(self._cast(df), schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _open_sink(path: str, fmt: str):
+    if fmt == "csv":
+        return _CsvSink(path)
+    if fmt == "parquet":
+        if not have.get("pyarrow", False):
+            raise RuntimeError("Parquet için pyarrow yüklü değil.")
+        return _ParquetSink(path)
+    raise ValueError(f"Desteklenmeyen çıktı biçimi: {fmt}")
+
+
+# ----------------------- Skorlama -----------------------
+def score_stream(
+    predict_fn: Callable[[pd.DataFrame], Any],
+    reader,
+    out_path: Optional[str] = None,
+    progress: Optional[Callable[[Optional[float], int], None]] = None,
+    sizer: Optional[ChunkSizer] = None,
+    preview_rows: int = 20,
+    fmt: str = "csv",
+) -> Dict[str, Any]:
+    """
+    Okuyucudan parça parça okur, tahmin eder, 'Pred_qe' ekleyip out_path'e (csv | parquet) yazar.
+
+    Dönüş:
+        {"out_path", "rows", "columns", "extra_cols", "preview", "seconds"}
+    Gerekli kolonlar eksikse KeyError fırlatır (ilk parçada kontrol edilir).
+    """
+    sizer = sizer or ChunkSizer()
+    if out_path is None:
+        fd, out_path = tempfile.mkstemp(prefix="aquaml_pred_", suffix=f".{fmt}")
+        os.close(fd)
+
+    rows = 0
+    preview: Optional[pd.DataFrame] = None
+    columns: List[str] = []
+    extra: List[str] = []
+    t_start = time.perf_counter()
+
+    sink = _open_sink(out_path, fmt)
+    try:
+        while True:
+            chunk = reader.get_chunk(sizer.size)
+            if chunk is None or len(chunk) == 0:
+                break
+
+            if rows == 0:
+                columns = [str(c) for c in chunk.columns]
+                missing = [c for c in REQUIRED_COLS if c not in columns]
+                if missing:
+                    raise KeyError(f"Eksik gerekli kolon(lar): {missing}")
+                known = set(MODEL_INPUT_COLS)
+                extra = [c for c in columns if c.strip() not in known]
+
+            t0 = time.perf_counter()
+            yhat = predict_fn(chunk)
+            elapsed = time.perf_counter() - t0
+
+            out = chunk
+            out["Pred_qe"] = np.asarray(yhat, dtype=float).ravel()
+            sink.write(out)
+
+            if preview is None or len(preview) < preview_rows:
+                head = out.head(preview_rows - (0 if preview is None else len(preview)))
+                preview = head if preview is None else pd.concat([preview, head], ignore_index=True)
+
+            rows += len(out)
+            sizer.update(len(out), elapsed, int(out.memory_usage(deep=True).sum()))
+            if progress is not None:
+                progress(reader.progress(), rows)
+    finally:
+        sink.close()
+        reader.close()
+
+    return {
+        "out_path": out_path,
+        "rows": rows,
+        "columns": columns,
+        "extra_cols": extra,
+        "preview": preview if preview is not None else pd.DataFrame(columns=columns + ["Pred_qe"]),
+        "seconds": time.perf_counter() - t_start,
+    }
+
+
+def score_arrow_stream(
+    predict_fn: Callable[[pd.DataFrame], Any],
+    source,
+    sink,
+    sizer: Optional[ChunkSizer] = None,
+    on_schema: Optional[Callable[[Any], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Arrow IPC akışı → Arrow IPC akışı (ör. HTTP gövdesi → HTTP yanıtı).
+
+    Girdi kolonlarının tamamı değiştirilmeden (kopyasız) çıktıya geçer, sona 'Pred_qe' eklenir.
+    Yalnız modelin okuduğu kolonlar pandas'a çevrilir; sayısal tamponlar NumPy'a satır bazlı
+    Python nesnesi üretmeden aktarılır. Küçük gelen kayıt grupları ChunkSizer boyutuna kadar
+    biriktirilip tek predict çağrısında skorlanır.
+
+    on_schema: girdi şeması doğrulandıktan sonra, ilk çıktı baytından önce çağrılır
+               (HTTP katmanı başarı başlıklarını burada gönderir).
+    Gerekli kolonlar eksikse KeyError, girdi zaten 'Pred_qe' içeriyorsa ValueError fırlatır.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    sizer = sizer or ChunkSizer()
+    reader = ipc.open_stream(source)
+    schema = reader.schema
+    missing = [c for c in REQUIRED_COLS if c not in schema.names]
+    if missing:
+        raise KeyError(f"Eksik gerekli kolon(lar): {missing}")
+    if "Pred_qe" in schema.names:
+        raise ValueError("Girdi zaten 'Pred_qe' kolonu içeriyor.")
+    proj = _projection(schema.names, None)
+    out_schema = schema.append(pa.field("Pred_qe", pa.float64()))
+    if on_schema is not None:
+        on_schema(out_schema)
+
+    rows = 0
+    t_start = time.perf_counter()
+    writer = ipc.new_stream(sink, out_schema)
+
+    def _flush(parts: List[Any]) -> int:
+        tbl = pa.Table.from_batches(parts, schema=schema)
+        X = tbl.select(proj).to_pandas()
+        t0 = time.perf_counter()
+        yhat = np.asarray(predict_fn(X), dtype=float).ravel()
+        elapsed = time.perf_counter() - t0
+        out = tbl.append_column("Pred_qe", pa.array(yhat, type=pa.float64()))
+        for b in out.to_batches():
+            writer.write_batch(b)
+        if hasattr(sink, "flush"):
+            sink.flush()
+        sizer.update(len(X), elapsed, int(X.memory_usage(deep=True).sum()))
+        return len(X)
+
+    parts, n_parts = [], 0
+    for batch in reader:
+        if batch.num_rows == 0:
+            continue
+        parts.append(batch)
+        n_parts += batch.num_rows
+        if n_parts >= sizer.size:
+            rows += _flush(parts)
+            parts, n_parts = [], 0
+    if parts:
+        rows += _flush(parts)
+    # Akış sonu işareti yalnız başarıyla bitince yazılır; hata durumunda karşı taraf
+    # kesik akışı tamamlanmış sanmaz.
+    writer.close()
+
+    return {"rows": rows, "columns": schema.names, "seconds": time.perf_counter() - t_start}
+
+
+def iter_csv(path: str, chunksize: int = 50_000) -> Iterator[pd.DataFrame]:
+    """Skor dosyasını parça parça geri okur (dışa aktarımlar için)."""
+    with pd.read_csv(path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def csv_to_xlsx(csv_path: str, xlsx_path: str, sheet_name: str = "Predictions", chunksize: int = 50_000) -> str:
+    """
+    Skor CSV'sini satır satır xlsx'e aktarır (bellek sabit kalır).
+    xlsxwriter varsa constant_memory kipi, yoksa openpyxl write-only kipi kullanılır.
+    """
+    if have.get("xlsxwriter", False):
+        import xlsxwriter  # geç import
+
+        wb = xlsxwriter.Workbook(xlsx_path, {"constant_memory": True, "nan_inf_to_errors": True})
+        ws = wb.add_worksheet(sheet_name)
+        r = 0
+        try:
+            for chunk in iter_csv(csv_path, chunksize):
+                if r == 0:
+                    ws.write_row(0, 0, [str(c) for c in chunk.columns])
+                    r = 1
+                for rec in chunk.itertuples(index=False, name=None):
+                    ws.write_row(r, 0, [None if (isinstance(v, float) and v != v) else v for v in rec])
+                    r += 1
+        finally:
+            wb.close()
+        return xlsx_path
+
+    from openpyxl import Workbook  # geç import
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    header_done = False
+    for chunk in iter_csv(csv_path, chunksize):
+        if not header_done:
+            ws.append(list(chunk.columns))
+            header_done = True
+        for rec in chunk.itertuples(index=False, name=None):
+            ws.append([None if (isinstance(v, float) and v != v) else v for v in rec])
+    wb.save(xlsx_path)
+    return xlsx_path
+
+
+def csv_to_parquet(csv_path: str, parquet_path: str, chunksize: int = 50_000) -> str:
+    """Skor CSV'sini parça parça Parquet'e aktarır."""
+    sink = _open_sink(parquet_path, "parquet")
+    try:
+        for chunk in iter_csv(csv_path, chunksize):
+            sink.write(chunk)
+    finally:
+        sink.close()
+    return parquet_path
+
+
+def score_file(
+    predict_fn: Callable[[pd.DataFrame], Any],
+    in_path: str,
+    out_path: str,
+    columns=None,
+    progress: Optional[Callable[[Optional[float], int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Programatik toplu skorlama: girdi (csv/xlsx/parquet/arrow) → çıktı (csv/parquet).
+    Çıktı biçimi out_path uzantısından belirlenir.
+
+    Örnek:
+        pipe = joblib.load("best_model.joblib")
+        score_file(pipe.predict, "screening.parquet", "screening_scored.parquet")
+    """
+    fmt = "parquet" if out_path.lower().endswith((".parquet", ".pq")) else "csv"
+    with open(in_path, "rb") as src:
+        reader = open_chunk_reader(src, in_path, columns=columns)
+        return score_stream(predict_fn, reader, out_path=out_path, progress=progress, fmt=fmt)
+
+
+# ----------------------- Dışa aktarım önbelleği -----------------------
+_EXPORTERS = {"xlsx": csv_to_xlsx, "parquet": csv_to_parquet}
+_export_locks: Dict[str, threading.Lock] = {}
+_export_locks_guard = threading.Lock()
+
+
+def content_digest(src, block: int = 1 << 20) -> str:
+    """Yüklenen dosyanın (file-like) içerik özeti; okuma konumu başa alınır."""
+    h = hashlib.sha256()
+    src.seek(0)
+    for buf in iter(lambda: src.read(block), b""):
+        h.update(buf)
+    src.seek(0)
+    return h.hexdigest()
+
+
+def export_key(content_hash: str, model_version: str) -> str:
+    """(yükleme özeti, model sürümü) → dosya adına uygun kısa anahtar."""
+    return hashlib.blake2b(f"{content_hash}|{model_version}".encode(), digest_size=12).hexdigest()
+
+
+def export_path(key: str, fmt: str, root: str = EXPORT_DIR) -> str:
+    return os.path.join(root, f"aquaml_{key}.{fmt}")
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _export_locks_guard:
+        return _export_locks.setdefault(path, threading.Lock())
+
+
+def load_scored(key: str, root: str = EXPORT_DIR, preview_rows: int = 20) -> Optional[Dict[str, Any]]:
+    """Daha önce skorlanmış sonucu (CSV + özet) diskten döndürür; yoksa None."""
+    csv_path, meta_path = export_path(key, "csv", root), export_path(key, "json", root)
+    if not (os.path.exists(csv_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            res = json.load(f)
+        res["preview"] = pd.read_csv(csv_path, nrows=preview_rows)
+    except Exception:
+        return None
+    touch_export(key, root)
+    res["out_path"] = csv_path
+    return res
+
+
+def touch_export(key: str, root: str = EXPORT_DIR) -> None:
+    """Anahtarın mevcut dosyalarının (csv / json / xlsx / parquet) son kullanımını şimdiye çeker (TTL'i yeniler)."""
+    now = time.time()
+    for fmt in ("csv", "json", *_EXPORTERS):
+        try:
+            os.utime(export_path(key, fmt, root), (now, now))
+        except OSError:
+            pass
+
+
+def score_cached(
+    predict_fn: Callable[[pd.DataFrame], Any],
+    reader_factory: Callable[[], Any],
+    key: str,
+    root: str = EXPORT_DIR,
+    progress: Optional[Callable[[Optional[float], int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Aynı anahtar için skor dosyası varsa onu döndürür; yoksa score_stream ile üretip kaydeder.
+    Yazım geçici dosyaya yapılır ve tamamlanınca yerine taşınır (yarım dosya görünmez).
+    """
+    res = load_scored(key, root)
+    if res is not None:
+        res["cached"] = True
+        return res
+
+    os.makedirs(root, exist_ok=True)
+    csv_path = export_path(key, "csv", root)
+    tmp = f"{csv_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        res = score_stream(predict_fn, reader_factory(), out_path=tmp, progress=progress)
+        os.replace(tmp, csv_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    res["out_path"] = csv_path
+    meta = {k: res[k] for k in ("rows", "columns", "extra_cols", "seconds")}
+    meta_tmp = f"{export_path(key, 'json', root)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(meta_tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(meta_tmp, export_path(key, "json", root))
+    res["cached"] = False
+    return res
+
+
+def ensure_export(key: str, fmt: str, root: str = EXPORT_DIR) -> str:
+    """
+    İstenen biçimdeki çıktının yolunu döndürür; yoksa skor CSV'sinden bir kez üretir.
+    Aynı dosya için eşzamanlı istekler (ör. iki indirme tıklaması) tek üretimde buluşur.
+    Skor CSV'si yoksa (ör. prune_exports sildiyse) FileNotFoundError.
+    """
+    csv_path = export_path(key, "csv", root)
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(csv_path)   # TTL temizliği silmiş olabilir; çağıran yeniden skorlar
+    if fmt == "csv":
+        touch_export(key, root)
+        return csv_path
+    if fmt not in _EXPORTERS:
+        raise ValueError(f"Desteklenmeyen dışa aktarım biçimi: {fmt}")
+    path = export_path(key, fmt, root)
+    with _lock_for(path):
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                _EXPORTERS[fmt](csv_path, tmp)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+    touch_export(key, root)
+    return path
+
+
+def export_bytes(key: str, fmt: str, root: str = EXPORT_DIR) -> bytes:
+    """İndirme butonu için: çıktıyı (gerekirse üretip) bayt olarak döndürür."""
+    with open(ensure_export(key, fmt, root), "rb") as f:
+        return f.read()
+
+
+def prune_exports(root: str = EXPORT_DIR, ttl_hours: float = EXPORT_TTL_HOURS, keep: Sequence[str] = ()) -> int:
+    """
+    Son kullanımı ttl_hours'tan eski önbellek dosyalarını siler; silinen dosya sayısını döndürür.
+    keep: dokunulmayacak anahtarlar (ör. çağıran oturumun ekranda gösterdiği sonuç).
+    """
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - ttl_hours * 3600
+    skip = {os.path.basename(export_path(k, "", root)) for k in keep}   # "aquaml_<anahtar>."
+    removed = 0
+    for name in os.listdir(root):
+        if not name.startswith("aquaml_") or any(name.startswith(p) for p in skip):
+            continue
+        p = os.path.join(root, name)
+        try:
+            if os.path.getmtime(p) < cutoff:
+                os.remove(p)
+                removed += 1
+        except OSError:
+            pass
+    return removed
@@ -16,33 +16,150 @@ RANDOM_STATE = 42  # rastgelelik sabiti (reprodüksiyon için)
 TEST_SIZE    = 0.2 # test verisi oranı
 
 # -------------------- PAKET KONTROL (opsiyonel modeller) --------------------
-have = {}
-
-try:
-    from catboost import CatBoostRegressor
-    have["catboost"] = True
-except Exception:
-    have["catboost"] = False
-
-try:
-    from lightgbm import LGBMRegressor
-    have["lightgbm"] = True
-except Exception:
-    have["lightgbm"] = False
-
-try:
-    from xgboost import XGBRegressor
-    have["xgboost"] = True
-except Exception:
-    have["xgboost"] = False
-
-try:
-    from interpret.glassbox import ExplainableBoostingRegressor
-    have["ebm"] = True
-except Exception:
-    have["ebm"] = False
+# Kütüphaneler burada import EDİLMEZ: yalnız kurulu olup olmadıkları (modül spec'i) kontrol edilir.
+# Gerçek import ilk kullanımda yapılır (estimators.py / pipelines.py içindeki geç importlar).
+# Böylece `from src.config import ...` booster kütüphanelerini yüklemez; süre ve bellek için
+# `python -m benchmarks.check_import_time --module src.config` çalıştırın.
+import importlib.util
+
+_OPTIONAL_MODULES = {
+    "catboost": "catboost",
+    "lightgbm": "lightgbm",
+    "xgboost": "xgboost",
+    "ebm": "interpret",       # interpret.glassbox.ExplainableBoostingRegressor
+    "pyarrow": "pyarrow",     # Parquet / Arrow IPC toplu skorlama için
+    "xlsxwriter": "xlsxwriter",  # sabit bellekli (constant_memory) xlsx dışa aktarımı
+    "optuna": "optuna",       # model tabanlı (TPE) hiperparametre araması (src/tpe_search.py)
+}
+
+
+def _module_available(name: str) -> bool:
+    """Modül kurulu mu? (import etmeden; yalnız üst paket spec'i aranır)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+have = {key: _module_available(mod) for key, mod in _OPTIONAL_MODULES.items()}
+
 
 # -------------------- CPU / loky fix --------------------
 import os
+import tempfile
 N_JOBS = max(1, (os.cpu_count() or 1) - 1)
 os.environ["LOKY_MAX_CPU_COUNT"] = str(N_JOBS)
+# Model havuzu değerlendirmesi (evaluation.evaluate_and_plot): "serial" → modeller sırayla (varsayılan, eski döngü);
+# "process" → (model, fold) görevleri süreç havuzunda, veri memmap ile paylaşılır (src/eval_pool.py)
+EVAL_SCHEDULER = os.environ.get("AQUAML_EVAL_SCHEDULER", "serial")
+# Eğitimde çekirdek bütçesi (src/thread_budget.py): "auto" → dış işçi = görev sayısı (en çok N_JOBS),
+# kalan çekirdekler booster/BLAS thread'lerine; sabit bölme için "DIŞxİÇ", örn. AQUAML_THREAD_BUDGET=4x2
+THREAD_BUDGET  = os.environ.get("AQUAML_THREAD_BUDGET", "auto")
+
+# -------------------- HPO / EĞİTİM --------------------
+EARLY_STOPPING_ROUNDS = 50   # HPO denemelerinde booster erken durdurma sabrı (src/estimators.py; 0 → kapalı)
+ES_VALID_FRACTION     = 0.1  # erken durdurma için eğitim verisinden ayrılan iç doğrulama oranı
+HPO_SEARCH            = "random"  # run_hpo_top2 arama modu: "random" | "halving" (successive halving) | "tpe" (Optuna)
+HPO_TIME_BUDGET_S     = None  # "tpe": aday model başına duvar saati bütçesi (sn); None → yalnız deneme sayısı
+HALVING_FACTOR        = 3     # her basamakta adayların 1/3'ü bir üst bütçeye yükselir
+HALVING_RESOURCE      = "auto"  # "auto" (boosting tur sayısı, yoksa alt örneklem) | "n_samples" | "reg__n_estimators"
+FEATURE_CACHE_SIZE    = 8     # CV/HPO'da tutulan DomainFE özellik matrisi sayısı (src/feature_cache.py)
+# Sürdürülebilir / paylaşımlı HPO deneme deposu (src/trial_store.py): yol verilirse her deneme bitince SQLite'a
+# yazılır; birden fazla süreç/makine aynı dosyadan deneme çeker. Örn: AQUAML_HPO_STORE=/shared/hpo_trials.sqlite
+HPO_TRIAL_STORE       = os.environ.get("AQUAML_HPO_STORE") or None
+HPO_TRIAL_LEASE_S     = 3600.0  # alınan denemenin kira süresi; dolarsa (çöken işçi) başka işçi yeniden alır
+
+# -------------------- INFERENCE (uygulama tarafı) --------------------
+MODEL_PATH = "best_model.joblib"     # fit edilmiş sklearn Pipeline (DomainFE → model)
+META_PATH  = "best_model.meta.json"  # feature listesi + eğitim özeti
+BUNDLE_DIR = "model_bundle"          # yerel model + şema paketi (python -m src.inference export)
+
+# Pipeline'ın okuduğu ham girdi kolonları (UI formu / Excel şablonu ile aynı sıra)
+INPUT_COLS = [
+    "Agent/Sample(g/g)", "Soaking_Time(min)", "Soaking_Temp(K)",
+    "Activation_Time(min)", "Activation_Temp(K)", "Activation_Heating_Rate (K/min)",
+    "BET_Surface_Area(m2/g)", "Total_Pore_Volume(cm3/g)", "Micropore_Volume(cm3/g)",
+    "Average_Pore_Diameter(nm)", "pHpzc",
+    "C_percent", "H_percent", "O_percent", "N_percent", "S_percent",
+    "Solution_pH", "Temperature(K)", "Initial_Concentration(mg/L)",
+    "Dosage(g/L)", "Contact_Time(min)", "Agitation_speed(rpm)",
+    "Activation_Atmosphere", "Target_Phar",
+]
+# DomainFE'nin ürettiği ama girdide hazır da gelebilen kolonlar (varsa tahmini etkiler)
+DERIVED_COLS = ["E", "S", "A", "B", "V", "C_molar", "H_C_molar", "O_C_molar", "N_C_molar", "S_C_molar"]
+CAT_INPUT_COLS = ["Activation_Atmosphere", "Target_Phar"]
+ATMOSPHERES    = ["N2", "Air", "SG"]          # Activation_Atmosphere seçenekleri (UI radyo düğmesi)
+DRUG_MAP_PATH  = "ui_specs/drug_map.xlsx"     # ilaç adı ↔ kod (Display_Name, Code)
+
+# UI girdi sınırları — uygulama formu ve sentetik veri üretici (src/synthetic.py) aynı tanımı kullanır
+# Slider tanımları (min, max, step)
+SLIDER_SPEC = {
+    "Solution_pH": (0.5, 13.5, 0.1),
+    "Temperature(K)": (290.0, 340.0, 1.0),
+    "Dosage(g/L)": (0.05, 18.0, 0.1),
+    "Contact_Time(min)": (0.0, 6000.0, 1.0),
+    "Initial_Concentration(mg/L)": (0.0, 1000.0, 1.0),
+    "Agitation_speed(rpm)": (0.0, 700.0, 10.0),
+    "C_percent": (0.0, 100.0, 0.1),
+    "H_percent": (0.0, 10.0, 0.1),
+    "O_percent": (0.0, 50.0, 0.1),
+    "N_percent": (0.0, 20.0, 0.1),
+    "S_percent": (0.0, 5.0, 0.1),
+}
+# Number input (oklu kutu) tanımları (min, max, step, default)
+NUMBER_INPUT_SPEC = {
+    "BET_Surface_Area(m2/g)": (0.0, 3000.0, 10.0, None),
+    "Total_Pore_Volume(cm3/g)": (0.0, 5.0, 0.01, None),
+    "Micropore_Volume(cm3/g)": (0.0, 2.0, 0.01, None),
+    "Average_Pore_Diameter(nm)": (0.0, 50.0, 0.1, None),
+    "pHpzc": (0.0, 14.0, 0.1, None),
+    "Agent/Sample(g/g)": (0.0, 10.0, 0.01, None),
+    "Soaking_Time(min)": (0.0, 6000.0, 5.0, None),
+    "Soaking_Temp(K)": (273.0, 500.0, 1.0, None),
+    "Activation_Time(min)": (0.0, 360.0, 5.0, None),
+    "Activation_Temp(K)": (550.0, 1200.0, 10.0, None),
+    "Activation_Heating_Rate (K/min)": (0.0, 50.0, 1.0, None),
+}
+
+PRED_CACHE_SIZE     = 50_000  # bellek içi LRU tahmin önbelleği (satır)
+PRED_CACHE_DECIMALS = 6       # anahtar üretiminde sayıların yuvarlanacağı basamak
+# Opsiyonel kalıcı (SQLite) tahmin önbelleği: yol verilirse etkinleşir; birden fazla
+# Streamlit süreci aynı dosyayı paylaşabilir. Örn: AQUAML_PRED_CACHE_DB=/var/cache/aquaml/pred.sqlite
+PRED_DISK_CACHE      = os.environ.get("AQUAML_PRED_CACHE_DB") or None
+PRED_DISK_CACHE_ROWS = 2_000_000  # diskteki en fazla satır; aşılınca en eski kullanılanlar silinir
+PRED_DISK_TOUCH_S    = 600        # okumada last_used yalnız bundan eski satırlar için yazılır (sn)
+
+# Toplu (Excel/CSV) skorlama: parça boyutu her parçanın süresi ve bellek kullanımına göre ayarlanır
+BATCH_CHUNK_START    = 2_000    # ilk parça (satır)
+BATCH_CHUNK_MIN      = 500
+BATCH_CHUNK_MAX      = 100_000
+BATCH_CHUNK_SECONDS  = 0.5      # parça başına hedef süre (ilerleme çubuğu akıcı kalsın)
+BATCH_CHUNK_MEM_MB   = 64       # parça başına hedef bellek (girdi DataFrame'i)
+EXCEL_MAX_ROWS       = 1_048_575  # xlsx satır sınırı (başlık hariç)
+# Skor dosyaları ve dışa aktarımlar (yükleme özeti + model sürümü ile adlandırılır; oturumlar arası ortak)
+EXPORT_DIR           = os.environ.get("AQUAML_EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "aquaml_exports")
+EXPORT_TTL_HOURS     = 24         # bu süreden eski dışa aktarım dosyaları silinir
+
+# Yerel HTTP tahmin servisi (src/service.py) — yalnız localhost'a bağlanır
+SERVICE_HOST            = "127.0.0.1"
+SERVICE_PORT            = 8765
+SERVICE_BATCH_WINDOW_MS = 3.0     # eşzamanlı tekil istekler bu pencerede tek predict'te birleşir
+SERVICE_MAX_BATCH       = 512     # bir mikro-yığındaki en fazla satır
+SERVICE_MAX_BODY_MB     = 64      # JSON istek gövdesi sınırı
+
+# İçe aktarma (import) süresi bütçesi: benchmarks/check_import_time.py bu sınırı aşan modülde hata verir
+IMPORT_BUDGET_S       = 1.75     # `import src.pipelines` (soğuk süreç, en iyi deneme) için üst sınır (sn)
+
+# Performans ölçüm paketi (benchmarks/bench_suite.py)
+BENCH_BATCH_SIZES     = (1_000, 10_000, 100_000, 1_000_000)  # batch_predict satır sayıları
+BENCH_REGRESSION_TOL  = 0.25     # taban çizgiye göre izin verilen kötüleşme oranı (0.25 = %25)
+# Fark testi (benchmarks/check_parity.py): hızlı yollar ↔ referans Pipeline tahmin toleransı
+PARITY_RTOL           = 1e-6
+PARITY_ATOL           = 1e-6
+
+# Performans izleme (src/tracing.py; uygulamada "Performans" paneli)
+TRACE_PANEL         = os.environ.get("AQUAML_TRACE", "") == "1"   # paneli herkes için aç (URL'de ?perf=1 de açar)
+TRACE_FILE          = os.environ.get("AQUAML_TRACE_FILE") or None  # verilirse her istek bir JSONL satırı olarak eklenir
+PROFILE_ONCE        = os.environ.get("AQUAML_PROFILE", "") == "1"  # tahmin yapan ilk isteğin örnekleme profili
+TRACE_DIR           = os.environ.get("AQUAML_TRACE_DIR") or os.path.join(tempfile.gettempdir(), "aquaml_traces")
+PROFILE_INTERVAL_MS = 5.0
@@ -0,0 +1,106 @@
+"""
+cv_engine.py
+------------
+
+Tek geçişli çapraz doğrulama: her fold bir kez fit edilir; aynı geçişten
+fold metrikleri, OOF tahminleri, fit/predict süreleri ve (istenirse) fold modelleri döner.
+- evaluate_and_plot: ML_Summary / BestModel_Folds bu sonuçtan üretilir
+- export_oof_with_pharma: OOF tahminleri yeniden eğitilmeden buradan alınır (cross_val_predict yok)
+- run_hpo_top2: varsayılan parametreli CV R2 karşılaştırma için buradan okunur
+- DomainFE matrisi feature_cache'ten gelir; fold'larda yalnız model adımları çalışır
+
+Kullanım:
+    res = run_cv(pipe, X_train, y_train, cv=KFold(5, shuffle=True, random_state=42))
+    res["cv_r2"], res["fold_df"], res["oof_pred"]
+
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
+from sklearn.model_selection import KFold
+
+from src.config import N_JOBS
+from src.feature_cache import precompute, without_fe, restore_fe
+
+
+def _fit_fold(body, Xt: pd.DataFrame, y: pd.Series, tr_idx: np.ndarray, va_idx: np.ndarray) -> Tuple[Any, np.ndarray, float, float]:
+    """Tek fold: klonla → fit → validasyon tahmini (süreleriyle)."""
+    est = clone(body)
+    t0 = time.perf_counter()
+    est.fit(Xt.iloc[tr_idx], y.iloc[tr_idx])
+    t1 = time.perf_counter()
+    pred = np.asarray(est.predict(Xt.iloc[va_idx]), dtype=float)
+    t2 = time.perf_counter()
+    return est, pred, t1 - t0, t2 - t1
+
+
+def run_cv(pipe,
+           X: pd.DataFrame,
+           y: pd.Series,
+           cv: int | Any = 5,
+           n_jobs: int = N_JOBS,
+           return_models: bool = False) -> Dict[str, Any]:
+    """
+    pipe için K-fold CV (her fold tek fit).
+
+    Dönüş:
+        {
+          "fold_df":  Fold, n_val, R2, RMSE, MAE, fit_time, predict_time,
+          "oof_pred": X sırasıyla OOF tahminleri (np.ndarray),
+          "cv_r2", "cv_rmse", "cv_mae": fold ortalamaları,
+          "models":   fold modelleri (ham girdi alan pipeline'lar) veya None
+        }
+    """
+    if isinstance(cv, int):
+        cv = KFold(n_splits=cv)
+    y = pd.Series(np.asarray(y), index=X.index) if not isinstance(y, pd.Series) else y
+    splits: List[Tuple[np.ndarray, np.ndarray]] = list(cv.split(X, y))
+
+    fe, (Xt,) = precompute(pipe, X)
+    with without_fe(pipe) as body:
+        outs = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_fold)(body, Xt, y, tr, va) for tr, va in splits
+        )
+    return assemble_cv(y, splits, outs, fe, return_models)
+
+
+def assemble_cv(y: pd.Series,
+                splits: List[Tuple[np.ndarray, np.ndarray]],
+                outs: List[Tuple[Any, np.ndarray, float, float]],
+                fe=None,
+                return_models: bool = False) -> Dict[str, Any]:
+    """Fold çıktılarını (model, val tahmini, fit süresi, predict süresi) run_cv sonuç sözlüğüne toplar."""
+    oof = np.full(len(y), np.nan, dtype=float)
+    rows = []
+    y_arr = np.asarray(y, dtype=float)
+    for k, ((_, va), (_, pred, t_fit, t_pred)) in enumerate(zip(splits, outs), start=1):
+        oof[va] = pred
+        rows.append({
+            "Fold": k,
+            "n_val": len(va),
+            "R2": r2_score(y_arr[va], pred),
+            "RMSE": float(np.sqrt(mean_squared_error(y_arr[va], pred))),
+            "MAE": mean_absolute_error(y_arr[va], pred),
+            "fit_time": t_fit,
+            "predict_time": t_pred,
+        })
+    fold_df = pd.DataFrame(rows)
+
+    models: Optional[List[Any]] = None
+    if return_models:
+        models = [restore_fe(est, fe) for est, *_ in outs if est is not None]
+
+    return {
+        "fold_df": fold_df,
+        "oof_pred": oof,
+        "cv_r2": float(fold_df["R2"].mean()),
+        "cv_rmse": float(fold_df["RMSE"].mean()),
+        "cv_mae": float(fold_df["MAE"].mean()),
+        "models": models,
+    }
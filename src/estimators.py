@@ -6,11 +6,50 @@ CatBoost, LightGBM ve XGBoost algoritmalarını sklearn uyumlu hale getiren
 sarmalayıcı (wrapper) sınıfları içerir. Böylece modeller, Pipeline içinde ve
 çapraz doğrulama süreçlerinde sorunsuz şekilde kullanılabilir.
 
+Erken durdurma (early_stopping_rounds verilirse): fit'e eval_set gelmezse eğitim verisinin
+validation_fraction kadarı iç doğrulama için ayrılır; en iyi iterasyon best_iteration_'a (0 tabanlı)
+yazılır ve tahminde o kullanılır. Parametreler __init__'te saklanır (clone / RandomizedSearchCV uyumlu).
+
 """
 
 from typing import Optional, Sequence
+import numpy as np
 from sklearn.base import BaseEstimator, RegressorMixin
-from src.config import have  
+from src.config import have, ES_VALID_FRACTION
+from src.thread_budget import inner_threads
+
+
+def _threads(n: Optional[int]) -> int:
+    """Parametre değeri None ise geçerli iç bütçe (fit ve predict anında ayrı ayrı çözülür)."""
+    return n if n is not None else inner_threads()
+
+
+def _take(A, idx):
+    return A.iloc[idx] if hasattr(A, "iloc") else np.asarray(A)[idx]
+
+
+def _early_stopping_split(X, y, fraction: float, random_state: int):
+    """(X_fit, y_fit, X_val, y_val); doğrulama kümesi 1 satırdan azsa None."""
+    n = len(X)
+    n_val = int(round(n * fraction))
+    if n_val < 1 or n - n_val < 2:
+        return None
+    idx = np.random.default_rng(random_state).permutation(n)
+    va, tr = idx[:n_val], idx[n_val:]
+    return _take(X, tr), _take(y, tr), _take(X, va), _take(y, va)
+
+
+def _eval_data(est, X, y, eval_set):
+    """Erken durdurma için (X_fit, y_fit, eval_set) — kapalıysa eval_set None."""
+    if not est.early_stopping_rounds:
+        return X, y, None
+    if eval_set is not None:
+        return X, y, eval_set
+    split = _early_stopping_split(X, y, est.validation_fraction, est.random_state)
+    if split is None:
+        return X, y, None
+    X_fit, y_fit, X_val, y_val = split
+    return X_fit, y_fit, (X_val, y_val)
 
 
 # ----------------------- CatBoost -----------------------
@@ -24,6 +63,9 @@ class CatBoostSk(BaseEstimator, RegressorMixin):
         verbose: bool = False,
         allow_writing_files: bool = False,
         cat_features=None, 
+        thread_count: Optional[int] = None,  # None → thread_budget'in iç bütçesi
+        early_stopping_rounds: Optional[int] = None,  # None/0 → erken durdurma yok
+        validation_fraction: float = ES_VALID_FRACTION,
     ):
         self.depth = depth
         self.learning_rate = learning_rate
@@ -32,11 +74,14 @@ class CatBoostSk(BaseEstimator, RegressorMixin):
         self.verbose = verbose
         self.allow_writing_files = allow_writing_files
         self.cat_features = cat_features
+        self.thread_count = thread_count
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
 
         # İç model oluşturmayı fit'e taşıyoruz; clone/set_params ile uyum için iyi.
         self.model_ = None
 
-    def fit(self, X, y):
+    def fit(self, X, y, eval_set=None):
         if not have.get("catboost", False):
             raise RuntimeError("CatBoost yüklü değil.")
         from catboost import CatBoostRegressor
@@ -50,6 +95,7 @@ class CatBoostSk(BaseEstimator, RegressorMixin):
             random_seed=self.random_state,         
             verbose=self.verbose,
             allow_writing_files=self.allow_writing_files,
+            thread_count=_threads(self.thread_count),
         )
         cat_feats = None
         if self.cat_features is not None:
@@ -58,14 +104,22 @@ class CatBoostSk(BaseEstimator, RegressorMixin):
                 # X bir pandas DataFrame olmalı
                 cf = [X.columns.get_loc(c) for c in cf]
             cat_feats = cf
-            
-        self.model_.fit(X, y, cat_features=cat_feats)
+
+        X_fit, y_fit, es = _eval_data(self, X, y, eval_set)
+        if es is None:
+            self.model_.fit(X_fit, y_fit, cat_features=cat_feats)
+            self.best_iteration_ = None
+        else:
+            self.model_.fit(X_fit, y_fit, cat_features=cat_feats, eval_set=es,
+                            early_stopping_rounds=self.early_stopping_rounds, use_best_model=True)
+            self.best_iteration_ = self.model_.get_best_iteration()
         return self
 
     def predict(self, X):
         if self.model_ is None:
             raise RuntimeError("Model henüz fit edilmedi veya CatBoost yüklü değil.")
-        return self.model_.predict(X)
+        # thread sayısı tahmin anında çözülür: eğitimdeki iç bütçe kaydedilen modele yapışmaz
+        return self.model_.predict(X, thread_count=_threads(self.thread_count))
 
 
 # ----------------------- LightGBM -----------------------
@@ -84,6 +138,9 @@ class LGBMSk(BaseEstimator, RegressorMixin):
         n_estimators: int = 1500,
         random_state: int = 42,
         categorical_feature: Optional[Sequence] = None,  # isim veya indeks
+        n_jobs: Optional[int] = None,                    # None → thread_budget'in iç bütçesi
+        early_stopping_rounds: Optional[int] = None,     # None/0 → erken durdurma yok (DART'ta yok sayılır)
+        validation_fraction: float = ES_VALID_FRACTION,
     ):
         # __init__ içinde paramı ASLA değiştirme!
         self.boosting_type = boosting_type
@@ -92,14 +149,17 @@ class LGBMSk(BaseEstimator, RegressorMixin):
         self.n_estimators = n_estimators
         self.random_state = random_state
         self.categorical_feature = categorical_feature
+        self.n_jobs = n_jobs
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
 
         # clone uyumu için iç modeli burada kurma
         self.model_ = None
 
-    def fit(self, X, y):
+    def fit(self, X, y, eval_set=None):
         if not have.get("lightgbm", False):
             raise RuntimeError("LightGBM yüklü değil.")
-        from lightgbm import LGBMRegressor
+        from lightgbm import LGBMRegressor, early_stopping
 
         # İç modeli her fit'te paramlarla kur
         self.model_ = LGBMRegressor(
@@ -108,18 +168,27 @@ class LGBMSk(BaseEstimator, RegressorMixin):
             learning_rate=self.learning_rate,
             n_estimators=self.n_estimators,
             random_state=self.random_state,
-            n_jobs=1,  # dış paralellik ile çakışmayı önle
+            n_jobs=_threads(self.n_jobs),  # dış paralellikle bölüşülür
         )
 
         # Param dönüşümü (listeye çevirme vb.) __init__’te değil, burada yapılır
         cat_feats = list(self.categorical_feature) if self.categorical_feature is not None else None
 
         # Not: Pipeline sonrası X OHE ile sayısal matris ise cat_feats=None ver!
-        self.model_.fit(X, y, categorical_feature=cat_feats)
+        # DART'ta LightGBM erken durdurmayı desteklemez → tam eğitim
+        X_fit, y_fit, es = _eval_data(self, X, y, eval_set) if self.boosting_type != "dart" else (X, y, None)
+        if es is None:
+            self.model_.fit(X_fit, y_fit, categorical_feature=cat_feats)
+            self.best_iteration_ = None
+        else:
+            self.model_.fit(X_fit, y_fit, categorical_feature=cat_feats, eval_set=[es],
+                            callbacks=[early_stopping(self.early_stopping_rounds, verbose=False)])
+            # LightGBM 1 tabanlı sayar → XGBoost / CatBoost gibi 0 tabanlı (ağaç sayısı = best_iteration_ + 1)
+            self.best_iteration_ = self.model_.best_iteration_ - 1
         return self
 
     def predict(self, X):
-        return self.model_.predict(X)
+        return self.model_.predict(X, num_threads=_threads(self.n_jobs))
 
 
 # ----------------------- XGBoost -----------------------
@@ -142,6 +211,9 @@ class XGBSk(BaseEstimator, RegressorMixin):
         booster: str = "gbtree",
         random_state: int = 42,
         enable_categorical: bool = True,
+        n_jobs: Optional[int] = None,  # None → thread_budget'in iç bütçesi
+        early_stopping_rounds: Optional[int] = None,  # None/0 → erken durdurma yok
+        validation_fraction: float = ES_VALID_FRACTION,
     ):
         self.n_estimators = n_estimators
         self.max_depth = max_depth
@@ -152,30 +224,43 @@ class XGBSk(BaseEstimator, RegressorMixin):
         self.booster = booster
         self.random_state = random_state
         self.enable_categorical = enable_categorical
+        self.n_jobs = n_jobs
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
+
+        # İç model fit'te kurulur: RandomizedSearchCV'nin set_params'ı ancak böyle modele yansır
+        self.model_ = None
 
+    def fit(self, X, y, eval_set=None):
         if not have.get("xgboost", False):
-            self.model_ = None
-        else:
-            from xgboost import XGBRegressor  # geç import
-            self.model_ = XGBRegressor(
-                n_estimators=self.n_estimators,
-                max_depth=self.max_depth,
-                learning_rate=self.learning_rate,
-                subsample=self.subsample,
-                colsample_bytree=self.colsample_bytree,
-                reg_lambda=self.reg_lambda,
-                booster=self.booster,
-                tree_method="hist",
-                enable_categorical=self.enable_categorical,
-                random_state=self.random_state,
-                n_jobs=1,
-            )
-
-    def fit(self, X, y):
-        if self.model_ is None:
             raise RuntimeError("XGBoost yüklü değil.")
-        self.model_.fit(X, y)
+        from xgboost import XGBRegressor  # geç import
+
+        X_fit, y_fit, es = _eval_data(self, X, y, eval_set)
+        self.model_ = XGBRegressor(
+            n_estimators=self.n_estimators,
+            max_depth=self.max_depth,
+            learning_rate=self.learning_rate,
+            subsample=self.subsample,
+            colsample_bytree=self.colsample_bytree,
+            reg_lambda=self.reg_lambda,
+            booster=self.booster,
+            tree_method="hist",
+            enable_categorical=self.enable_categorical,
+            random_state=self.random_state,
+            # thread sayısı fit anında (dış paralellik bütçesine göre) belirlenir
+            n_jobs=_threads(self.n_jobs),
+            early_stopping_rounds=self.early_stopping_rounds if es is not None else None,
+        )
+        if es is None:
+            self.model_.fit(X_fit, y_fit)
+            self.best_iteration_ = None
+        else:
+            # tahmin en iyi iterasyona kadar olan ağaçlarla yapılır (XGBoost varsayılanı)
+            self.model_.fit(X_fit, y_fit, eval_set=[es], verbose=False)
+            self.best_iteration_ = self.model_.best_iteration
         return self
 
     def predict(self, X):
+        self.model_.set_params(n_jobs=_threads(self.n_jobs))
         return self.model_.predict(X)
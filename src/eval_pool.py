@@ -0,0 +1,147 @@
+"""
+eval_pool.py
+------------
+
+Model havuzu değerlendirmesini süreç havuzunda (loky) çalıştırır.
+- Görevler: her model için (model, fold) CV fit'leri + tam train fit'i (train/test tahmini); hepsi tek havuzda
+- DomainFE matrisleri (X_train/X_test) ve y bir kez joblib ile geçici dizine yazılır; işçiler mmap_mode="r"
+  ile açar → görev başına yalnız pipeline ve fold indeksleri pickle edilir
+- CV sonuçları run_cv ile aynı sözlüğe toplanır (evaluate_and_plot → ML_Summary / BestModel_Folds değişmez)
+- Çekirdekler thread_budget ile bölünür: dış = işçi süreç sayısı, iç = booster/BLAS thread'leri
+- sum_task_s: işçilerde (düşük iç thread bütçesiyle) ölçülen fit+predict sürelerinin toplamı; seri döngünün
+  süresi değildir (gerçek seri ↔ havuz karşılaştırması: benchmarks/bench_training.py --cases eval)
+- İç bütçe yalnız eğitim kopyalarına yazılır; dönen modellere özgün thread parametreleri geri yüklenir
+
+Kullanım:
+    pool = evaluate_pool(models, X_train, y_train, X_test, cv=KFold(5, shuffle=True, random_state=42))
+    pool["cv"]["CatBoost"]["fold_df"], pool["full"]["CatBoost"], pool["timing"]["wall_s"]
+
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, parallel_backend
+from sklearn.base import clone
+
+from src.config import N_JOBS
+from src.cv_engine import assemble_cv
+from src.feature_cache import precompute, without_fe, restore_fe
+from src.thread_budget import split_budget, apply_threads, thread_params
+
+# İşçi süreç başına açılmış memmap'ler (yol → veri); loky işçileri çağrılar arasında yeniden kullanılır
+_SHARED: Dict[str, Any] = {}
+_SHARED_MAX = 8
+
+
+def _load_shared(path: str) -> Any:
+    data = _SHARED.get(path)
+    if data is None:
+        if len(_SHARED) >= _SHARED_MAX:
+            _SHARED.clear()
+        data = _SHARED[path] = joblib.load(path, mmap_mode="r")
+    return data
+
+
+def _fold_task(body, train_path: str, tr_idx: np.ndarray, va_idx: np.ndarray) -> Tuple[None, np.ndarray, float, float]:
+    """CV fold'u: fit → validasyon tahmini (fold modeli geri gönderilmez)."""
+    Xt, y = _load_shared(train_path)
+    est = clone(body)
+    t0 = time.perf_counter()
+    est.fit(Xt.iloc[tr_idx], y.iloc[tr_idx])
+    t1 = time.perf_counter()
+    pred = np.asarray(est.predict(Xt.iloc[va_idx]), dtype=float)
+    return None, pred, t1 - t0, time.perf_counter() - t1
+
+
+def _full_task(body, train_path: str, test_path: str) -> Tuple[Any, np.ndarray, np.ndarray, float]:
+    """Tam train fit'i → (model, train tahmini, test tahmini, süre)."""
+    Xt, y = _load_shared(train_path)
+    Xt_te = _load_shared(test_path)
+    est = clone(body)
+    t0 = time.perf_counter()
+    est.fit(Xt, y)
+    yhat_tr = np.asarray(est.predict(Xt), dtype=float)
+    yhat_te = np.asarray(est.predict(Xt_te), dtype=float)
+    return est, yhat_tr, yhat_te, time.perf_counter() - t0
+
+
+def evaluate_pool(models: List[Tuple[str, Optional[Any]]],
+                  X_train: pd.DataFrame,
+                  y_train: pd.Series,
+                  X_test: pd.DataFrame,
+                  cv: Any,
+                  n_jobs: int = N_JOBS,
+                  tmp_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    (ad, pipeline) listesi için CV + tam fit görevlerini süreç havuzunda çalıştırır (None modeller atlanır).
+
+    Dönüş:
+        {
+          "cv":     {ad: run_cv sonucu},
+          "full":   {ad: (fit edilmiş pipeline — ham girdi alır, yhat_train, yhat_test)},
+          "timing": {"wall_s", "sum_task_s", "n_tasks", "threads": (dış, iç)}
+        }
+    """
+    active = [(name, pipe) for name, pipe in models if pipe is not None]
+    if not isinstance(y_train, pd.Series):
+        y_train = pd.Series(np.asarray(y_train), index=X_train.index)
+    splits = list(cv.split(X_train, y_train))
+
+    work = tempfile.mkdtemp(prefix="aquaml_eval_", dir=tmp_dir)
+    try:
+        # Özellik matrisleri: aynı DomainFE çıktısı (önbellekte aynı nesne) bir kez diske yazılır
+        dumped: Dict[int, Tuple[str, str]] = {}
+        plan = []
+        for name, pipe in active:
+            fe, (Xt_tr, Xt_te) = precompute(pipe, X_train, X_test)
+            paths = dumped.get(id(Xt_tr))
+            if paths is None:
+                k = len(dumped)
+                paths = (os.path.join(work, f"train_{k}.joblib"), os.path.join(work, f"test_{k}.joblib"))
+                joblib.dump((Xt_tr, y_train), paths[0])
+                joblib.dump(Xt_te, paths[1])
+                dumped[id(Xt_tr)] = paths
+            with without_fe(pipe) as body:
+                body = clone(body)
+            plan.append((name, fe, body, paths, thread_params(body)))
+
+        # Dış: işçi süreçleri (görev sayısını aşmaz); iç: her işçide booster + BLAS/OpenMP thread'leri
+        outer, inner = split_budget(n_tasks=len(plan) * (len(splits) + 1), total=n_jobs)
+        tasks = []
+        for _, _, body, (p_tr, p_te), _ in plan:
+            apply_threads(body, inner)   # body zaten kopya; çağıranın pipeline'ı değişmez
+            tasks.extend(delayed(_fold_task)(body, p_tr, tr, va) for tr, va in splits)
+            tasks.append(delayed(_full_task)(body, p_tr, p_te))
+
+        t0 = time.perf_counter()
+        with parallel_backend("loky", inner_max_num_threads=inner):
+            outs = Parallel(n_jobs=outer)(tasks)
+        wall = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    cv_res: Dict[str, Dict[str, Any]] = {}
+    full: Dict[str, Tuple[Any, np.ndarray, np.ndarray]] = {}
+    task_s = 0.0
+    step = len(splits) + 1
+    for i, (name, fe, _, _, threads) in enumerate(plan):
+        chunk = outs[i * step:(i + 1) * step]
+        fold_outs, (est, yhat_tr, yhat_te, t_full) = chunk[:-1], chunk[-1]
+        cv_res[name] = assemble_cv(y_train, splits, fold_outs, fe)
+        if threads:
+            est.set_params(**threads)   # kaydedilen model tahminde özgün thread ayarını kullanır
+        full[name] = (restore_fe(est, fe), yhat_tr, yhat_te)
+        task_s += sum(t_fit + t_pred for _, _, t_fit, t_pred in fold_outs) + t_full
+
+    return {
+        "cv": cv_res,
+        "full": full,
+        "timing": {"wall_s": wall, "sum_task_s": task_s, "n_tasks": len(tasks), "threads": (outer, inner)},
+    }
@@ -7,7 +7,7 @@ Model havuzu için 5-fold CV, train/test metrikleri ve tahmin vs. gerçek saçı
 - Konsola özet metrikler (CV ortalama, Train/Test R2–RMSE–MAE)
 - Kaydedilen çoklu saçılım grafiği (ml_results.png)
 - Excel'e iki sayfa: ML_Summary, BestModel_Folds
-- OOF_Detailed ve OOF_ByDrug sayfaları (en iyi model için)
+- OOF_Detailed ve OOF_ByDrug sayfaları (en iyi model için; OOF tahminleri CV geçişinden, yeniden eğitim yok)
 - Fonksiyon dönüşü: sonuç DataFrame'leri ve en iyi pipeline
 """
 
@@ -17,11 +17,15 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from typing import Dict, List, Tuple, Optional, Any
 
-from sklearn.model_selection import KFold, cross_validate, cross_val_predict
+from sklearn.model_selection import KFold
 from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
 from joblib import parallel_backend
 
-from src.config import RANDOM_STATE, N_JOBS, OUT_DIR, OUT_DATA
+from src.config import RANDOM_STATE, N_JOBS, OUT_DIR, OUT_DATA, EVAL_SCHEDULER
+from src.feature_cache import precompute, without_fe
+from src.cv_engine import run_cv
+from src.eval_pool import evaluate_pool
+from src.thread_budget import thread_budget, threads_applied
 from pathlib import Path
 
 def _unique_path(p: Path) -> Path:
@@ -45,7 +49,8 @@ def export_oof_with_pharma(best_pipe,
                            df_meta: Optional[pd.DataFrame] = None,
                            *,
                            phase: str = "pre",      # "pre" | "post"
-                           tag: str = "qe"          # model etiketi (örn. en iyi model adı)
+                           tag: str = "qe",         # model etiketi (örn. en iyi model adı)
+                           oof_pred: Optional[np.ndarray] = None  # run_cv'den hazır OOF (verilirse CV yapılmaz)
                            ) -> None:
     """
     OOF tahminleri → Excel (iki sheet) + PNG (timestamp YOK).
@@ -61,9 +66,9 @@ def export_oof_with_pharma(best_pipe,
         phase = "pre"
     sheet_prefix = f"{phase.upper()}_{tag}"
 
-    # 1) OOF tahminleri
-    oof_pred = cross_val_predict(best_pipe, X_train, y_train,
-                                 cv=cv, n_jobs=n_jobs, method="predict")
+    # 1) OOF tahminleri (evaluate_and_plot'un CV geçişinden; yoksa tek geçişli CV)
+    if oof_pred is None:
+        oof_pred = run_cv(best_pipe, X_train, y_train, cv=cv, n_jobs=n_jobs)["oof_pred"]
 
     # 2) Satır bazlı metrikler
     oof = pd.DataFrame({"y_true": y_train.values,
@@ -144,10 +149,12 @@ def evaluate_and_plot(
     out_data_path: str = OUT_DATA,
     df_meta: Optional[pd.DataFrame] = None,
     hp_results: Optional[List[Dict[str, Any]]] = None, 
+    scheduler: str = EVAL_SCHEDULER,   # "serial": model model (varsayılan) | "process": (model, fold) görevleri süreç havuzunda
 ) -> Dict[str, Any]:
     """
     Verilen (ad, pipeline) model listesi için CV + train/test değerlendirme ve görselleştirme yapar.
     None olan modeller "skipped" olarak geçilir.
+    scheduler="process" ise tüm fit'ler src/eval_pool.py ile önceden (paralel) yapılır; çıktılar aynıdır.
 
     Dönüş:
         {
@@ -155,17 +162,14 @@ def evaluate_and_plot(
           "results_sorted": <test R2'ye göre sıralı>,
           "best_name": <en iyi model adı>,
           "best_pipe": <en iyi pipeline>,
-          "best_fold_df": <en iyi modelin fold metrikleri>,
+          "best_fold_df": <en iyi modelin fold metrikleri (+ fit/predict süreleri)>,
+          "cv_results": <model adı → run_cv sonucu (fold_df, oof_pred, cv_* ortalamaları)>,
+          "timing": <süreç havuzu süreleri (wall_s, sum_task_s, n_tasks, threads) veya None>,
           "out_fig": <kayıtlı figür yolu>
         }
     """
     # --- CV & scoring tanımı ---
     cv = KFold(n_splits=cv_splits, shuffle=True, random_state=random_state)
-    scoring = {
-        "r2": "r2",
-        "rmse": "neg_mean_squared_error",
-        "mae": "neg_mean_absolute_error",
-    }
 
     # --- Grafik aralığı (tüm veri) ---
     y_all = pd.concat([y_train, y_test]).values
@@ -180,7 +184,15 @@ def evaluate_and_plot(
     axes = axes.ravel()
 
     results: List[Dict[str, float]] = []
-    fold_store: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, Any]] = {}
+    cv_store: Dict[str, Dict[str, Any]] = {}   # model adı → run_cv sonucu (fold metrikleri + OOF)
+    fitted_store: Dict[str, Any] = {}          # model adı → tüm train'de fit edilmiş pipeline
+
+    pool = None
+    if scheduler == "process":
+        pool = evaluate_pool(models, X_train, y_train, X_test, cv=cv, n_jobs=n_jobs)
+        t = pool["timing"]
+        print(f"[EVAL] Süreç havuzu: {t['n_tasks']} görev | duvar={t['wall_s']:.1f}s | "
+              f"görev süreleri toplamı={t['sum_task_s']:.1f}s | thread dış×iç={t['threads'][0]}x{t['threads'][1]}")
 
     with parallel_backend("threading", n_jobs=n_jobs):
         for ax, (name, pipe) in zip(axes, models):
@@ -189,23 +201,31 @@ def evaluate_and_plot(
                 ax.set_title(name)
                 continue
 
-            # --- 5-fold CV ---
-            cvres = cross_validate(
-                pipe, X_train, y_train,
-                cv=cv, scoring=scoring,
-                n_jobs=n_jobs, return_train_score=False
-            )
-            fold_r2 = cvres["test_r2"]
-            fold_rmse = np.sqrt(-cvres["test_rmse"])
-            fold_mae = -cvres["test_mae"]
-
-            cv_r2, cv_rmse, cv_mae = fold_r2.mean(), fold_rmse.mean(), fold_mae.mean()
+            # --- 5-fold CV (tek geçiş: fold metrikleri + OOF tahminleri birlikte) ---
+            if pool is not None:
+                cvres = pool["cv"][name]
+            else:
+                # fold'lar (dış) × booster thread'leri (iç) çekirdek bütçesini aşmaz
+                with thread_budget(n_tasks=cv.get_n_splits(), total=n_jobs) as (outer, inner), \
+                        threads_applied(pipe, inner):
+                    cvres = run_cv(pipe, X_train, y_train, cv=cv, n_jobs=outer)
+            cv_r2, cv_rmse, cv_mae = cvres["cv_r2"], cvres["cv_rmse"], cvres["cv_mae"]
             print(f"[CV] {name:14s} | R2={cv_r2:.3f} | RMSE={cv_rmse:.3f} | MAE={cv_mae:.3f}")
 
             # --- Train/Test fit & pred ---
-            pipe.fit(X_train, y_train)
-            yhat_tr = pipe.predict(X_train)
-            yhat_te = pipe.predict(X_test)
+            if pool is not None:
+                fitted, yhat_tr, yhat_te = pool["full"][name]
+            else:
+                # DomainFE durumsuz: train/test özellik matrisleri veri seti başına bir kez hesaplanır
+                # (tüm modeller paylaşır); fit'te yalnız model adımları çalışır
+                _, (Xt_train, Xt_test) = precompute(pipe, X_train, X_test)
+                # iç bütçe yalnız blok boyunca; çağıranın pipeline'ına özgün thread ayarı geri yazılır
+                with without_fe(pipe) as body, thread_budget(outer=1, total=n_jobs) as (_, inner), \
+                        threads_applied(body, inner):
+                    body.fit(Xt_train, y_train)
+                    yhat_tr = body.predict(Xt_train)
+                    yhat_te = body.predict(Xt_test)
+                fitted = pipe
 
             tr_r2, te_r2 = r2_score(y_train, yhat_tr), r2_score(y_test, yhat_te)
             tr_rmse, te_rmse = _rmse(y_train, yhat_tr), _rmse(y_test, yhat_te)
@@ -217,7 +237,8 @@ def evaluate_and_plot(
                 "train_r2": tr_r2, "train_rmse": tr_rmse, "train_mae": tr_mae,
                 "test_r2": te_r2, "test_rmse": te_rmse, "test_mae": te_mae,
             })
-            fold_store[name] = (fold_r2, fold_rmse, fold_mae, pipe)
+            cv_store[name] = cvres
+            fitted_store[name] = fitted
 
             # --- Saçılım grafikleri ---
             ax.scatter(
@@ -266,20 +287,10 @@ def evaluate_and_plot(
 
         # En iyi modelin fold detayları
         best_name = res_df_sorted.iloc[0]["model"]
-        fold_r2, fold_rmse, fold_mae, best_pipe = fold_store[best_name]
-
-        # Fold validasyon örnek sayıları
-        fold_sizes = [len(val_idx) for _, val_idx in KFold(
-            n_splits=cv_splits, shuffle=True, random_state=random_state
-        ).split(X_train, y_train)]
-
-        best_fold_df = pd.DataFrame({
-            "Fold": np.arange(1, len(fold_r2) + 1),
-            "n_val": fold_sizes,
-            "R2": fold_r2,
-            "RMSE": fold_rmse,
-            "MAE": fold_mae
-        })
+        best_pipe = fitted_store[best_name]
+        best_cv = cv_store[best_name]
+        best_fold_df = best_cv["fold_df"]
+        fold_r2, fold_rmse, fold_mae = (best_fold_df[c].to_numpy() for c in ("R2", "RMSE", "MAE"))
 
         print(f"\n===== En iyi model: {best_name} — {cv_splits}-Fold Detay =====")
         print(best_fold_df.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
@@ -295,18 +306,17 @@ def evaluate_and_plot(
         if df_meta is not None and "Target_Phar" in df_meta.columns:
             df_meta_local = df_meta.loc[X_train.index, ["Target_Phar"]]
 
-        cv_obj = KFold(n_splits=cv_splits, shuffle=True, random_state=random_state)
-
         export_oof_with_pharma(
             best_pipe=best_pipe,
             X_train=X_train,
             y_train=y_train,
             out_data_path=out_data_path,
-            cv=cv_obj,           
+            cv=cv,
             n_jobs=n_jobs,
             df_meta=df_meta_local,
-            phase="pre",                 
-            tag=str(best_name)   
+            phase="pre",
+            tag=str(best_name),
+            oof_pred=best_cv["oof_pred"],   # CV geçişinden; fold'lar yeniden eğitilmez
 )
         # --------------------------------------------------------
 
@@ -328,6 +338,8 @@ def evaluate_and_plot(
             "best_name": best_name,
             "best_pipe": best_pipe,
             "best_fold_df": best_fold_df,
+            "cv_results": cv_store,
+            "timing": pool["timing"] if pool is not None else None,
             "out_fig": out_fig,
         }
 
@@ -338,5 +350,7 @@ def evaluate_and_plot(
         "best_name": None,
         "best_pipe": None,
         "best_fold_df": None,
+        "cv_results": {},
+        "timing": pool["timing"] if pool is not None else None,
         "out_fig": out_fig,
     }
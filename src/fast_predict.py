@@ -0,0 +1,175 @@
+"""
+fast_predict.py
+---------------
+
+Tek satırlık etkileşimli tahmin için pandas'sız hızlı yol (dict → özellik vektörü → yerel model).
+- E, S, A, B, V: LSER tablosundan doğrudan sözlük araması (girdideki değer öncelikli)
+- C_molar, H/C, O/C, N/C, S/C: add_elemental_ratios ile aynı kurallar, skaler aritmetik
+- Vektör best_model.meta.json 'features' sırasıyla kurulur; CatBoost / LightGBM modeli doğrudan çağrılır
+- Şema uymazsa (ör. XGBoost, farklı kolon sırası, eksik girdi, kategorik NaN) tam Pipeline'a düşülür
+
+Kullanım:
+    fast = FastPredictor(pipe, features)
+    qe = fast.predict_one(row)          # row: {kolon: değer}
+    fast.enabled, fast.reason           # hızlı yol açık mı, değilse neden
+
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.features import pharm_table
+
+_PHARM_COLS = ["E", "S", "A", "B", "V"]
+_PHARM = {code.strip().upper(): vals for code, vals in pharm_table().items()}
+_C_WEIGHT = 12.011
+# Oran kolonu → (element yüzdesi kolonu, atom ağırlığı)
+_RATIOS = {
+    "H_C_molar": ("H_percent", 1.008),
+    "O_C_molar": ("O_percent", 15.999),
+    "N_C_molar": ("N_percent", 14.007),
+    "S_C_molar": ("S_percent", 32.06),
+}
+
+
+class _Fallback(Exception):
+    """Satır hızlı yolda hesaplanamıyor → Pipeline kullanılır."""
+
+
+def _num(v) -> float:
+    """Skaler pd.to_numeric(errors='coerce') karşılığı (None / sayı olmayan → NaN)."""
+    if v is None or isinstance(v, bool):
+        return np.nan if v is None else float(v)
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _feature_value(row: Mapping[str, Any], col: str) -> float:
+    """DomainFE çıktısındaki tek bir sayısal kolonun değeri (kolon DomainFE'de oluşmuyorsa _Fallback)."""
+    if col in _PHARM_COLS:
+        if "Target_Phar" not in row:
+            raise _Fallback("Target_Phar yok")
+        given = _num(row[col]) if col in row else np.nan
+        if given == given:
+            return given
+        ref = _PHARM.get(str(row["Target_Phar"]).strip().upper())
+        return ref[col] if ref is not None else np.nan
+
+    if col == "C_molar" or col in _RATIOS:
+        if "C_percent" not in row:
+            if col not in row:
+                raise _Fallback(f"{col} hesaplanamıyor")
+            return _num(row[col])
+        c = _num(row["C_percent"])
+        denom = c / _C_WEIGHT
+        if col == "C_molar":
+            val = denom if c > 0 else (_num(row[col]) if col in row else np.nan)
+        else:
+            el, w = _RATIOS[col]
+            if el not in row and col not in row:
+                raise _Fallback(f"{col} hesaplanamıyor")
+            existing = _num(row[col]) if col in row else np.nan
+            val = (_num(row[el]) / w) / denom if (c > 0 and el in row) else existing
+        return 0.0 if val < 0 else val
+
+    if col not in row:
+        raise _Fallback(f"{col} yok")
+    return _num(row[col])
+
+
+class FastPredictor:
+    """
+    sklearn Pipeline (DomainFE → CatBoostSk / LGBMSk) için tek satır hızlı yol.
+    Pipeline ile aynı sonucu hedefler (doğrulama: `python -m benchmarks.check_parity --paths fast_predict`);
+    desteklenmeyen şema / satırda pipe.predict kullanılır.
+    """
+
+    def __init__(self, pipe, features: Sequence[str]):
+        self.pipe = pipe
+        self.features: List[str] = list(features)
+        self.reason: Optional[str] = None
+        self.fast_calls = 0
+        self.fallback_calls = 0
+        self._lock = threading.Lock()
+        self._num_feats: List[str] = []
+        self._cat_feats: List[str] = []
+        self._predict_vec: Optional[Callable[[list], float]] = None
+        try:
+            self._setup()
+        except Exception as e:  # hızlı yol kurulamazsa Pipeline yeterli
+            self.reason = f"{type(e).__name__}: {e}"
+            self._predict_vec = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._predict_vec is not None
+
+    def _setup(self) -> None:
+        steps = getattr(self.pipe, "steps", None)
+        if not steps or len(steps) != 2:
+            raise ValueError("Pipeline DomainFE → model biçiminde değil")
+        fe, reg = steps[0][1], steps[1][1]
+        if type(fe).__name__ != "DomainFE":
+            raise ValueError(f"ilk adım DomainFE değil: {type(fe).__name__}")
+        num_feats, cat_feats = list(fe.num_feats), list(fe.cat_feats)
+        if num_feats + cat_feats != self.features:
+            raise ValueError("meta 'features' sırası DomainFE çıktısıyla uyuşmuyor")
+        self._num_feats, self._cat_feats = num_feats, cat_feats
+        cat_idx = list(range(len(num_feats), len(self.features)))
+
+        kind = type(reg).__name__
+        model = getattr(reg, "model_", None)
+        if model is None:
+            raise ValueError("model fit edilmemiş")
+        if kind == "CatBoostSk":
+            names = list(getattr(model, "feature_names_", None) or [])
+            if names != self.features or sorted(model.get_cat_feature_indices()) != cat_idx:
+                raise ValueError("CatBoost feature şeması meta ile uyuşmuyor")
+            self._predict_vec = lambda vec: model.predict(vec, thread_count=1)
+        elif kind == "LGBMSk":
+            booster = model.booster_
+            cats = booster.pandas_categorical or []
+            if booster.num_feature() != len(self.features) or len(cats) != len(cat_feats):
+                raise ValueError("LightGBM feature şeması meta ile uyuşmuyor")
+            codes = [{v: float(i) for i, v in enumerate(c)} for c in cats]
+
+            def predict_lgbm(vec):
+                x = vec[:len(num_feats)] + [codes[i].get(v, np.nan) for i, v in enumerate(vec[len(num_feats):])]
+                return booster.predict(np.array([x], dtype=float), num_threads=1)[0]
+
+            self._predict_vec = predict_lgbm
+        else:
+            raise ValueError(f"hızlı yol desteklenmiyor: {kind}")
+
+    def vector(self, row: Mapping[str, Any]) -> list:
+        """meta 'features' sırasında ham özellik vektörü (kategorikler str); hesaplanamazsa _Fallback."""
+        vec: list = [_feature_value(row, c) for c in self._num_feats]
+        for c in self._cat_feats:
+            v = row.get(c)
+            if not isinstance(v, str):
+                raise _Fallback(f"{c} kategorik değeri str değil")
+            vec.append(v)
+        return vec
+
+    def predict_one(self, row: Mapping[str, Any]) -> float:
+        """Tek satır tahmini (float). Hızlı yol olmazsa pipe.predict(DataFrame([row]))."""
+        if self._predict_vec is not None:
+            try:
+                y = float(self._predict_vec(self.vector(row)))
+                with self._lock:
+                    self.fast_calls += 1
+                return y
+            except Exception:
+                pass
+        with self._lock:
+            self.fallback_calls += 1
+        return float(np.asarray(self.pipe.predict(pd.DataFrame([dict(row)])), dtype=float).ravel()[0])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "reason": self.reason,
+                "fast_calls": self.fast_calls, "fallback_calls": self.fallback_calls}
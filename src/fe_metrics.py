@@ -0,0 +1,71 @@
+"""
+fe_metrics.py
+-------------
+
+Özellik mühendisliği (FE) katmanı için süreç içi ölçüm yüzeyi (stdout'a yazmaz).
+- Aşama zamanlayıcıları: pharm_merge, pharm_cleanup, ratios, coerce (çağrı sayısı, toplam/en uzun süre)
+- Veri kalitesi sayaçları: C_percent eksik / ≤0 satırlar, bilinmeyen Target_Phar kodları,
+  eksik element kolonları
+- Ayrıntılar `logging` ile DEBUG seviyesinde yazılır ("src.features" logger'ı); varsayılan
+  ayarlarda hiçbir şey basılmaz
+
+Kullanım:
+    from src.fe_metrics import FE_METRICS
+    FE_METRICS.snapshot()   # {"stages": {...}, "counters": {...}}
+    FE_METRICS.reset()
+
+    logging.getLogger("src.features").setLevel(logging.DEBUG)   # satır bazlı notları görmek için
+
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+
+class FEMetrics:
+    """Thread-safe aşama zamanlayıcıları + sayaçlar."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, list] = {}   # ad → [çağrı, toplam_s, en_uzun_s]
+        self._counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            s = self._stages.setdefault(name, [0, 0.0, 0.0])
+            s[0] += 1
+            s[1] += seconds
+            s[2] = max(s[2], seconds)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        if n:
+            with self._lock:
+                self._counters[name] = self._counters.get(name, 0) + int(n)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                k: {"calls": c, "total_ms": round(t * 1000, 3), "mean_ms": round(t * 1000 / c, 4) if c else 0.0,
+                    "max_ms": round(m * 1000, 3)}
+                for k, (c, t, m) in self._stages.items()
+            }
+            return {"stages": stages, "counters": dict(self._counters)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+
+# Süreç genelinde tek örnek (features.py / preprocessing.py yazar; uygulama ve servis okur)
+FE_METRICS = FEMetrics()
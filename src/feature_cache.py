@@ -0,0 +1,125 @@
+"""
+feature_cache.py
+----------------
+
+Model seçimi / CV / HPO sırasında DomainFE çıktısının veri seti başına bir kez hesaplanması.
+- DomainFE durumsuzdur (fit bir şey öğrenmez): aynı satırlar her model × fold × HPO denemesi için
+  aynı özellik matrisini üretir; yalnız tahminci (reg, OHE) adımlarının tekrar etmesi gerekir
+- FeatureMatrixCache: içerik özeti (satır hash'leri + kolon adları + dtype'lar) ve (num_feats, cat_feats)
+  anahtarlı küçük LRU; aynı içerikli farklı DataFrame nesneleri de aynı girdiyi paylaşır
+- without_fe(pipe): 'fe' adımını geçici olarak 'passthrough' yapar (önceden hesaplanmış matrisle fit/CV);
+  çıkışta özgün DomainFE geri konur → dönen pipeline yine ham girdi alır ve kaydedilebilir
+- restore_fe: klonlanmış tahmincilere (ör. RandomizedSearchCV.best_estimator_) DomainFE'yi geri takar
+
+Kullanım:
+    fe, (Xt_train, Xt_test) = precompute(pipe, X_train, X_test)
+    with without_fe(pipe) as body:
+        cross_validate(body, Xt_train, y_train, cv=cv)
+        body.fit(Xt_train, y_train)
+    pipe.predict(X_test)      # DomainFE yeniden yerinde
+
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import FEATURE_CACHE_SIZE
+
+
+def frame_digest(X: pd.DataFrame) -> str:
+    """DataFrame içeriğinin özeti: satır hash'leri (index dahil) + kolon adları + dtype'lar."""
+    h = hashlib.sha1()
+    h.update(repr([(str(c), str(t)) for c, t in X.dtypes.items()]).encode())
+    h.update(np.ascontiguousarray(pd.util.hash_pandas_object(X, index=True).to_numpy()).tobytes())
+    return h.hexdigest()
+
+
+def _domain_fe(pipe) -> Optional[Tuple[str, Any]]:
+    """Pipeline'ın ilk adımı DomainFE ise (ad, adım); değilse None."""
+    steps = getattr(pipe, "steps", None)
+    if not steps:
+        return None
+    name, step = steps[0]
+    return (name, step) if type(step).__name__ == "DomainFE" else None
+
+
+class FeatureMatrixCache:
+    """Thread-safe, içerik anahtarlı DomainFE çıktı önbelleği (dönen DataFrame'ler paylaşılır; değiştirilmemeli)."""
+
+    def __init__(self, maxsize: int = FEATURE_CACHE_SIZE):
+        self.maxsize = int(maxsize)
+        self._data: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def transform(self, fe, X: pd.DataFrame) -> pd.DataFrame:
+        key = (frame_digest(X), tuple(fe.num_feats), tuple(fe.cat_feats))
+        with self._lock:
+            Xt = self._data.get(key)
+            if Xt is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return Xt
+            self.misses += 1
+        Xt = fe.transform(X)
+        with self._lock:
+            self._data[key] = Xt
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return Xt
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+# Süreç genelinde tek örnek (evaluation.py / tunning.py)
+FEATURE_CACHE = FeatureMatrixCache()
+
+
+def precompute(pipe, *Xs: pd.DataFrame, cache: Optional[FeatureMatrixCache] = None) -> Tuple[Any, List[pd.DataFrame]]:
+    """
+    pipe'ın DomainFE adımıyla her X'in özellik matrisi (önbellekten).
+    Pipeline DomainFE ile başlamıyorsa (None, X'ler aynen) döner.
+    """
+    found = _domain_fe(pipe)
+    if found is None:
+        return None, list(Xs)
+    cache = cache if cache is not None else FEATURE_CACHE
+    fe = found[1]
+    return fe, [cache.transform(fe, X) for X in Xs]
+
+
+@contextmanager
+def without_fe(pipe) -> Iterator[Any]:
+    """Blok içinde DomainFE adımı 'passthrough'; çıkışta (hata olsa da) özgün adım geri konur."""
+    found = _domain_fe(pipe)
+    if found is None:
+        yield pipe
+        return
+    name, fe = found
+    pipe.set_params(**{name: "passthrough"})
+    try:
+        yield pipe
+    finally:
+        pipe.set_params(**{name: fe})
+
+
+def restore_fe(pipe, fe) -> Any:
+    """without_fe içinde klonlanmış pipeline'ın 'passthrough' ilk adımına DomainFE'yi geri takar."""
+    steps = getattr(pipe, "steps", None)
+    if fe is not None and steps and steps[0][1] == "passthrough":
+        pipe.set_params(**{steps[0][0]: fe})
+    return pipe
@@ -6,12 +6,24 @@ features.py
 - Farmasötik (E, S, A, B, V) özelliklerini ekler
 - Merge sonrası geçici kolonları temizler
 - Element yüzdelerinden C_molar ve H/C, O/C, N/C, S/C molar oranlarını hesaplar
+- domain_features: aynı zincirin vektörel, ara kopyasız tek geçişi (DomainFE / InferenceBundle)
+- pharm_codes / pharm_table: LSER tablosuna diğer modüller için okuma erişimi
+- Aşama süreleri ve veri kalitesi sayaçları: src/fe_metrics.FE_METRICS (çıktı basılmaz, logging DEBUG)
 
 """
 
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
 import pandas as pd
 import numpy as np
 
+from src.fe_metrics import FE_METRICS
+
+# Veri kalitesi notları stdout yerine logging'e (DEBUG) gider; sayaçlar FE_METRICS'te tutulur
+logger = logging.getLogger(__name__)
+
 # --- 1) Referans farmasötik özellikler tablosu (E, S, A, B, V) ---
 # Not: Bu tablo sabit olduğundan, fonksiyon dışında tek sefer tanımlanır.
 # Veriler UFZ LSER-Database'den alınmıştır.
@@ -53,22 +65,24 @@ def add_pharm_features(df: pd.DataFrame) -> pd.DataFrame:
     - Referans tablo (_pharm_df) ile 'pharm_code_norm' üzerinden left-merge yap
     - Çakışmayı önlemek için map kolon adlarını geçici '__map_*' ile taşı
     """
-    df = df.copy()
     if "Target_Phar" not in df.columns:
         raise KeyError("Target_Phar kolonu bulunamadı.")
+    with FE_METRICS.stage("pharm_merge"):
+        df = df.copy()
 
-    # İlaç kodunu normalize et → eşleşme hatalarını önler
-    df["pharm_code_norm"] = df["Target_Phar"].astype(str).str.strip().str.upper()
+        # İlaç kodunu normalize et → eşleşme hatalarını önler
+        df["pharm_code_norm"] = df["Target_Phar"].astype(str).str.strip().str.upper()
 
-    map_cols = ["E", "S", "A", "B", "V"]
-    tmp_map = {c: f"__map_{c}" for c in map_cols}
+        map_cols = ["E", "S", "A", "B", "V"]
+        tmp_map = {c: f"__map_{c}" for c in map_cols}
 
-    # Sadece gerekli kolonları seç, geçici isimlerle hazırla
-    pharm_merge = _pharm_df[["pharm_code_norm"] + map_cols].rename(columns=tmp_map)
+        # Sadece gerekli kolonları seç, geçici isimlerle hazırla
+        pharm_merge = _pharm_df[["pharm_code_norm"] + map_cols].rename(columns=tmp_map)
 
-    # Left-merge: df'yi koru, eşleşenlere özellikleri ekle
-    df = df.merge(pharm_merge, on="pharm_code_norm", how="left")
+        # Left-merge: df'yi koru, eşleşenlere özellikleri ekle
+        df = df.merge(pharm_merge, on="pharm_code_norm", how="left")
 
+    _note_unknown_pharm(int(df["__map_E"].isna().sum()))
     return df
 
 
@@ -77,6 +91,7 @@ def clean_pharm_features(df: pd.DataFrame, map_cols=["E","S","A","B","V"]) -> pd
     add_pharm_features sonrası oluşan geçici '__map_*' kolonlarını
     asıl kolonlara taşır; 'pharm_code_norm' ve '__map_*' kolonlarını temizler.
     """
+    t0 = time.perf_counter()
     df = df.copy()
 
     for c in map_cols:
@@ -104,6 +119,7 @@ def clean_pharm_features(df: pd.DataFrame, map_cols=["E","S","A","B","V"]) -> pd
         if c in df.columns:
             df[c] = pd.to_numeric(df[c], errors="coerce")
 
+    FE_METRICS.add_time("pharm_cleanup", time.perf_counter() - t0)
     return df
 
 
@@ -116,6 +132,7 @@ def add_elemental_ratios(df: pd.DataFrame) -> pd.DataFrame:
     - C_percent <= 0 veya NaN ise ilgili satır için oranlar hesaplanmaz (NaN kalır).
     - Negatif değerler güvenlik için 0'a kırpılır.
     """
+    t0 = time.perf_counter()
     df = df.copy()
 
     # Girdi kolon adları ve atomik ağırlıklar (g/mol)
@@ -127,14 +144,12 @@ def add_elemental_ratios(df: pd.DataFrame) -> pd.DataFrame:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce")
         else:
-            print(f"[Uyarı] {col} kolonu bulunamadı; ilgili molar oranlar NaN kalabilir.")
+            _note_missing_column(col)
 
     if C in df.columns:
         # Hesaplama sadece C > 0 olan satırlarda yapılır
         maskC = df[C].notna() & (df[C] > 0)
-        badC = (~maskC).sum()
-        if badC:
-            print(f"[Not] {badC} satırda {C} yok veya ≤0; H/C, O/C, N/C, S/C hesaplanmadı (NaN).")
+        _note_bad_carbon(int(df[C].isna().sum()), int((df[C] <= 0).sum()))
 
         # Karbon yüzdesinden mol sayısı hesapla (C_molar); diğer oranlar bunun üzerinden normalize edilir
         denom = df.loc[maskC, C] / aw["C"]
@@ -155,4 +170,163 @@ def add_elemental_ratios(df: pd.DataFrame) -> pd.DataFrame:
                 df[r] = pd.to_numeric(df[r], errors="coerce")
                 df.loc[df[r] < 0, r] = 0
 
+    FE_METRICS.add_time("ratios", time.perf_counter() - t0)
     return df
+
+
+# --- Veri kalitesi notları (sayaç + DEBUG log; stdout'a yazılmaz) ---
+def _note_missing_column(col: str) -> None:
+    FE_METRICS.incr(f"missing_column:{col}")
+    logger.debug("%s kolonu bulunamadı; ilgili molar oranlar NaN kalabilir.", col)
+
+
+def _note_bad_carbon(n_missing: int, n_nonpositive: int) -> None:
+    FE_METRICS.incr("c_percent_missing", n_missing)
+    FE_METRICS.incr("c_percent_nonpositive", n_nonpositive)
+    if n_missing + n_nonpositive:
+        logger.debug("%d satırda C_percent yok veya ≤0; H/C, O/C, N/C, S/C hesaplanmadı (NaN).",
+                     n_missing + n_nonpositive)
+
+
+def _note_unknown_pharm(n: int) -> None:
+    if n:
+        FE_METRICS.incr("unknown_target_phar", n)
+        logger.debug("%d satırda Target_Phar LSER tablosunda yok; E, S, A, B, V girdiden ya da NaN.", n)
+
+
+# --- 4) Vektörel tek geçiş: DomainFE.transform / InferenceBundle.transform çekirdeği ---
+# add_pharm_features → clean_pharm_features → add_elemental_ratios zincirinin kurallarını izler
+# (eşdeğerlik: `python -m benchmarks.check_parity --paths domain_fe`);
+# ara DataFrame kopyaları ve merge yok, her çıktı kolonu için tek dizi üretilir.
+_PHARM_COLS = ["E", "S", "A", "B", "V"]
+_RATIO_ELEMENTS = [("H_C_molar", "H_percent", 1.008), ("O_C_molar", "O_percent", 15.999),
+                   ("N_C_molar", "N_percent", 14.007), ("S_C_molar", "S_percent", 32.06)]
+_PHARM_INDEX = pd.Index(_pharm_df["pharm_code_norm"])
+# Kolon başına LSER değerleri; son eleman NaN → eşleşmeyen kod (-1) için np.take hedefi
+_PHARM_VALUES = {c: np.append(_pharm_df[c].to_numpy(dtype=float), np.nan) for c in _PHARM_COLS}
+
+
+def pharm_codes() -> List[str]:
+    """LSER tablosundaki ilaç kodları (tablo sırasında)."""
+    return [r[0] for r in _pharm_data]
+
+
+def pharm_table() -> Dict[str, Dict[str, float]]:
+    """LSER tablosu {kod: {E, S, A, B, V}}; her çağrıda yeni sözlük (değiştirmek tabloyu etkilemez)."""
+    return {code: dict(zip(_PHARM_COLS, vals)) for code, *vals in _pharm_data}
+
+
+def pharm_lookup(table: Dict[str, Dict[str, float]]) -> Tuple[pd.Index, Dict[str, np.ndarray]]:
+    """{kod: {E, S, A, B, V}} sözlüğünden domain_features'ın kullandığı (kod indeksi, değer dizileri) çifti."""
+    index = pd.Index([str(k).strip().upper() for k in table])
+    values = {c: np.append(np.array([v[c] for v in table.values()], dtype=float), np.nan) for c in _PHARM_COLS}
+    return index, values
+
+
+def _pharm_row_codes(target: pd.Series, index: pd.Index) -> np.ndarray:
+    """Target_Phar → LSER tablosundaki satır kodu (eşleşmeyen/NaN: -1). Normalizasyon yalnız tekil değerlerde."""
+    codes, uniques = pd.factorize(target)
+    norm = pd.Index(uniques).astype(str).str.strip().str.upper()
+    lut = np.append(index.get_indexer(norm), -1)  # factorize NaN kodu -1 → lut[-1] = -1
+    return lut[codes]
+
+
+def _numeric(s: pd.Series):
+    return pd.to_numeric(s, errors="coerce")
+
+
+def _float_array(s: pd.Series) -> np.ndarray:
+    return _numeric(s).to_numpy(dtype=float, na_value=np.nan)
+
+
+def domain_features(
+    X: pd.DataFrame,
+    num_feats: List[str],
+    cat_feats: List[str],
+    pharm: Optional[Tuple[pd.Index, Dict[str, np.ndarray]]] = None,
+) -> pd.DataFrame:
+    """
+    DomainFE zincirinin vektörel karşılığı: yalnız (num_feats + cat_feats) içinden üretilebilen
+    kolonları hesaplar ve RangeIndex'li yeni bir DataFrame döndürür (X değiştirilmez).
+    - Target_Phar → LSER: faktörize kodlar + np.take (merge yok); pharm verilmezse _pharm_data tablosu
+    - Molar oranlar: tüm kolon dizileri üzerinde NumPy (maskeli .loc yazımı yok)
+    """
+    cols = {str(c).strip(): c for c in X.columns}
+    if "Target_Phar" not in cols:
+        raise KeyError("Target_Phar kolonu bulunamadı.")
+    n = len(X)
+
+    def src(name):
+        return X[cols[name]]
+
+    wanted = list(dict.fromkeys(list(num_feats) + list(cat_feats)))
+    out = {}
+    FE_METRICS.incr("rows", n)
+
+    # Farmasötik (E, S, A, B, V): girdideki değer öncelikli, eksikler tablodan
+    if any(c in wanted for c in _PHARM_COLS):
+        with FE_METRICS.stage("pharm_merge"):
+            index, values = pharm if pharm is not None else (_PHARM_INDEX, _PHARM_VALUES)
+            rows = _pharm_row_codes(src("Target_Phar"), index)
+            for c in _PHARM_COLS:
+                if c in wanted:
+                    out[c] = np.take(values[c], rows)
+        _note_unknown_pharm(int(np.count_nonzero(rows < 0)))
+        with FE_METRICS.stage("pharm_cleanup"):
+            for c in _PHARM_COLS:
+                if c in wanted and c in cols:
+                    s = _numeric(src(c))
+                    out[c] = _numeric(s.fillna(pd.Series(out[c], index=s.index))).to_numpy() if s.hasnans else s.to_numpy()
+
+    # Element oranları (add_elemental_ratios ile aynı kurallar)
+    t0 = time.perf_counter()
+    for col in ["C_percent", "O_percent", "H_percent", "N_percent", "S_percent"]:
+        if col not in cols:
+            _note_missing_column(col)
+    ratio_cols = ["C_molar"] + [r for r, _, _ in _RATIO_ELEMENTS]
+    if "C_percent" in cols:
+        c_pct = _float_array(src("C_percent"))
+        maskC = c_pct > 0  # NaN karşılaştırması False
+        n_missing = int(np.count_nonzero(np.isnan(c_pct)))
+        _note_bad_carbon(n_missing, int(n - np.count_nonzero(maskC)) - n_missing)
+        denom = c_pct / 12.011
+        parts = [("C_molar", None, None)] + _RATIO_ELEMENTS
+        for r, el, w in parts:
+            if r not in wanted or (el is not None and el not in cols and r not in cols):
+                continue
+            base = _float_array(src(r)) if r in cols else np.full(n, np.nan)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                if el is None:
+                    val = np.where(maskC, denom, base)
+                elif el in cols:
+                    val = np.where(maskC, (_float_array(src(el)) / w) / denom, base)
+                else:
+                    val = base.copy()  # girdi dizisine yazılmasın
+            val[val < 0] = 0  # güvenlik: negatifler 0
+            out[r] = val
+    else:
+        for r in ratio_cols:
+            if r in wanted and r in cols:
+                out[r] = _numeric(src(r)).to_numpy()
+    FE_METRICS.add_time("ratios", time.perf_counter() - t0)
+
+    # Kalan sayısal kolonlar + tip güvenliği (numerik → to_numeric, kategorik → category)
+    with FE_METRICS.stage("coerce"):
+        result = {}
+        use_cols = []
+        for c in list(num_feats) + list(cat_feats):
+            if c not in out and c not in cols:
+                continue
+            use_cols.append(c)
+            if c in result:
+                continue
+            v = out[c] if c in out else src(c)
+            if c in num_feats and isinstance(v, pd.Series):
+                v = _numeric(v)
+            if c in cat_feats:
+                v = pd.Categorical(v)
+            result[c] = v.values if isinstance(v, pd.Series) else v
+
+        # copy=False: kolon dizileri tek bloğa birleştirilmeden (ek kopya olmadan) kullanılır
+        df = pd.DataFrame(result, index=pd.RangeIndex(n), copy=False)
+        return df if len(use_cols) == len(result) else df[use_cols]
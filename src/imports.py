@@ -4,6 +4,10 @@ imports.py
 Proje genelinde kullanılan kütüphaneler.
 Analiz ve modelleme için temel paketleri burada toplanmıştır.
 
+- os / warnings / numpy / pandas hemen yüklenir (ucuz ve her yerde gerekli)
+- matplotlib ve sklearn modelleme yığını ilk erişimde yüklenir (modül __getattr__, PEP 562);
+  `from src.imports import plt` yine çalışır, yalnız o an import edilir
+
 """
 
 # Sistem ve uyarı yönetimi
@@ -15,19 +19,39 @@ warnings.filterwarnings("ignore")
 import numpy as np
 import pandas as pd
 
-# Görselleştirme
-import matplotlib.pyplot as plt
-
-# Sklearn temel modüller
-from sklearn.model_selection import train_test_split, KFold, cross_validate, cross_val_predict
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
-from sklearn.ensemble import HistGradientBoostingRegressor
-
-# OneHotEncoder
-from sklearn.preprocessing import OneHotEncoder
-
-# Çoklu işlem desteği
-from joblib import parallel_backend
-
+import importlib
+
+# Geç yüklenen adlar: ad → (modül, öznitelik; None ise modülün kendisi)
+_LAZY = {
+    # Görselleştirme
+    "plt": ("matplotlib.pyplot", None),
+    # Sklearn temel modüller
+    "train_test_split": ("sklearn.model_selection", "train_test_split"),
+    "KFold": ("sklearn.model_selection", "KFold"),
+    "cross_validate": ("sklearn.model_selection", "cross_validate"),
+    "cross_val_predict": ("sklearn.model_selection", "cross_val_predict"),
+    "ColumnTransformer": ("sklearn.compose", "ColumnTransformer"),
+    "Pipeline": ("sklearn.pipeline", "Pipeline"),
+    "r2_score": ("sklearn.metrics", "r2_score"),
+    "mean_squared_error": ("sklearn.metrics", "mean_squared_error"),
+    "mean_absolute_error": ("sklearn.metrics", "mean_absolute_error"),
+    "HistGradientBoostingRegressor": ("sklearn.ensemble", "HistGradientBoostingRegressor"),
+    # OneHotEncoder
+    "OneHotEncoder": ("sklearn.preprocessing", "OneHotEncoder"),
+    # Çoklu işlem desteği
+    "parallel_backend": ("joblib", "parallel_backend"),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    mod_name, attr = _LAZY[name]
+    mod = importlib.import_module(mod_name)
+    value = mod if attr is None else getattr(mod, attr)
+    globals()[name] = value  # sonraki erişimler doğrudan
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
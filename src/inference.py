@@ -0,0 +1,221 @@
+"""
+inference.py
+------------
+
+Hafif çıkarım (inference) paketi: sklearn Pipeline'ı unpickle etmeden tahmin.
+- export_bundle: best_model.joblib içinden yerel model dosyasını (CatBoost .cbm / XGBoost .json /
+  LightGBM .txt), feature şemasını (best_model.meta.json) ve LSER ilaç tablosunu bir dizine yazar
+- load_bundle: şemayı okur, yerel modeli doğrudan kütüphanenin dosya okuyucusuyla yükler ve
+  sahte bir satırla ısıtır (tembel iç yapılar ilk gerçek istekten önce kurulur)
+- InferenceBundle.predict: DomainFE ile aynı özellik zinciri (sklearn / joblib gerektirmez)
+- Erken durdurma: XGBoost booster'ı tüm ağaçlarıyla kaydedilir; en iyi iterasyon şemaya
+  (best_iteration) yazılır ve tahmin iteration_range=(0, best_iteration + 1) ile yapılır
+  (XGBRegressor.predict ile aynı). CatBoost (use_best_model) ve LightGBM (save_model) zaten kırpılmış yazar.
+
+Çoklu süreç: model bir kez ana süreçte yüklenip sonra fork edilirse (ör. gunicorn --preload,
+multiprocessing 'fork') ağaç tabloları süreçler arasında copy-on-write ile paylaşılır.
+
+Kapsam: yalnız dışa aktarım biçimi + yükleyici. Model bellek eşlemeli (mmap) yüklenmez (yerel dosya
+okuyucusu kullanılır); Streamlit uygulaması hâlâ joblib Pipeline'ı yükler, paketi yalnız service --bundle
+kullanır. Yükleme süresi ve bellek (RSS) etkisi ölçülmedi → benchmarks/bench_cold_start.py.
+
+Kullanım:
+    python -m src.inference export --out model_bundle
+    python -m src.inference check  --bundle model_bundle     # joblib Pipeline ile birebir karşılaştırma
+
+    from src.inference import load_bundle
+    model = load_bundle("model_bundle")
+    model.predict(df)
+
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import MODEL_PATH, META_PATH, BUNDLE_DIR, INPUT_COLS, CAT_INPUT_COLS
+from src.features import domain_features, pharm_codes, pharm_lookup, pharm_table
+
+SCHEMA_FILE = "schema.json"
+PHARM_FILE = "pharm_lser.json"
+
+# Yerel model biçimleri: sarmalayıcı sınıf adı → (biçim, dosya adı)
+_FORMATS = {
+    "CatBoostSk": ("catboost-cbm", "model.cbm"),
+    "XGBSk": ("xgboost-json", "model.json"),
+    "LGBMSk": ("lightgbm-txt", "model.txt"),
+}
+
+
+# ----------------------- Dışa aktarım -----------------------
+def export_bundle(
+    out_dir: str = BUNDLE_DIR,
+    model_path: str = MODEL_PATH,
+    meta_path: str = META_PATH,
+) -> Dict[str, Any]:
+    """
+    Eğitilmiş Pipeline'dan çıkarım paketini üretir; yazılan şemayı döndürür.
+    Pipeline son adımı CatBoostSk / XGBSk / LGBMSk olmalı (EBM vb. için ValueError).
+    """
+    from src.artifacts import load_artifacts  # joblib + sklearn yalnız dışa aktarımda gerekir
+
+    pipe, feats, model_version = load_artifacts(model_path, meta_path)
+    fe, reg = pipe.steps[0][1], pipe.steps[-1][1]
+    kind = type(reg).__name__
+    if kind not in _FORMATS:
+        raise ValueError(f"Yerel biçime aktarılamayan model: {kind}")
+    fmt, fname = _FORMATS[kind]
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, fname)
+    if fmt == "catboost-cbm":
+        reg.model_.save_model(path, format="cbm")
+    elif fmt == "xgboost-json":
+        reg.model_.get_booster().save_model(path)
+    else:
+        reg.model_.booster_.save_model(path)
+
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    schema = {
+        "format": fmt,
+        "model_file": fname,
+        "model_version": model_version,
+        "best_name": meta.get("best_name"),
+        "saved_at": meta.get("saved_at"),
+        "target": meta.get("target"),
+        "features": list(feats),
+        "num_feats": list(fe.num_feats),
+        "cat_feats": list(fe.cat_feats),
+        "best_iteration": getattr(reg, "best_iteration_", None) if fmt == "xgboost-json" else None,
+        "exported_at": time.strftime("%Y%m%d_%H%M%S"),
+    }
+    with open(os.path.join(out_dir, PHARM_FILE), "w", encoding="utf-8") as f:
+        json.dump(pharm_table(), f, indent=2)
+    with open(os.path.join(out_dir, SCHEMA_FILE), "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2, ensure_ascii=False)
+    return schema
+
+
+# ----------------------- Yükleme / tahmin -----------------------
+class InferenceBundle:
+    """Yerel model + şema + LSER tablosu; predict(DataFrame) → np.ndarray."""
+
+    def __init__(self, schema: Dict[str, Any], pharm: Dict[str, Dict[str, float]], model, bundle_dir: str):
+        self.schema = schema
+        self.format = schema["format"]
+        self.model_version = schema["model_version"]
+        self.num_feats: List[str] = schema["num_feats"]
+        self.cat_feats: List[str] = schema["cat_feats"]
+        self.bundle_dir = bundle_dir
+        self.model = model
+        self.best_iteration: Optional[int] = schema.get("best_iteration")
+        self._pharm = pharm_lookup(pharm)
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        """DomainFE.transform ile aynı çıktı (kolon sırası ve tipler dahil)."""
+        return domain_features(X, self.num_feats, self.cat_feats, pharm=self._pharm)
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        Xt = self.transform(X)
+        if self.format == "xgboost-json":
+            import xgboost as xgb
+
+            # erken durdurulmuş modelde en iyi iterasyondan sonraki ağaçlar kullanılmaz
+            it = (0, int(self.best_iteration) + 1) if self.best_iteration is not None else (0, 0)
+            return self.model.predict(xgb.DMatrix(Xt, enable_categorical=True), iteration_range=it)
+        return np.asarray(self.model.predict(Xt), dtype=float)
+
+    def warmup(self) -> float:
+        """Sahte bir satırla tahmin yapar (tembel iç yapılar kurulur); süreyi saniye döndürür."""
+        row = {c: 1.0 for c in INPUT_COLS if c not in CAT_INPUT_COLS}
+        row.update({c: "N2" for c in self.cat_feats})
+        row["Target_Phar"] = self._pharm[0][0]
+        t0 = time.perf_counter()
+        self.predict(pd.DataFrame([row]))
+        return time.perf_counter() - t0
+
+
+def _load_native(fmt: str, path: str):
+    if fmt == "catboost-cbm":
+        from catboost import CatBoostRegressor
+
+        return CatBoostRegressor().load_model(path, format="cbm")
+    if fmt == "xgboost-json":
+        import xgboost as xgb
+
+        booster = xgb.Booster()
+        booster.load_model(path)
+        return booster
+    if fmt == "lightgbm-txt":
+        import lightgbm as lgb
+
+        return lgb.Booster(model_file=path)
+    raise ValueError(f"Bilinmeyen model biçimi: {fmt}")
+
+
+def load_bundle(bundle_dir: str = BUNDLE_DIR, warmup: bool = True) -> InferenceBundle:
+    """Paketi yükler; warmup=True ise sahte satırla ısıtır. Eksik dosyada FileNotFoundError."""
+    with open(os.path.join(bundle_dir, SCHEMA_FILE), "r", encoding="utf-8") as f:
+        schema = json.load(f)
+    with open(os.path.join(bundle_dir, PHARM_FILE), "r", encoding="utf-8") as f:
+        pharm = json.load(f)
+    model = _load_native(schema["format"], os.path.join(bundle_dir, schema["model_file"]))
+    bundle = InferenceBundle(schema, pharm, model, bundle_dir)
+    if warmup:
+        bundle.warmup()
+    return bundle
+
+
+# ----------------------- Komut satırı -----------------------
+def check_bundle(
+    bundle_dir: str = BUNDLE_DIR,
+    model_path: str = MODEL_PATH,
+    meta_path: str = META_PATH,
+    n: int = 2000,
+    seed: int = 0,
+) -> float:
+    """Paket tahminlerini joblib Pipeline ile karşılaştırır; en büyük mutlak farkı döndürür."""
+    from src.artifacts import load_artifacts
+
+    pipe, _, _ = load_artifacts(model_path, meta_path)
+    bundle = load_bundle(bundle_dir)
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({c: rng.uniform(0, 100, n) for c in INPUT_COLS if c not in CAT_INPUT_COLS})
+    X.iloc[::7, 3] = np.nan
+    X["Activation_Atmosphere"] = rng.choice(["N2", "Air", "SG"], n)
+    X["Target_Phar"] = rng.choice(pharm_codes() + ["UNKNOWN"], n)
+    return float(np.max(np.abs(bundle.predict(X) - np.asarray(pipe.predict(X), dtype=float))))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Aqua-ML çıkarım paketi")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="best_model.joblib → yerel model paketi")
+    ex.add_argument("--out", default=BUNDLE_DIR)
+    ex.add_argument("--model", default=MODEL_PATH)
+    ex.add_argument("--meta", default=META_PATH)
+    ck = sub.add_parser("check", help="paket ↔ joblib Pipeline tahmin karşılaştırması")
+    ck.add_argument("--bundle", default=BUNDLE_DIR)
+    ck.add_argument("--model", default=MODEL_PATH)
+    ck.add_argument("--meta", default=META_PATH)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "export":
+        schema = export_bundle(args.out, args.model, args.meta)
+        print(f"[OK] {schema['format']} paketi yazıldı: {args.out} (model {schema['model_version']})")
+    else:
+        diff = check_bundle(args.bundle, args.model, args.meta)
+        print(f"En büyük mutlak fark: {diff:.3g}")
+        if diff > 1e-9:
+            raise SystemExit("[HATA] Paket tahminleri Pipeline ile uyuşmuyor.")
+        print("[OK] Paket tahminleri Pipeline ile aynı.")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,6 @@ Tek parça (end-to-end) pipeline'lar:
 
 from typing import List, Optional, Tuple, Any
 from sklearn.pipeline import Pipeline
-from sklearn.ensemble import HistGradientBoostingRegressor
 
 from src.preprocessing import DomainFE
 from src.estimators import CatBoostSk, LGBMSk, XGBSk
@@ -66,6 +65,7 @@ def build_model_pool(
         models.append(("XGBoost-GBTree (skipped)", None))
 
     # --- HistGradientBoostingRegressor (OHE gerekli; DomainFE -> pre_ohe -> reg) ---
+    from sklearn.ensemble import HistGradientBoostingRegressor  # lazy import (sklearn.ensemble ağır)
     models.append((
         "HistGBR",
         Pipeline([
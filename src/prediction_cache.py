@@ -0,0 +1,341 @@
+"""
+prediction_cache.py
+-------------------
+
+Süreç genelinde paylaşılan LRU tahmin önbelleği.
+- Anahtar: ham girdi satırının kanonik özeti (sabit kolon sırası, normalize
+  Target_Phar, ham diğer kategorikler, yuvarlanmış sayılar) + model sürümü
+- Boyut sınırlı, LRU tahliyesi, isabet/ıska sayaçları
+- Eksik satırlar tek bir predict çağrısında toplu hesaplanır
+- Opsiyonel ikinci katman: süreçler/yeniden başlatmalar arası paylaşılan SQLite deposu
+
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    INPUT_COLS, DERIVED_COLS, CAT_INPUT_COLS, PRED_CACHE_SIZE, PRED_CACHE_DECIMALS,
+    PRED_DISK_CACHE_ROWS, PRED_DISK_TOUCH_S,
+)
+
+KEY_COLS = list(dict.fromkeys(INPUT_COLS + DERIVED_COLS))
+
+
+# ----------------------- Model sürümü -----------------------
+def file_stamp(path: str) -> str:
+    """Dosyanın ucuz kimliği (boyut + mtime); her rerun'da çağrılabilir."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+def model_fingerprint(model_path: str, meta_path: Optional[str] = None) -> str:
+    """
+    Model dosyasının içerik özeti (+ varsa meta 'saved_at').
+    Yeni bir best_model.joblib farklı parmak izi üretir → eski önbellek kayıtları geçersiz olur.
+    """
+    h = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    saved_at = ""
+    if meta_path is not None:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                saved_at = str(json.load(f).get("saved_at", ""))
+        except (OSError, ValueError):
+            pass
+    return f"{saved_at}:{h.hexdigest()[:16]}"
+
+
+# ----------------------- Kanonik anahtar -----------------------
+def _canon_num(v, decimals: int):
+    """pd.to_numeric(errors='coerce') + yuvarlama; NaN → None, -0.0 → 0.0."""
+    if v is None:
+        return None
+    try:
+        x = float(v)
+    except (TypeError, ValueError):
+        return None
+    if x != x:
+        return None
+    return float(np.round(x, decimals)) + 0.0
+
+
+def _canon_cat(v, col: str):
+    """
+    Kategorik değer, DomainFE'nin gördüğü kadar normalize edilir: Target_Phar yalnız LSER eşlemesinde
+    strip + upper ile kullanılır → aynısı; diğerleri (Activation_Atmosphere) modele ham kategori olarak
+    gider → dokunulmaz (" N2" ile "N2" farklı tahmin verebilir, anahtarları da farklı olmalı).
+    """
+    if v is None or (isinstance(v, float) and v != v):
+        return None
+    return str(v).strip().upper() if col == "Target_Phar" else str(v)
+
+
+def _digest(values: tuple) -> str:
+    return hashlib.blake2b(repr(values).encode("utf-8"), digest_size=16).hexdigest()
+
+
+# ----------------------- Kalıcı depo (SQLite) -----------------------
+class DiskPredictionStore:
+    """
+    SQLite tabanlı kalıcı tahmin deposu (anahtar → qe).
+
+    - Anahtarlar PredictionCache ile aynıdır (model parmak izi önekli)
+    - WAL kipi + busy_timeout: birden fazla süreç aynı dosyayı güvenle okur/yazar
+    - Toplu get/put (IN (...) ve executemany), boyut aşımında en eski kullanılanlar silinir
+    - Okumalar yazma kilidi almaz: last_used yalnız touch_s'den eski satırlar için güncellenir
+      (LRU sırası touch_s çözünürlüğünde; sıcak satırlar her okumada yeniden yazılmaz)
+    """
+    _CHUNK = 500  # SQLite parametre sınırının altında kalmak için
+
+    def __init__(self, path: str, max_rows: int = PRED_DISK_CACHE_ROWS, timeout: float = 30.0,
+                 touch_s: float = PRED_DISK_TOUCH_S):
+        self.path = str(path)
+        self.max_rows = int(max_rows)
+        self.timeout = float(timeout)
+        self.touch_s = float(touch_s)
+        self._local = threading.local()
+        self._puts_since_check = 0
+
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with self._conn() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                " key TEXT PRIMARY KEY, qe REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS idx_predictions_last_used ON predictions(last_used)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Thread başına bir bağlantı (sqlite3 bağlantıları thread'ler arası paylaşılmamalı)."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.con = con
+        return con
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, float]:
+        con = self._conn()
+        found: Dict[str, float] = {}
+        stale: List[str] = []
+        now = time.time()
+        keys = list(dict.fromkeys(keys))
+        for i in range(0, len(keys), self._CHUNK):
+            part = keys[i:i + self._CHUNK]
+            q = f"SELECT key, qe, last_used FROM predictions WHERE key IN ({','.join('?' * len(part))})"
+            for k, qe, used in con.execute(q, part).fetchall():
+                found[k] = qe
+                if used < now - self.touch_s:
+                    stale.append(k)
+        if stale:
+            try:
+                con.execute("BEGIN IMMEDIATE")
+                con.executemany("UPDATE predictions SET last_used=? WHERE key=?", [(now, k) for k in stale])
+                con.execute("COMMIT")
+            except sqlite3.OperationalError:
+                # Yoğun yazma anında LRU zaman damgası güncellenmeyebilir; okuma sonucu yine geçerli.
+                if con.in_transaction:
+                    con.execute("ROLLBACK")
+        return found
+
+    def put_many(self, items: Mapping[str, float]) -> None:
+        if not items:
+            return
+        con = self._conn()
+        now = time.time()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.executemany(
+                "INSERT OR REPLACE INTO predictions(key, qe, last_used) VALUES (?, ?, ?)",
+                [(k, float(v), now) for k, v in items.items()],
+            )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+        # COUNT(*) tam tarama olduğundan her yazımda değil, ~%1 büyüdükçe kontrol edilir
+        self._puts_since_check += len(items)
+        if self._puts_since_check >= max(1, self.max_rows // 100):
+            self._puts_since_check = 0
+            self.evict()
+
+    def evict(self) -> int:
+        """Satır sayısı max_rows'u aşarsa en eski kullanılanları siler (%10 pay bırakır)."""
+        con = self._conn()
+        # COUNT + DELETE tek işlemde: arada başka süreçlerin yazımı/silmesi sayımı bayatlatmaz
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            n = con.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            n_drop = n - int(self.max_rows * 0.9) if n > self.max_rows else 0
+            if n_drop:
+                con.execute(
+                    "DELETE FROM predictions WHERE key IN "
+                    "(SELECT key FROM predictions ORDER BY last_used ASC LIMIT ?)", (n_drop,)
+                )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return n_drop
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+
+class PredictionCache:
+    """
+    predict_fn etrafında thread-safe LRU önbellek.
+
+    Arama sırası: bellek (LRU) → opsiyonel disk deposu → predict_fn.
+
+    Kullanım:
+        cache = PredictionCache(pipe.predict, model_version=model_fingerprint(...))
+        yhat = cache.predict(X)          # DataFrame → np.ndarray
+        cache.stats()                    # {"hits", "disk_hits", "misses", "size", ...}
+    """
+    def __init__(
+        self,
+        predict_fn: Callable[[pd.DataFrame], Any],
+        model_version: str,
+        maxsize: int = PRED_CACHE_SIZE,
+        columns: Sequence[str] = KEY_COLS,
+        decimals: int = PRED_CACHE_DECIMALS,
+        store: Optional[DiskPredictionStore] = None,
+    ):
+        self.predict_fn = predict_fn
+        self.model_version = model_version
+        self.maxsize = int(maxsize)
+        self.columns = list(columns)
+        self.decimals = int(decimals)
+        self.store = store
+
+        self._data: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # --- anahtarlar ---
+    def row_key(self, row: Mapping[str, Any]) -> str:
+        """Tek satırlık (dict) girdi için kanonik anahtar."""
+        vals = tuple(
+            _canon_cat(row.get(c), c) if c in CAT_INPUT_COLS else _canon_num(row.get(c), self.decimals)
+            for c in self.columns
+        )
+        return f"{self.model_version}:{_digest(vals)}"
+
+    def frame_keys(self, X: pd.DataFrame) -> List[str]:
+        """DataFrame satırları için anahtarlar; kanonikleştirme kolon bazında vektörel."""
+        X = X.rename(columns=lambda c: str(c).strip())
+        n = len(X)
+        cols = []
+        for c in self.columns:
+            if c not in X.columns:
+                cols.append([None] * n)
+            elif c in CAT_INPUT_COLS:
+                cols.append([_canon_cat(v, c) for v in X[c].tolist()])
+            else:
+                arr = np.round(pd.to_numeric(X[c], errors="coerce").to_numpy(dtype=float), self.decimals) + 0.0
+                cols.append([None if v != v else v for v in arr.tolist()])
+        prefix = f"{self.model_version}:"
+        return [prefix + _digest(vals) for vals in zip(*cols)] if cols else [prefix] * n
+
+    # --- önbellek işlemleri ---
+    def get_many(self, keys: Sequence[str]) -> Dict[str, float]:
+        found: Dict[str, float] = {}
+        with self._lock:
+            for k in keys:
+                v = self._data.get(k)
+                if v is not None:
+                    self._data.move_to_end(k)
+                    found[k] = v
+        return found
+
+    def put_many(self, items: Mapping[str, float]) -> None:
+        with self._lock:
+            for k, v in items.items():
+                self._data[k] = float(v)
+                self._data.move_to_end(k)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def predict(self, X: pd.DataFrame, memory: bool = True) -> np.ndarray:
+        """
+        Önbellekte olmayan (tekil) satırları tek predict çağrısıyla hesaplar.
+        memory=False: bellek katmanı atlanır (toplu yüklemeler LRU'yu doldurmasın diye);
+        yalnız disk deposu kullanılır, o da yoksa doğrudan predict_fn çağrılır.
+        """
+        if not memory and self.store is None:
+            return np.asarray(self.predict_fn(X), dtype=float).ravel()
+
+        keys = self.frame_keys(X)
+        found = self.get_many(keys) if memory else {}
+
+        n_disk = 0
+        if self.store is not None and len(found) < len(keys):
+            from_disk = self.store.get_many([k for k in keys if k not in found])
+            if from_disk:
+                n_disk = sum(1 for k in keys if k in from_disk and k not in found)
+                if memory:
+                    self.put_many(from_disk)
+                found.update(from_disk)
+
+        miss_pos: Dict[str, int] = {}
+        for i, k in enumerate(keys):
+            if k not in found and k not in miss_pos:
+                miss_pos[k] = i
+
+        n_miss = sum(1 for k in keys if k not in found)
+        with self._lock:
+            self.hits += len(keys) - n_miss - n_disk
+            self.disk_hits += n_disk
+            self.misses += n_miss
+
+        if miss_pos:
+            preds = np.asarray(self.predict_fn(X.iloc[list(miss_pos.values())]), dtype=float).ravel()
+            new = dict(zip(miss_pos.keys(), preds.tolist()))
+            if memory:
+                self.put_many(new)
+            if self.store is not None:
+                self.store.put_many(new)
+            found.update(new)
+
+        return np.array([found[k] for k in keys], dtype=float)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                "model_version": self.model_version,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.hits + self.disk_hits) / total) if total else 0.0,
+                "disk_store": self.store.path if self.store is not None else None,
+            }
@@ -12,17 +12,18 @@ Sağlananlar:
 - OneHotEncoder (sklearn sürüm uyumluluğu) + ColumnTransformer (preprocessor)
 - CatBoost için ham X'te kategorik kolon indeksleri (cat_idx_raw)
 - DomainFE: add_pharm_features → clean_pharm_features → add_elemental_ratios zinciri + tip güvenliği
+  (features.domain_features ile vektörel, ara kopyasız tek geçiş)
 
 """
 
+import logging
 from typing import Dict, List
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.compose import ColumnTransformer
 from src.config import RANDOM_STATE, TEST_SIZE
-from sklearn.preprocessing import OneHotEncoder
 from sklearn.base import BaseEstimator, TransformerMixin
-from src.features import add_pharm_features, clean_pharm_features, add_elemental_ratios
+from src.features import domain_features
+
+logger = logging.getLogger(__name__)
 
 
 class DomainFE(BaseEstimator, TransformerMixin):
@@ -44,25 +45,10 @@ class DomainFE(BaseEstimator, TransformerMixin):
         return self
 
     def transform(self, X):
-        df = X.copy()
-        df.columns = df.columns.astype(str).str.strip()
-
-        # Domain FE zinciri
-        df = add_pharm_features(df)
-        df = clean_pharm_features(df)
-        df = add_elemental_ratios(df)
-
-        # Tip güvenliği
-        for c in self.num_feats:
-            if c in df.columns:
-                df[c] = pd.to_numeric(df[c], errors="coerce")
-        for c in self.cat_feats:
-            if c in df.columns:
-                df[c] = df[c].astype("category")
-
-        # Sadece istenen kolonları döndür
-        use_cols = [c for c in (self.num_feats + self.cat_feats) if c in df.columns]
-        return df[use_cols]
+        # Vektörel tek geçiş (features.domain_features); eski zincirin kurallarını izler:
+        # add_pharm_features → clean_pharm_features → add_elemental_ratios → tip güvenliği → kolon seçimi
+        # (eşdeğerlik: `python -m benchmarks.check_parity --paths domain_fe`)
+        return domain_features(X, self.num_feats, self.cat_feats)
 
 def prepare_ml_data(
     df: pd.DataFrame,
@@ -78,6 +64,11 @@ def prepare_ml_data(
           "preprocessor", "num_feats", "cat_feats", "cat_idx_raw"
         }
     """
+    # Eğitime özgü sklearn modülleri geç import edilir (çıkarımda DomainFE bunlara ihtiyaç duymaz)
+    from sklearn.model_selection import train_test_split
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+
     # --- 0) Defansif kopya + kolon adlarını normalize et (strip) ---
     df = df.copy()
     df.columns = df.columns.astype(str).str.strip()
@@ -114,7 +105,7 @@ def prepare_ml_data(
     # Bilgi amaçlı eksikler (opsiyonel)
     missing = [c for c in num_feats_all if c not in df.columns]
     if missing:
-        print(f"[Bilgi] Veride olmayan num_feats: {missing}")
+        logger.info("Veride olmayan num_feats: %s", missing)
 
     # Kategorik feature: sadece 'Target_Phar'
     cat_feats: List[str] = ["Activation_Atmosphere"] if "Activation_Atmosphere" in df.columns else []
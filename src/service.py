@@ -0,0 +1,563 @@
+"""
+service.py
+----------
+
+Yerel (localhost) HTTP tahmin servisi — süreç kontrol scriptleri için programatik erişim.
+- Uygulama ile aynı artefakt yükleyicisi (src/artifacts.py) ve tahmin önbelleği
+- POST /predict        : tek satır; eşzamanlı istekler mikro-yığında (MicroBatcher) birleşir
+- POST /predict_batch  : satır listesi; tek predict çağrısı
+- POST /sensitivity    : taban satır + duyarlılık eğrileri (src/sweeps.py ızgaraları)
+- POST /score_arrow    : Arrow IPC kayıt grubu akışı → 'Pred_qe' eklenmiş Arrow IPC akışı (milyonlarca satır)
+- GET  /health         : model sürümü ve sayaçlar
+- Yalnız standart kütüphane (http.server); ağ erişimi gerekmez
+
+Çalıştırma:
+    python -m src.service --port 8765
+
+Örnek istek:
+    curl -s localhost:8765/predict -d '{"row": {"Target_Phar": "CIP", "Activation_Atmosphere": "N2", "Dosage(g/L)": 1.0}}'
+
+Toplu Arrow skorlama (istemci yardımcısı gönderirken aynı anda yanıtı okur):
+    from src.service import score_arrow_remote
+    scored = pa.Table.from_batches(score_arrow_remote(table.to_batches(), port=8765))
+
+"""
+
+import argparse
+import http.client
+import io
+import json
+import math
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    have, INPUT_COLS, MODEL_PATH, META_PATH, PRED_CACHE_SIZE, PRED_DISK_CACHE, SERVICE_HOST, SERVICE_PORT,
+    SERVICE_BATCH_WINDOW_MS, SERVICE_MAX_BATCH, SERVICE_MAX_BODY_MB,
+)
+from src.artifacts import load_artifacts
+from src.batch_scoring import REQUIRED_COLS, score_arrow_stream
+from src.fe_metrics import FE_METRICS
+from src.features import pharm_codes
+from src.prediction_cache import PredictionCache, DiskPredictionStore
+from src.sweeps import SWEEP_GRIDS, default_sweeps, run_sweeps
+
+
+ARROW_STREAM_MIME = "application/vnd.apache.arrow.stream"
+
+
+# ----------------------- Mikro-yığınlama -----------------------
+class MicroBatcher:
+    """
+    Tekil satır isteklerini kısa bir pencere (window_ms) boyunca biriktirip tek predict çağrısı yapar.
+
+    İlk istek geldiğinde pencere açılır; pencere dolunca ya da max_batch satıra ulaşınca yığın
+    işlenir. Yığın hata verirse satırlar tek tek yeniden denenir — hatalı bir satır diğerlerini
+    etkilemez.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[pd.DataFrame], Any],
+        window_ms: float = SERVICE_BATCH_WINDOW_MS,
+        max_batch: int = SERVICE_MAX_BATCH,
+    ):
+        self.predict_fn = predict_fn
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.batches = 0
+        self.rows = 0
+        self._q: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="aquaml-microbatch", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: Mapping[str, Any]) -> Future:
+        if self._closed:
+            raise RuntimeError("MicroBatcher kapatıldı.")
+        fut: Future = Future()
+        self._q.put((dict(row), fut))
+        return fut
+
+    def predict_one(self, row: Mapping[str, Any], timeout: Optional[float] = None) -> float:
+        return self.submit(row).result(timeout)
+
+    def close(self) -> None:
+        self._closed = True
+        self._q.put(None)
+        self._thread.join()
+
+    def _loop(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.window
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch: List[tuple]) -> None:
+        batch = [(row, fut) for row, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        self.batches += 1
+        self.rows += len(batch)
+        try:
+            preds = np.asarray(self.predict_fn(pd.DataFrame([row for row, _ in batch])), dtype=float).ravel()
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+        else:
+            for (_, fut), y in zip(batch, preds):
+                fut.set_result(float(y))
+            return
+        for row, fut in batch:
+            try:
+                fut.set_result(float(np.asarray(self.predict_fn(pd.DataFrame([row])), dtype=float).ravel()[0]))
+            except Exception as e:
+                fut.set_exception(e)
+
+
+# ----------------------- Servis mantığı -----------------------
+def _json_float(v: float) -> Optional[float]:
+    return None if v is None or not math.isfinite(v) else float(v)
+
+
+def _complete_columns(X: pd.DataFrame) -> pd.DataFrame:
+    """Gönderilmeyen girdi kolonlarını NaN olarak ekler (uygulamadaki boş form alanlarıyla aynı)."""
+    missing = [c for c in INPUT_COLS if c not in X.columns]
+    if missing:
+        X = X.assign(**{c: np.nan for c in missing})
+    return X
+
+
+def _check_row(row: Any) -> Dict[str, Any]:
+    if not isinstance(row, dict):
+        raise ValueError("Satır bir JSON nesnesi olmalı (kolon → değer).")
+    missing = [c for c in REQUIRED_COLS if row.get(c) in (None, "")]
+    if missing:
+        raise ValueError(f"Eksik gerekli kolon(lar): {missing}")
+    return row
+
+
+class PredictionService:
+    """HTTP katmanından bağımsız servis: yükleme, önbellek, mikro-yığın ve uç noktaların mantığı."""
+
+    def __init__(
+        self,
+        pipe,
+        model_version: str,
+        window_ms: float = SERVICE_BATCH_WINDOW_MS,
+        max_batch: int = SERVICE_MAX_BATCH,
+        cache_size: int = PRED_CACHE_SIZE,
+        disk_cache: Optional[str] = PRED_DISK_CACHE,
+    ):
+        self.pipe = pipe
+        self.model_version = model_version
+        store = DiskPredictionStore(disk_cache) if disk_cache else None
+        self.cache = PredictionCache(self._predict, model_version=model_version, maxsize=cache_size, store=store)
+        self.batcher = MicroBatcher(self.cache.predict, window_ms=window_ms, max_batch=max_batch)
+        self.started_at = time.time()
+        # Sayaçlar handler thread'lerinden artırılır (ThreadingHTTPServer); += atomik değil
+        self._counter_lock = threading.Lock()
+        self.requests = 0
+        self.arrow_rows = 0
+
+    def _predict(self, X: pd.DataFrame):
+        return self.pipe.predict(_complete_columns(X))
+
+    @classmethod
+    def from_files(cls, model_path: str = MODEL_PATH, meta_path: str = META_PATH, **kwargs) -> "PredictionService":
+        pipe, _, model_version = load_artifacts(model_path, meta_path)
+        return cls(pipe, model_version, **kwargs)
+
+    @classmethod
+    def from_bundle(cls, bundle_dir: str, **kwargs) -> "PredictionService":
+        """Yerel model paketiyle (src/inference.py) başlatır; sklearn Pipeline unpickle edilmez."""
+        from src.inference import load_bundle
+
+        bundle = load_bundle(bundle_dir)
+        return cls(bundle, bundle.model_version, **kwargs)
+
+    def close(self) -> None:
+        self.batcher.close()
+
+    def count_request(self) -> None:
+        with self._counter_lock:
+            self.requests += 1
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "model_version": self.model_version,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "micro_batches": self.batcher.batches,
+            "micro_batched_rows": self.batcher.rows,
+            "arrow_rows": self.arrow_rows,
+            "cache": self.cache.stats(),
+            "fe": FE_METRICS.snapshot(),
+        }
+
+    def predict(self, body: Mapping[str, Any]) -> Dict[str, Any]:
+        row = _check_row(body.get("row", body))
+        return {"qe": _json_float(self.batcher.predict_one(row)), "model_version": self.model_version}
+
+    def predict_batch(self, body: Mapping[str, Any]) -> Dict[str, Any]:
+        rows = body.get("rows")
+        if not isinstance(rows, list) or not rows:
+            raise ValueError("'rows' boş olmayan bir liste olmalı.")
+        for r in rows:
+            _check_row(r)
+        preds = np.asarray(self.cache.predict(pd.DataFrame(rows)), dtype=float).ravel()
+        return {"qe": [_json_float(y) for y in preds], "model_version": self.model_version}
+
+    def sensitivity(self, body: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Gövde: {"row": {...}, "sweeps": [...], "drugs": true}
+          sweeps: SWEEP_GRIDS adları ve/veya {"name", "column", "values"} nesneleri; verilmezse tüm ızgaralar
+          drugs : true ise tüm ilaç kodları için karşılaştırma eğrisi ("drugs") eklenir
+        """
+        row = _check_row(body.get("row"))
+        spec = body.get("sweeps")
+        sweeps = []
+        if spec is None:
+            sweeps = default_sweeps()
+        else:
+            for s in spec:
+                if isinstance(s, str):
+                    if s not in SWEEP_GRIDS:
+                        raise ValueError(f"Bilinmeyen eğri: {s} (mevcut: {list(SWEEP_GRIDS)})")
+                    sweeps.extend(default_sweeps([s]))
+                elif isinstance(s, dict) and {"name", "column", "values"} <= set(s) and isinstance(s["values"], list):
+                    sweeps.append((str(s["name"]), str(s["column"]), s["values"]))
+                else:
+                    raise ValueError("Eğri tanımı ad (str) ya da {name, column, values} olmalı.")
+        if body.get("drugs", True):
+            sweeps.append(("drugs", "Target_Phar", pharm_codes()))
+
+        res = run_sweeps(self.cache.predict, row, sweeps)
+        curves = {}
+        for name, col, *_ in sweeps:
+            df = res["curves"][name]
+            curves[name] = {"column": col, "values": df[col].tolist(), "qe": [_json_float(y) for y in df["qe"]]}
+        return {"base": _json_float(res["base"]), "curves": curves, "model_version": self.model_version}
+
+
+    def score_arrow(self, source, sink, on_schema: Optional[Callable[[Any], None]] = None) -> Dict[str, Any]:
+        """
+        Arrow IPC akışını skorlar (src.batch_scoring.score_arrow_stream). Satır önbelleği atlanır:
+        milyonlarca satırda anahtar üretimi tahminden pahalıya gelir.
+        """
+        res = score_arrow_stream(self._predict, source, sink, on_schema=on_schema)
+        with self._counter_lock:
+            self.arrow_rows += res["rows"]
+        return res
+
+
+# ----------------------- HTTP gövde akışları -----------------------
+class _BodyReader(io.RawIOBase):
+    """İstek gövdesini Content-Length kadar okur (keep-alive'da sonraki isteğe taşmaz)."""
+
+    def __init__(self, rfile, length: int):
+        self._rfile = rfile
+        self._left = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if self._left <= 0:
+            return 0
+        data = self._rfile.read(min(len(b), self._left))
+        n = len(data)
+        b[:n] = data
+        self._left -= n
+        return n
+
+
+class _ChunkedBodyReader(io.RawIOBase):
+    """'Transfer-Encoding: chunked' istek gövdesini çözer (boyutu önceden bilinmeyen akışlar)."""
+
+    def __init__(self, rfile):
+        self._rfile = rfile
+        self._left = 0
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if self._eof:
+            return 0
+        if self._left == 0:
+            size = int(self._rfile.readline().split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                while self._rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass  # trailer başlıkları
+                self._eof = True
+                return 0
+            self._left = size
+        data = self._rfile.read(min(len(b), self._left))
+        n = len(data)
+        b[:n] = data
+        self._left -= n
+        if self._left == 0:
+            self._rfile.readline()  # parça sonu CRLF
+        return n
+
+
+class _ChunkedWriter(io.RawIOBase):
+    """Yanıtı 'Transfer-Encoding: chunked' olarak yazar; flush() başına bir parça gönderir."""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self._buf = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buf += b
+        return len(b)
+
+    def flush(self) -> None:
+        if self._buf:
+            self._wfile.write(b"%x\r\n%s\r\n" % (len(self._buf), bytes(self._buf)))
+            self._buf.clear()
+
+    def finish(self) -> None:
+        self.flush()
+        self._wfile.write(b"0\r\n\r\n")
+
+
+# ----------------------- HTTP katmanı -----------------------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: istemci bağlantıyı yeniden kullanabilir
+    disable_nagle_algorithm = True  # başlık + gövde ayrı yazılır; Nagle/gecikmeli ACK ~40 ms bekletir
+    server_version = "AquaML/1.0"
+    quiet = True
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+    def _send(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self._send(200, self.server.service.health())
+        else:
+            self._send(404, {"error": f"Bilinmeyen uç nokta: {self.path}"})
+
+    def _score_arrow(self) -> None:
+        service: PredictionService = self.server.service
+        if not have.get("pyarrow", False):
+            self.close_connection = True
+            self._send(501, {"error": "Arrow skorlama için pyarrow yüklü değil."})
+            return
+        import pyarrow as pa
+
+        if "chunked" in (self.headers.get("Transfer-Encoding") or "").lower():
+            body = _ChunkedBodyReader(self.rfile)
+        else:
+            body = _BodyReader(self.rfile, int(self.headers.get("Content-Length") or 0))
+        out = _ChunkedWriter(self.wfile)
+        started = False
+
+        def _start(_schema) -> None:
+            nonlocal started
+            self.send_response(200)
+            self.send_header("Content-Type", ARROW_STREAM_MIME)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            started = True
+
+        service.count_request()
+        try:
+            service.score_arrow(body, out, on_schema=_start)
+            out.finish()
+        except Exception as e:
+            # Gövdenin okunmamış kısmı bağlantıda kalır → bağlantı her durumda kapatılır.
+            # Yanıt başladıysa akış sonu işareti yazılmaz; istemci kesik akışı hata olarak görür.
+            self.close_connection = True
+            if not started:
+                bad_input = isinstance(e, (KeyError, ValueError, pa.ArrowInvalid))
+                self._send(400 if bad_input else 500, {"error": f"{type(e).__name__}: {e}"})
+
+    def do_POST(self):
+        service: PredictionService = self.server.service
+        if self.path.rstrip("/") == "/score_arrow":
+            self._score_arrow()
+            return
+        routes = {"/predict": service.predict, "/predict_batch": service.predict_batch,
+                  "/sensitivity": service.sensitivity}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > SERVICE_MAX_BODY_MB * 1024 * 1024:
+            self.close_connection = True
+            self._send(413, {"error": f"İstek gövdesi {SERVICE_MAX_BODY_MB} MB sınırını aşıyor."})
+            return
+        body = self.rfile.read(length)
+        handler = routes.get(self.path.rstrip("/"))
+        if handler is None:
+            self._send(404, {"error": f"Bilinmeyen uç nokta: {self.path}"})
+            return
+        service.count_request()
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("İstek gövdesi bir JSON nesnesi olmalı.")
+            self._send(200, handler(payload))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {"error": f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: PredictionService, handler=_Handler):
+        self.service = service
+        super().__init__(address, handler)
+
+
+def score_arrow_remote(
+    batches: Iterable[Any],
+    host: str = SERVICE_HOST,
+    port: int = SERVICE_PORT,
+    timeout: Optional[float] = None,
+) -> Iterator[Any]:
+    """
+    /score_arrow istemcisi: RecordBatch'leri chunked gövdeyle gönderirken skorlanmış
+    RecordBatch'leri okur ve üretir (generator).
+
+    Gönderim ayrı iş parçacığında yapılır; http.client yanıtı ancak istek bittikten sonra
+    okuyabildiği için büyük akışlarda iki yönlü tamponlar dolup kilitlenirdi.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    sock = socket.create_connection((host, port), timeout=timeout)
+    send_error: List[BaseException] = []
+
+    def _send() -> None:
+        try:
+            sock.sendall(
+                f"POST /score_arrow HTTP/1.1\r\nHost: {host}:{port}\r\n"
+                f"Content-Type: {ARROW_STREAM_MIME}\r\nTransfer-Encoding: chunked\r\n"
+                "Connection: close\r\n\r\n".encode("ascii")
+            )
+            buf = io.BytesIO()
+            writer = None
+            for b in batches:
+                if writer is None:
+                    writer = ipc.new_stream(buf, b.schema)
+                writer.write_batch(b)
+                data = buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+                sock.sendall(b"%x\r\n%s\r\n" % (len(data), data))
+            if writer is None:
+                raise ValueError("Gönderilecek kayıt grubu yok.")
+            writer.close()
+            data = buf.getvalue()
+            sock.sendall(b"%x\r\n%s\r\n0\r\n\r\n" % (len(data), data))
+        except OSError:
+            pass  # bağlantı kapandı (sunucu erken hata döndürdü); ayrıntı yanıtta
+        except BaseException as e:
+            send_error.append(e)
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    th = threading.Thread(target=_send, name="aquaml-arrow-send", daemon=True)
+    th.start()
+    try:
+        resp = http.client.HTTPResponse(sock)
+        resp.begin()
+        if resp.status != 200:
+            raise RuntimeError(f"/score_arrow {resp.status}: {resp.read().decode('utf-8', 'replace')}")
+        try:
+            yield from ipc.open_stream(resp)
+        except (pa.ArrowInvalid, http.client.HTTPException) as e:
+            raise RuntimeError(f"Yanıt akışı kesildi: {type(e).__name__}: {e}") from e
+        th.join()
+        if send_error:
+            raise send_error[0]
+    finally:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        th.join()
+        sock.close()
+
+
+def make_server(service: PredictionService, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> ThreadingHTTPServer:
+    """Sunucuyu oluşturur (port=0 → boş bir port seçilir; server.server_address ile okunur)."""
+    return _Server((host, port), service)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Aqua-ML yerel tahmin servisi")
+    ap.add_argument("--host", default=SERVICE_HOST, help="Varsayılan yalnız localhost")
+    ap.add_argument("--port", type=int, default=SERVICE_PORT)
+    ap.add_argument("--model", default=MODEL_PATH)
+    ap.add_argument("--meta", default=META_PATH)
+    ap.add_argument("--bundle", default=None, help="Yerel model paketi dizini (python -m src.inference export)")
+    ap.add_argument("--window-ms", type=float, default=SERVICE_BATCH_WINDOW_MS,
+                    help="Mikro-yığın penceresi (ms); 0 → yalnız kuyrukta bekleyenler birleşir")
+    ap.add_argument("--max-batch", type=int, default=SERVICE_MAX_BATCH)
+    ap.add_argument("--verbose", action="store_true", help="Her isteği logla")
+    args = ap.parse_args(argv)
+
+    opts = {"window_ms": args.window_ms, "max_batch": args.max_batch}
+    if args.bundle:
+        service = PredictionService.from_bundle(args.bundle, **opts)
+    else:
+        service = PredictionService.from_files(args.model, args.meta, **opts)
+    _Handler.quiet = not args.verbose
+    server = make_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Aqua-ML servisi http://{host}:{port} (model {service.model_version}, pencere {args.window_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
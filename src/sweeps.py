@@ -0,0 +1,119 @@
+"""
+sweeps.py
+---------
+
+Duyarlılık analizleri ve ilaç karşılaştırması için toplu (batched) senaryo motoru.
+- Her eğrinin senaryo satırlarını tek bir DataFrame'de toplar
+- Tek bir predict çağrısı yapar (DomainFE → model)
+- Tahminleri eğri bazında DataFrame'lere geri böler
+
+"""
+
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# (eğri adı, değişen kolon, değerler); sonrasındaki alanlar (UI bilgisi vb.) yoksayılır
+Sweep = Tuple[str, str, Sequence]
+
+# Varsayılan duyarlılık ızgaraları: eğri adı → (değişen kolon, değerler).
+# Uygulamadaki grafikler ve HTTP servisinin /sensitivity ucu aynı ızgaraları kullanır.
+SWEEP_GRIDS: Dict[str, Tuple[str, List[float]]] = {
+    "agent": ("Agent/Sample(g/g)",
+        [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.2, 1.4, 1.6, 1.8, 2.0, 2.2, 2.4, 2.6, 2.8, 3.0, 3.2, 3.4, 3.6, 3.8, 4.0, 4.2, 4.4, 4.6, 4.8, 5.0, 5.5, 6.0, 6.5, 7.0, 7.5, 8.0, 8.5, 9.0, 9.5, 10.0]),
+    "soaking_time": ("Soaking_Time(min)",
+        [30, 45, 60, 75, 90, 105, 120, 135, 150, 165, 180, 195, 210, 225, 240, 255, 270, 285, 300, 315, 330, 345, 360, 375, 390, 405, 420, 435, 450, 465, 480, 495, 510, 525, 540, 600, 720, 900, 1200, 1500, 1800, 2000]),
+    "activation_time": ("Activation_Time(min)",
+        [30, 45, 60, 75, 90, 105, 120, 150, 180, 210, 240, 270, 300, 330, 360]),
+    "activation_temp": ("Activation_Temp(K)",
+        [550, 575, 600, 625, 650, 675, 700, 725, 750, 775, 800, 825, 850, 875, 900, 925, 950, 975, 1000, 1025, 1050, 1075, 1100, 1125, 1150, 1175, 1200]),
+    "concentration": ("Initial_Concentration(mg/L)",
+        [50, 100, 150, 200, 250, 300, 350, 400, 450, 500, 600, 700, 800, 900, 1000, 1200, 1400, 1600, 1800, 2000, 2200, 2400, 2600, 2800, 3000]),
+    "temperature": ("Temperature(K)",
+        [290, 295, 300, 305, 310, 315, 320, 325, 330, 335, 340]),
+    "ph": ("Solution_pH",
+        [2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, 5.5, 6.0, 6.5, 7.0, 7.5, 8.0, 8.5, 9.0, 9.5, 10.0, 10.5, 11.0, 11.5, 12.0]),
+    "dosage": ("Dosage(g/L)",
+        [0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0, 12.0, 13.0, 14.0, 15.0, 16.0, 17.0, 18.0, 19.0, 20.0]),
+    "contact_time": ("Contact_Time(min)",
+        [10, 20, 30, 40, 50, 60, 80, 100, 120, 140, 160, 180, 200, 220, 240, 260, 280, 300, 320, 340, 360, 380, 400, 420, 440, 460, 480, 500, 600, 720, 900, 1200, 1500, 1800, 2400, 3000, 3600, 4200, 4800, 5400, 6000]),
+}
+
+
+def default_sweeps(names: Optional[Sequence[str]] = None) -> List[Sweep]:
+    """SWEEP_GRIDS'ten (ad, kolon, değerler) listesi; names verilirse yalnız onlar (bilinmeyen ad → KeyError)."""
+    names = list(SWEEP_GRIDS) if names is None else list(names)
+    return [(n, *SWEEP_GRIDS[n]) for n in names]
+
+
+def _base_column(value, n: int) -> np.ndarray:
+    """Sabit tutulan bir girdiyi n satırlık kolona yayar (None → NaN)."""
+    if value is None:
+        return np.full(n, np.nan)
+    if isinstance(value, str):
+        return np.full(n, value, dtype=object)
+    return np.full(n, float(value))
+
+
+def build_scenario_frame(
+    base_row: Mapping[str, Any],
+    sweeps: Sequence[Sweep],
+    include_base: bool = True,
+) -> Tuple[pd.DataFrame, Dict[str, slice]]:
+    """
+    Tüm senaryoları tek DataFrame'de toplar.
+
+    Dönüş:
+        (X, dilimler) — dilimler: {eğri adı: X içindeki satır aralığı};
+        include_base=True ise ilk satır taban senaryodur ("__base__").
+    """
+    offset = 1 if include_base else 0
+    slices: Dict[str, slice] = {}
+    if include_base:
+        slices["__base__"] = slice(0, 1)
+    for name, _, values, *_ in sweeps:
+        if name in slices:
+            raise ValueError(f"Tekrarlanan eğri adı: {name}")
+        slices[name] = slice(offset, offset + len(values))
+        offset += len(values)
+    n = offset
+
+    cols = {k: _base_column(v, n) for k, v in base_row.items()}
+    for name, col, values, *_ in sweeps:
+        if col not in cols:
+            cols[col] = _base_column(None, n)
+        arr = cols[col]
+        if arr.dtype != object and any(isinstance(v, str) for v in values):
+            arr = cols[col] = arr.astype(object)
+        arr[slices[name]] = list(values)
+
+    return pd.DataFrame(cols), slices
+
+
+def run_sweeps(
+    predict_fn: Callable[[pd.DataFrame], Any],
+    base_row: Mapping[str, Any],
+    sweeps: Sequence[Sweep],
+    base: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Taban senaryo + tüm eğriler için tek predict çağrısı yapar.
+    base verilirse (çağıran taban tahmini zaten hesapladıysa) taban satırı tekrar tahmin edilmez.
+
+    Dönüş:
+        {
+          "base": <taban senaryo tahmini (float)>,
+          "curves": {eğri adı: DataFrame[[değişen kolon, "qe"]]},
+        }
+    Tahmin hatası yutulmaz; çağıran taraf yakalar.
+    """
+    X, slices = build_scenario_frame(base_row, sweeps, include_base=base is None)
+    preds = np.asarray(predict_fn(X), dtype=float).ravel()
+    if len(preds) != len(X):
+        raise ValueError(f"Beklenen {len(X)} tahmin, gelen {len(preds)}.")
+
+    curves: Dict[str, pd.DataFrame] = {}
+    for name, col, values, *_ in sweeps:
+        curves[name] = pd.DataFrame({col: list(values), "qe": preds[slices[name]]})
+
+    return {"base": float(preds[0]) if base is None else float(base), "curves": curves}
@@ -0,0 +1,255 @@
+"""
+synthetic.py
+------------
+
+Özel eğitim Excel'i (IN_PATH) olmadan ölçüm / yük testi yapabilmek için gerçekçi sentetik ham girdi üretici.
+- Sayısal girdiler uygulamanın SLIDER_SPEC / NUMBER_INPUT_SPEC sınırları içinde kalır
+  (varsayılan: tipik aralıkta düzgün dağılım; fit_marginals ile verilen veri setinin dağılımları)
+- Fiziksel kısıtlar: Micropore_Volume ≤ Total_Pore_Volume, C+H+O+N+S yüzdeleri toplamı ≤ 100
+- Target_Phar: ui_specs/drug_map.xlsx'teki 21 ilaç kodu; Activation_Atmosphere: N2 / Air / SG
+- SyntheticGenerator.write: satırları parça parça Parquet/CSV'ye yazar (bellekte aynı anda tek parça, varsayılan CHUNK_ROWS satır)
+- synthetic_target: gürültülü sentetik qe(mg/g) (yalnız sentetik model eğitmek içindir; fiziksel değildir)
+
+Kullanım:
+    X = synthetic_frame(100_000, seed=1)
+    gen = SyntheticGenerator(seed=7, marginals=fit_marginals(pd.read_excel("Raw_data.xlsx")))
+    gen.write("soak_1m.parquet", 1_000_000)
+
+    python -m src.synthetic --rows 1000000 --out soak_1m.parquet
+    python -m src.synthetic --rows 200000 --out load.csv --fit Raw_data.xlsx
+
+"""
+
+import argparse
+import functools
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    INPUT_COLS, RANDOM_STATE, SLIDER_SPEC, NUMBER_INPUT_SPEC, ATMOSPHERES, DRUG_MAP_PATH,
+)
+from src.features import pharm_codes, pharm_table
+
+# Varsayılan örnekleme aralıkları (literatürdeki tipik değerler); her zaman UI sınırlarına kırpılır
+TYPICAL_RANGES: Dict[str, Tuple[float, float]] = {
+    "Agent/Sample(g/g)": (0.1, 10.0),
+    "Soaking_Time(min)": (0.0, 2000.0),
+    "Soaking_Temp(K)": (273.0, 500.0),
+    "Activation_Time(min)": (30.0, 360.0),
+    "Activation_Temp(K)": (550.0, 1200.0),
+    "Activation_Heating_Rate (K/min)": (1.0, 50.0),
+    "BET_Surface_Area(m2/g)": (100.0, 3000.0),
+    "Total_Pore_Volume(cm3/g)": (0.1, 2.0),
+    "Micropore_Volume(cm3/g)": (0.05, 1.0),
+    "Average_Pore_Diameter(nm)": (1.0, 10.0),
+    "pHpzc": (2.0, 11.0),
+    "C_percent": (40.0, 95.0),
+    "H_percent": (0.0, 5.0),
+    "O_percent": (0.0, 30.0),
+    "N_percent": (0.0, 5.0),
+    "S_percent": (0.0, 3.0),
+    "Solution_pH": (2.0, 12.0),
+    "Temperature(K)": (290.0, 340.0),
+    "Initial_Concentration(mg/L)": (5.0, 1000.0),
+    "Dosage(g/L)": (0.1, 10.0),
+    "Contact_Time(min)": (10.0, 3000.0),
+    "Agitation_speed(rpm)": (0.0, 500.0),
+}
+ELEMENT_COLS = ["C_percent", "H_percent", "O_percent", "N_percent", "S_percent"]
+ELEMENT_TOTAL_MAX = 100.0
+# Kısıt ihlalinde yeniden örneklenen oranlar: mikro/toplam gözenek hacmi, element toplamı (kül payı)
+MICRO_FRACTION = (0.2, 0.95)
+ELEMENT_TOTAL = (85.0, 100.0)
+CHUNK_ROWS = 100_000
+
+
+def spec_ranges() -> Dict[str, Tuple[float, float]]:
+    """Sayısal girdi → (min, max): uygulamadaki slider ve sayı kutusu sınırları."""
+    ranges = {c: (float(lo), float(hi)) for c, (lo, hi, _) in SLIDER_SPEC.items()}
+    ranges.update({c: (float(lo), float(hi)) for c, (lo, hi, _, _) in NUMBER_INPUT_SPEC.items()})
+    return ranges
+
+
+@functools.lru_cache(maxsize=4)
+def _read_drug_codes(path: str) -> Tuple[str, ...]:
+    codes = pd.read_excel(path)["Code"].dropna().astype(str).str.strip().str.upper()
+    return tuple(dict.fromkeys(c for c in codes if c))
+
+
+def drug_codes(path: str = DRUG_MAP_PATH) -> List[str]:
+    """drug_map.xlsx'teki ilaç kodları; dosya okunamazsa LSER tablosundaki kodlar."""
+    try:
+        return list(_read_drug_codes(path))
+    except (OSError, KeyError, ValueError):
+        return pharm_codes()
+
+
+def _read_table(path: str) -> pd.DataFrame:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xls"):
+        return pd.read_excel(path)
+    if ext in (".parquet", ".pq"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def fit_marginals(df: pd.DataFrame, n_quantiles: int = 101, drugs: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Verilen ham veri setinden kolon bazında marjinal dağılımlar.
+    - Sayısal: UI sınırlarına kırpılmış değerlerin n_quantiles kantili (ters CDF ile örneklenir)
+    - Kategorik: bilinen değerlerin frekansları (bilinmeyen ilaç / atmosfer kodları atılır)
+    Veride olmayan ya da boş kolonlar varsayılan aralıkla üretilir.
+    """
+    ranges = spec_ranges()
+    known = {"Target_Phar": list(drugs) if drugs is not None else drug_codes(),
+             "Activation_Atmosphere": list(ATMOSPHERES)}
+    cols = {str(c).strip(): c for c in df.columns}
+    numeric: Dict[str, np.ndarray] = {}
+    categorical: Dict[str, Tuple[List[str], np.ndarray]] = {}
+    for c in INPUT_COLS:
+        if c not in cols:
+            continue
+        s = df[cols[c]]
+        if c in known:
+            v = s.dropna().astype(str).str.strip()
+            v = (v.str.upper() if c == "Target_Phar" else v)
+            counts = v[v.isin(known[c])].value_counts()
+            if len(counts):
+                categorical[c] = (list(counts.index), (counts / counts.sum()).to_numpy())
+        else:
+            v = pd.to_numeric(s, errors="coerce").dropna().to_numpy(dtype=float)
+            if len(v):
+                lo, hi = ranges[c]
+                numeric[c] = np.quantile(np.clip(v, lo, hi), np.linspace(0, 1, n_quantiles))
+    return {"numeric": numeric, "categorical": categorical}
+
+
+class SyntheticGenerator:
+    """
+    Tekrar üretilebilir (seed) sentetik ham girdi üretici.
+    Aynı seed ve parça boyutu → aynı satırlar.
+    """
+
+    def __init__(self, seed: int = RANDOM_STATE, marginals: Optional[Dict[str, Any]] = None,
+                 drugs: Optional[Sequence[str]] = None):
+        self.rng = np.random.default_rng(seed)
+        self.ranges = spec_ranges()
+        self.marginals = marginals or {"numeric": {}, "categorical": {}}
+        self.drugs = list(drugs) if drugs is not None else drug_codes()
+
+    def _numeric(self, col: str, n: int) -> np.ndarray:
+        q = self.marginals["numeric"].get(col)
+        if q is not None:
+            return np.interp(self.rng.random(n), np.linspace(0, 1, len(q)), q)
+        lo, hi = self.ranges[col]
+        t_lo, t_hi = TYPICAL_RANGES.get(col, (lo, hi))
+        return self.rng.uniform(max(lo, t_lo), min(hi, t_hi), n)
+
+    def _categorical(self, col: str, default: Sequence[str], n: int) -> np.ndarray:
+        fitted = self.marginals["categorical"].get(col)
+        if fitted is not None:
+            values, p = fitted
+            return self.rng.choice(np.asarray(values, dtype=object), n, p=p)
+        return self.rng.choice(np.asarray(default, dtype=object), n)
+
+    def sample(self, n: int) -> pd.DataFrame:
+        """INPUT_COLS sırasında n satır; sınırlar ve fiziksel kısıtlar sağlanmış olarak."""
+        cols: Dict[str, np.ndarray] = {}
+        for c in INPUT_COLS:
+            if c == "Activation_Atmosphere":
+                cols[c] = self._categorical(c, ATMOSPHERES, n)
+            elif c == "Target_Phar":
+                cols[c] = self._categorical(c, self.drugs, n)
+            else:
+                cols[c] = self._numeric(c, n)
+
+        # Micropore ≤ Total: ihlal eden satırlarda mikro hacim toplamın bir oranı olarak yeniden örneklenir
+        total, micro = cols["Total_Pore_Volume(cm3/g)"], cols["Micropore_Volume(cm3/g)"]
+        bad = micro > total
+        micro[bad] = total[bad] * self.rng.uniform(*MICRO_FRACTION, int(bad.sum()))
+
+        # C+H+O+N+S ≤ 100: aşan satırlar orantılı küçültülür (kalan pay kül / diğer elementler)
+        elems = np.column_stack([cols[c] for c in ELEMENT_COLS])
+        s = elems.sum(axis=1)
+        over = s > ELEMENT_TOTAL_MAX
+        if over.any():
+            target = self.rng.uniform(*ELEMENT_TOTAL, int(over.sum()))
+            elems[over] *= (target / s[over])[:, None]
+            for i, c in enumerate(ELEMENT_COLS):
+                cols[c] = elems[:, i]
+        return pd.DataFrame(cols)
+
+    def iter_chunks(self, n: int, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        done = 0
+        while done < n:
+            k = min(chunk_rows, n - done)
+            yield self.sample(k)
+            done += k
+
+    def write(self, path: str, n: int, chunk_rows: int = CHUNK_ROWS) -> Dict[str, Any]:
+        """n satırı parça parça path'e yazar (.parquet/.pq → Parquet, diğerleri CSV); bellekte tek parça tutulur."""
+        from src.batch_scoring import _open_sink
+
+        fmt = "parquet" if path.lower().endswith((".parquet", ".pq")) else "csv"
+        t0 = time.perf_counter()
+        sink = _open_sink(path, fmt)
+        try:
+            for chunk in self.iter_chunks(n, chunk_rows):
+                sink.write(chunk)
+        finally:
+            sink.close()
+        return {"path": path, "rows": int(n), "format": fmt, "seconds": time.perf_counter() - t0}
+
+
+def check_constraints(df: pd.DataFrame, drugs: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """Kısıt ihlali sayıları (hepsi 0 olmalı): UI sınırı dışı, micro > total, element toplamı > 100, bilinmeyen kod."""
+    ranges = spec_ranges()
+    out = {"out_of_range": 0}
+    for c, (lo, hi) in ranges.items():
+        v = df[c].to_numpy(dtype=float)
+        out["out_of_range"] += int(((v < lo) | (v > hi)).sum())
+    out["micro_gt_total"] = int((df["Micropore_Volume(cm3/g)"] > df["Total_Pore_Volume(cm3/g)"]).sum())
+    out["element_sum_gt_100"] = int((df[ELEMENT_COLS].sum(axis=1) > ELEMENT_TOTAL_MAX + 1e-9).sum())
+    known = set(drugs if drugs is not None else drug_codes())
+    out["unknown_drug"] = int((~df["Target_Phar"].isin(known)).sum())
+    out["unknown_atmosphere"] = int((~df["Activation_Atmosphere"].isin(ATMOSPHERES)).sum())
+    return out
+
+
+def synthetic_frame(n: int, seed: int = RANDOM_STATE) -> pd.DataFrame:
+    """INPUT_COLS sırasında n satırlık sentetik ham girdi (aynı seed → aynı tablo)."""
+    return SyntheticGenerator(seed).sample(n)
+
+
+def synthetic_target(df: pd.DataFrame, seed: int = RANDOM_STATE) -> np.ndarray:
+    """Sentetik qe(mg/g): yüzey alanı, konsantrasyon, dozaj ve ilaç boyutuna bağlı + gürültü."""
+    rng = np.random.default_rng(seed)
+    v = pd.Series({code: vals["V"] for code, vals in pharm_table().items()})
+    size = df["Target_Phar"].map(v).to_numpy(dtype=float)
+    qe = (df["BET_Surface_Area(m2/g)"].to_numpy() / 10
+          + df["Initial_Concentration(mg/L)"].to_numpy() / (2 + df["Dosage(g/L)"].to_numpy())
+          + 20 * size)
+    return qe + rng.normal(0, 5, len(df))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sentetik ham girdi dosyası üret (Parquet/CSV)")
+    ap.add_argument("--rows", type=int, required=True)
+    ap.add_argument("--out", required=True, help=".parquet veya .csv")
+    ap.add_argument("--seed", type=int, default=RANDOM_STATE)
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--fit", default=None, help="marjinal dağılımların öğrenileceği veri (xlsx/csv/parquet)")
+    args = ap.parse_args()
+
+    marginals = fit_marginals(_read_table(args.fit)) if args.fit else None
+    gen = SyntheticGenerator(args.seed, marginals=marginals)
+    res = gen.write(args.out, args.rows, args.chunk_rows)
+    print(f"[OK] {res['rows']:,} satır → {res['path']} ({res['format']}, {res['seconds']:.1f} sn)")
+
+
+if __name__ == "__main__":
+    main()
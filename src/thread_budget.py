@@ -0,0 +1,134 @@
+"""
+thread_budget.py
+----------------
+
+Eğitimde iç içe paralellik için tek çekirdek bütçesi: dış (HPO denemeleri / CV fold'ları) ↔
+iç (booster thread'leri, BLAS/OpenMP).
+- split_budget: toplam çekirdeği (varsayılan N_JOBS) dış × iç olarak böler; THREAD_BUDGET="4x2" gibi
+  sabit bir bölme config/ortam değişkeninden verilebilir
+- thread_budget(...): bağlam yöneticisi; blok içinde inner_threads() iç bütçeyi döner, BLAS/OpenMP
+  havuzları (threadpoolctl) ve alt süreçler için OMP/MKL/OPENBLAS_NUM_THREADS iç bütçeye sınırlanır
+- apply_threads(pipe, inner): pipeline'daki CatBoostSk (thread_count) / LGBMSk, XGBSk (n_jobs) adımlarına
+  iç bütçeyi parametre olarak yazar → clone/pickle ile loky işçilerine de taşınır
+- threads_applied(pipe, inner): aynısı, blok sonunda özgün değerler geri yazılır; döndürülen / kaydedilen
+  modeller eğitimdeki düşük iç bütçeyi taşımaz (thread_params ile işçiden dönen kopyalara da uygulanır)
+
+Kullanım:
+    with thread_budget(n_tasks=n_iter * 5) as (outer, inner):
+        apply_threads(body, inner)
+        RandomizedSearchCV(body, ..., n_jobs=outer).fit(X, y)
+
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from src.config import N_JOBS, THREAD_BUDGET
+
+_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+# Sarmalayıcı → iç thread parametresinin adı
+_THREAD_PARAMS = {"CatBoostSk": "thread_count", "LGBMSk": "n_jobs", "XGBSk": "n_jobs"}
+
+_current_inner: Optional[int] = None
+
+
+def parse_budget(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """"4x2" → (4, 2); "auto"/boş → None."""
+    if not spec or str(spec).strip().lower() == "auto":
+        return None
+    outer, inner = str(spec).lower().split("x")
+    return max(1, int(outer)), max(1, int(inner))
+
+
+def split_budget(n_tasks: Optional[int] = None,
+                 total: int = N_JOBS,
+                 outer: Optional[int] = None) -> Tuple[int, int]:
+    """
+    (dış, iç) thread sayıları. Öncelik: outer verilmişse o; sonra THREAD_BUDGET; yoksa görev sayısı kadar
+    dış işçi (en çok total) ve kalan çekirdekler iç thread'lere.
+    """
+    if outer is None:
+        fixed = parse_budget(THREAD_BUDGET)
+        if fixed is not None:
+            return fixed
+        outer = min(total, n_tasks) if n_tasks else total
+    outer = max(1, min(int(outer), total))
+    return outer, max(1, total // outer)
+
+
+def inner_threads() -> int:
+    """Geçerli iç bütçe (thread_budget bloğu dışında: dış paralellik yokmuş gibi tüm bütçe)."""
+    return _current_inner if _current_inner is not None else split_budget(n_tasks=1)[1]
+
+
+@contextmanager
+def thread_budget(n_tasks: Optional[int] = None,
+                  total: int = N_JOBS,
+                  outer: Optional[int] = None,
+                  inner: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """Blok boyunca (dış, iç) bütçesini uygular; çıkışta önceki durum geri yüklenir."""
+    global _current_inner
+    o, i = split_budget(n_tasks, total, outer)
+    if inner is not None:
+        i = max(1, int(inner))
+
+    prev_inner = _current_inner
+    prev_env = {k: os.environ.get(k) for k in _ENV_VARS}
+    os.environ.update({k: str(i) for k in _ENV_VARS})
+    _current_inner = i
+    try:
+        from threadpoolctl import threadpool_limits  # sklearn bağımlılığı; yoksa yalnız ortam değişkenleri
+    except ImportError:
+        threadpool_limits = None
+    limiter = threadpool_limits(limits=i) if threadpool_limits is not None else None
+    try:
+        yield o, i
+    finally:
+        if limiter is not None:
+            limiter.restore_original_limits()
+        _current_inner = prev_inner
+        for k, v in prev_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def apply_threads(est: Any, inner: int) -> Any:
+    """est (veya Pipeline adımları) içindeki sarmalayıcılara iç thread sayısını yazar; est döner."""
+    steps = getattr(est, "steps", None)
+    if steps is not None:
+        for _, step in steps:
+            if step is not None and step != "passthrough":
+                apply_threads(step, inner)
+        return est
+    param = _THREAD_PARAMS.get(type(est).__name__)
+    if param is not None:
+        est.set_params(**{param: int(inner)})
+    return est
+
+
+def thread_params(est: Any) -> Dict[str, Any]:
+    """est (veya Pipeline) içindeki sarmalayıcıların iç thread parametreleri: {set_params anahtarı: değer}."""
+    steps = getattr(est, "steps", None)
+    if steps is not None:
+        out: Dict[str, Any] = {}
+        for name, step in steps:
+            if step is not None and step != "passthrough":
+                out.update({f"{name}__{k}": v for k, v in thread_params(step).items()})
+        return out
+    param = _THREAD_PARAMS.get(type(est).__name__)
+    return {param: est.get_params()[param]} if param is not None else {}
+
+
+@contextmanager
+def threads_applied(est: Any, inner: int) -> Iterator[Any]:
+    """Blok boyunca est'e iç bütçeyi yazar; çıkışta özgün thread parametrelerini geri yükler."""
+    saved = thread_params(est)
+    apply_threads(est, inner)
+    try:
+        yield est
+    finally:
+        if saved:
+            est.set_params(**saved)
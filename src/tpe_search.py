@@ -0,0 +1,169 @@
+"""
+tpe_search.py
+-------------
+
+Model tabanlı (TPE) hiperparametre araması; RandomizedSearchCV ile aynı arayüz (fit, best_score_,
+best_params_, best_estimator_, cv_results_) → run_hpo_top2(search="tpe") içinde yerine takılır.
+- Örnekleyici: Optuna TPESampler (opsiyonel bağımlılık; have["optuna"])
+- Bütçe: deneme sayısı (n_iter) ve/veya duvar saati (time_budget_s) — hangisi önce dolarsa
+- Sıcak başlangıç: warm_start parametre sözlükleri (örn. best_model.meta.json → hp_results) ilk denemeler
+  olarak kuyruğa alınır
+- Paralellik: n_jobs deneme aynı anda koşar; constant liar ile sürmekte olan denemeler kötü sonuç
+  varsayılır → aynı yığındaki adaylar aynı bölgeye yığılmaz
+- Kalıcılık: storage (SQLite yolu) + study_name verilirse denemeler Optuna'nın RDB deposuna yazılır;
+  yeniden çalıştırmada kalan deneme sayısı kadar devam edilir, başka süreçler aynı çalışmaya katılabilir
+  (n_iter çalışmanın toplam bütçesi: MaxTrialsCallback tamamlanan + süren denemeleri sayar; her işçinin
+  örnekleyici tohumu worker_id'den türetilir, constant liar açıktır)
+- get_param_distributions ızgaraları: ≥3 elemanlı sayısal listeler [min, max] aralığına çevrilir
+  (oran ≥ 10 ise log ölçek); diğerleri (None içeren, metin) kategorik
+
+Kullanım:
+    search = TPESearchCV(body, get_param_distributions("CatBoost"), n_iter=30, cv=cv, n_jobs=4,
+                         time_budget_s=1800, warm_start=[{"reg__depth": 8, ...}])
+    search.fit(X, y); search.best_params_
+
+"""
+
+import hashlib
+import time
+from numbers import Integral, Real
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import cross_val_score
+
+from src.config import have, META_PATH
+
+
+def _space(values: Sequence) -> Dict[str, Any]:
+    """Izgara değerleri → {"kind": "int"|"float"|"cat", ...}."""
+    vals = list(values)
+    numeric = all(isinstance(v, Real) and not isinstance(v, bool) for v in vals)
+    if not numeric or len(vals) < 3:
+        return {"kind": "cat", "choices": vals}
+    lo, hi = min(vals), max(vals)
+    log = lo > 0 and hi / lo >= 10
+    if all(isinstance(v, Integral) for v in vals):
+        return {"kind": "int", "low": int(lo), "high": int(hi), "log": log}
+    return {"kind": "float", "low": float(lo), "high": float(hi), "log": log}
+
+
+def _suggest(trial, name: str, sp: Dict[str, Any]) -> Any:
+    if sp["kind"] == "int":
+        return trial.suggest_int(name, sp["low"], sp["high"], log=sp["log"])
+    if sp["kind"] == "float":
+        return trial.suggest_float(name, sp["low"], sp["high"], log=sp["log"])
+    return trial.suggest_categorical(name, sp["choices"])
+
+
+def _fits(value: Any, sp: Dict[str, Any]) -> bool:
+    """Sıcak başlangıç değeri arama uzayında mı?"""
+    if sp["kind"] == "cat":
+        return value in sp["choices"]
+    return isinstance(value, Real) and sp["low"] <= value <= sp["high"]
+
+
+def warm_start_from_meta(model_name: str, meta_path: str = META_PATH) -> List[Dict[str, Any]]:
+    """best_model.meta.json → hp_results içinde model_name için kayıtlı best_params (yoksa [])."""
+    import json
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return []
+    out = [r["best_params"] for r in meta.get("hp_results") or []
+           if r.get("model") == model_name and r.get("best_params")]
+    if meta.get("best_name") == model_name and meta.get("best_params") and meta["best_params"] not in out:
+        out.append(meta["best_params"])
+    return out
+
+
+class TPESearchCV:
+    """Optuna TPE ile sıralı model tabanlı arama (RandomizedSearchCV'nin kullandığımız alt kümesi)."""
+
+    def __init__(self, estimator, param_distributions: Dict[str, Sequence], n_iter: int = 30,
+                 scoring: str = "r2", cv: Any = 5, n_jobs: int = 1, refit: bool = True,
+                 random_state: Optional[int] = None, time_budget_s: Optional[float] = None,
+                 warm_start: Optional[List[Dict[str, Any]]] = None, verbose: int = 1,
+                 storage: Optional[str] = None, study_name: Optional[str] = None):
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.scoring = scoring
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.refit = refit
+        self.random_state = random_state
+        self.time_budget_s = time_budget_s
+        self.warm_start = warm_start
+        self.verbose = verbose
+        self.storage = storage
+        self.study_name = study_name
+
+    def fit(self, X, y):
+        if not have.get("optuna", False):
+            raise RuntimeError("Optuna yüklü değil (search='tpe' için gerekli).")
+        import optuna
+
+        if self.verbose < 2:
+            optuna.logging.set_verbosity(optuna.logging.WARNING)
+        space = {k: _space(v) for k, v in self.param_distributions.items()}
+
+        def objective(trial):
+            params = {k: _suggest(trial, k, sp) for k, sp in space.items()}
+            est = clone(self.estimator).set_params(**params)
+            # error_score="raise": hatalı fit NaN ortalamayla sessizce geçmez, deneme FAIL olur
+            scores = cross_val_score(est, X, y, scoring=self.scoring, cv=self.cv, n_jobs=1,
+                                     error_score="raise")
+            trial.set_user_attr("std_test_score", float(np.std(scores)))
+            return float(np.mean(scores))
+
+        # Paylaşımlı depoda her işçi kendi tohumuyla örnekler (aynı adayları üretmezler); başka süreçlerin
+        # süren denemeleri de constant liar ile hesaba katılır
+        seed = self.random_state
+        if self.storage:
+            from src.trial_store import worker_id
+
+            seed = int(hashlib.sha1(f"{self.random_state}|{worker_id()}".encode()).hexdigest()[:8], 16)
+        sampler = optuna.samplers.TPESampler(seed=seed, multivariate=True,
+                                             constant_liar=self.n_jobs > 1 or bool(self.storage))
+        study = optuna.create_study(direction="maximize", sampler=sampler,
+                                    storage=f"sqlite:///{self.storage}" if self.storage else None,
+                                    study_name=self.study_name, load_if_exists=bool(self.storage))
+        n_prev = sum(t.state == optuna.trial.TrialState.COMPLETE for t in study.trials)
+        n_todo = max(0, self.n_iter - n_prev)   # sürdürme: kayıtlı denemeler bütçeden düşülür
+        n_warm = 0
+        for params in (self.warm_start or []) if not study.trials else []:
+            p = {k: v for k, v in params.items() if k in space and _fits(v, space[k])}
+            if p:
+                study.enqueue_trial(p, skip_if_exists=True)
+                n_warm += 1
+
+        t0 = time.perf_counter()
+        if n_todo:
+            # Bütçe çalışmanın geneli için: tamamlanan + sürmekte olan (diğer işçiler dahil) n_iter'e ulaşınca durur;
+            # n_trials yalnız bu süreç için üst sınır (hep başarısız olan denemelerde sonsuz döngü olmaz)
+            budget = optuna.study.MaxTrialsCallback(
+                self.n_iter, states=(optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.RUNNING))
+            study.optimize(objective, n_trials=n_todo, timeout=self.time_budget_s, callbacks=[budget],
+                           n_jobs=max(1, int(self.n_jobs)), catch=(Exception,))
+        done = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+        if not done:
+            raise RuntimeError("TPE araması: tamamlanan deneme yok.")
+        if self.verbose:
+            print(f"[HPO] TPE: {len(done)} deneme ({n_prev} kayıtlı, {n_warm} sıcak başlangıç) | "
+                  f"{time.perf_counter() - t0:.1f} sn")
+
+        self.study_ = study
+        self.cv_results_ = {
+            "params": [t.params for t in done],
+            "mean_test_score": np.array([t.value for t in done]),
+            "std_test_score": np.array([t.user_attrs.get("std_test_score", np.nan) for t in done]),
+        }
+        self.best_score_ = float(study.best_value)
+        self.best_params_ = dict(study.best_params)
+        if self.refit:
+            self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
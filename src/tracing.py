@@ -0,0 +1,218 @@
+"""
+tracing.py
+----------
+
+İstek başına hafif süre izleme (span) + tek istek için örnekleme profili.
+- Tracer: iç içe span'ler (ad, başlangıç, süre, derinlik); aynı ada sahip span'ler özetlenir
+- span(ad) / begin(ad) + end(tutamak): etkin izleyici yoksa hiçbir şey yapmaz
+  (kapalıyken maliyet ≈ bir contextvar okuması)
+- traced_predict(pipe): pipe.predict ile aynı sonuç; DomainFE ve model tahminini ayrı span'lerde ölçer
+- write_jsonl: iz kaydını JSONL dosyasına ekler (satır başına bir istek)
+- SamplingProfiler: hedef thread'in yığınını aralıklarla örnekler (yalnız stdlib);
+  en pahalı fonksiyonlar raporu + flamegraph / speedscope için "collapsed stacks" çıktısı
+
+Kullanım:
+    tracer = start_trace("single")
+    with span("fast_predict"):
+        ...
+    tracer.summary()          # [{"span", "calls", "total_ms", "max_ms", "share"}, ...]
+    write_jsonl(TRACE_FILE, tracer.record())
+
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+_CURRENT: contextvars.ContextVar = contextvars.ContextVar("aquaml_tracer", default=None)
+
+
+class Tracer:
+    """Tek bir isteğin (script çalışması / HTTP isteği) span kayıtları."""
+
+    def __init__(self, name: str, **meta):
+        self.name = name
+        self.meta = dict(meta)
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._depth = 0
+        self.spans: List[Dict[str, Any]] = []
+
+    def now_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    def begin(self, name: str) -> tuple:
+        """with bloğu kurmadan span başlatır; end(tutamak) ile kapatılır (iç içe derinlik korunur)."""
+        handle = (self, name, time.perf_counter(), self._depth)
+        self._depth += 1
+        return handle
+
+    def end(self, handle: tuple) -> None:
+        _, name, t_start, depth = handle
+        self._depth = depth
+        self._add(name, t_start, time.perf_counter(), depth)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        handle = self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(handle)
+
+    def _add(self, name: str, t_start: float, t_end: float, depth: int) -> None:
+        self.spans.append({
+            "span": name,
+            "start_ms": round((t_start - self._t0) * 1000, 3),
+            "ms": round((t_end - t_start) * 1000, 3),
+            "depth": depth,
+        })
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Aynı adlı span'ler birleşik: ilk görülme sırasına göre (ad, çağrı, toplam, en uzun, pay)."""
+        total = max(self.now_ms(), 1e-9)
+        agg: Dict[str, Dict[str, Any]] = {}
+        for s in sorted(self.spans, key=lambda s: s["start_ms"]):
+            a = agg.setdefault(s["span"], {"span": s["span"], "depth": s["depth"], "calls": 0,
+                                           "total_ms": 0.0, "max_ms": 0.0})
+            a["calls"] += 1
+            a["total_ms"] += s["ms"]
+            a["max_ms"] = max(a["max_ms"], s["ms"])
+        for a in agg.values():
+            a["total_ms"] = round(a["total_ms"], 3)
+            a["share"] = round(a["total_ms"] / total, 4)
+        return list(agg.values())
+
+    def record(self) -> Dict[str, Any]:
+        return {"trace": self.name, "ts": self.started_at, "total_ms": round(self.now_ms(), 3),
+                **self.meta, "spans": sorted(self.spans, key=lambda s: s["start_ms"])}
+
+
+def start_trace(name: str, enabled: bool = True, **meta) -> Optional[Tracer]:
+    """Yeni izleyiciyi bu bağlamda etkinleştirir (enabled=False → izleme kapatılır, None döner)."""
+    tracer = Tracer(name, **meta) if enabled else None
+    _CURRENT.set(tracer)
+    return tracer
+
+
+def current() -> Optional[Tracer]:
+    return _CURRENT.get()
+
+
+def span(name: str):
+    tracer = _CURRENT.get()
+    return nullcontext() if tracer is None else tracer.span(name)
+
+
+def begin(name: str) -> Optional[tuple]:
+    """Etkin izleyicide span başlatır (izleme kapalıysa None)."""
+    tracer = _CURRENT.get()
+    return None if tracer is None else tracer.begin(name)
+
+
+def end(handle: Optional[tuple]) -> None:
+    if handle is not None:
+        handle[0].end(handle)
+
+
+def traced_predict(pipe) -> Callable:
+    """pipe.predict karşılığı; ön işleme adımları 'domain_fe', son adım 'model_predict' span'i olarak ölçülür."""
+    steps = [est for _, est in pipe.steps]
+
+    def predict(X):
+        Xt = X
+        with span("domain_fe"):
+            for est in steps[:-1]:
+                Xt = est.transform(Xt)
+        with span("model_predict"):
+            return steps[-1].predict(Xt)
+
+    return predict
+
+
+def write_jsonl(path: str, rec: Dict[str, Any]) -> None:
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+
+
+# ----------------------- Örnekleme profili -----------------------
+class SamplingProfiler:
+    """
+    Arka plan thread'i hedef thread'in yığınını interval_s aralıkla örnekler (sys._current_frames).
+    Deterministik profilleyicilerin (cProfile) aksine ölçülen kodu yavaşlatmaz; sonuç istatistikseldir.
+    """
+
+    def __init__(self, interval_s: float = 0.005, thread_id: Optional[int] = None):
+        self.interval_s = float(interval_s)
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._t0 = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        self._t0 = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="aquaml-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.seconds = time.perf_counter() - self._t0
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope 'collapsed stacks' biçimi: 'a;b;c <örnek>'."""
+        return "\n".join(f"{';'.join(s)} {n}" for s, n in self.stacks.most_common())
+
+    def report(self, top: int = 25) -> str:
+        """Fonksiyon başına öz (yığının tepesi) ve kapsayıcı örnek sayıları."""
+        own: Counter = Counter()
+        incl: Counter = Counter()
+        for stack, n in self.stacks.items():
+            own[stack[-1]] += n
+            for fn in set(stack):
+                incl[fn] += n
+        total = max(self.samples, 1)
+        lines = [f"{self.samples} örnek, {self.seconds:.3f} sn, aralık {self.interval_s * 1000:g} ms", "",
+                 "En çok öz süre (yığının tepesi):"]
+        lines += [f"  {n / total:6.1%}  {fn}" for fn, n in own.most_common(top)]
+        lines += ["", "En çok kapsayıcı süre:"]
+        lines += [f"  {n / total:6.1%}  {fn}" for fn, n in incl.most_common(top)]
+        return "\n".join(lines)
+
+    def save(self, out_dir: str, name: str) -> str:
+        """<ad>.txt (rapor) ve <ad>.collapsed dosyalarını yazar; rapor yolunu döndürür."""
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, f"{name}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.report() + "\n")
+        with open(os.path.join(out_dir, f"{name}.collapsed"), "w", encoding="utf-8") as f:
+            f.write(self.collapsed() + "\n")
+        return path
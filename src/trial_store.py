@@ -0,0 +1,324 @@
+"""
+trial_store.py
+--------------
+
+HPO denemeleri için yerel SQLite deposu: sürdürülebilir ve paylaşımlı (sharded) arama.
+- Her deneme bitince diske yazılır (parametre özeti anahtarlı); kesilen bir koşu yeniden başlatılınca
+  tamamlanmış yapılandırmalar atlanır
+- Birden fazla süreç / ortak dosya sistemini paylaşan makineler aynı depodan deneme çeker:
+  BEGIN IMMEDIATE ile atomik "claim" + kira süresi (lease); süren deneme kirasını kalp atışıyla yeniler,
+  kirası dolan (çöken işçinin) denemeler geri alınır; sonuç yalnız denemeyi hâlâ tutan işçi tarafından yazılır
+- Çalışma (study) adı veri özeti + CV tanımı + model adını içerir → farklı veri setleri karışmaz
+- StoredSearchCV: RandomizedSearchCV ile aynı arayüz (fit, best_score_, best_params_, best_estimator_,
+  cv_results_); aynı random_state ile her işçi aynı aday listesini üretir, depo işi paylaştırır
+
+Kullanım:
+    search = StoredSearchCV(body, param_dist, n_iter=30, cv=cv, store="hpo_trials.sqlite", study="CatBoost|...")
+    search.fit(X, y)           # aynı komut başka süreçte/makinede de çalıştırılabilir
+    python -m src.trial_store status --store hpo_trials.sqlite
+
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import HPO_TRIAL_LEASE_S
+
+
+def _plain(v: Any) -> Any:
+    """numpy skalerleri → Python (JSON için)."""
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def params_key(params: Dict[str, Any]) -> Tuple[str, str]:
+    """(anahtar, JSON) — sıralı, numpy'den arındırılmış parametre sözlüğünün özeti."""
+    text = json.dumps({k: _plain(v) for k, v in params.items()}, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode()).hexdigest(), text
+
+
+class TrialStore:
+    """
+    SQLite tabanlı deneme deposu (çalışma, parametre anahtarı) → durum / skor.
+
+    - Durumlar: pending → running (kiralı) → done | failed
+    - WAL kipi + busy_timeout: birden fazla süreç aynı dosyayı güvenle okur/yazar
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = str(path)
+        self.timeout = float(timeout)
+        self._local = threading.local()
+
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        con = self._conn()
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS hpo_trials ("
+            " study TEXT NOT NULL, key TEXT NOT NULL, params TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending', score REAL, score_std REAL, fold_scores TEXT,"
+            " error TEXT, worker TEXT, lease_until REAL, started REAL, finished REAL,"
+            " PRIMARY KEY (study, key))"
+        )
+        con.execute("CREATE INDEX IF NOT EXISTS idx_hpo_trials_status ON hpo_trials(study, status)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Thread başına bir bağlantı (sqlite3 bağlantıları thread'ler arası paylaşılmamalı)."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.con = con
+        return con
+
+    def add_trials(self, study: str, params_list: Sequence[Dict[str, Any]]) -> int:
+        """Aday yapılandırmaları 'pending' olarak ekler (zaten varsa dokunmaz); eklenen sayısı."""
+        rows = [(study, *params_key(p)) for p in params_list]
+        con = self._conn()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            before = con.total_changes
+            con.executemany("INSERT OR IGNORE INTO hpo_trials(study, key, params) VALUES (?, ?, ?)", rows)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return con.total_changes - before
+
+    def claim(self, study: str, worker: str, lease_s: float = HPO_TRIAL_LEASE_S) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Bekleyen (veya kirası dolmuş) bir denemeyi atomik olarak alır; yoksa None."""
+        con = self._conn()
+        now = time.time()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            row = con.execute(
+                "SELECT key, params FROM hpo_trials WHERE study=? AND"
+                " (status='pending' OR (status='running' AND lease_until < ?)) LIMIT 1",
+                (study, now),
+            ).fetchone()
+            if row is not None:
+                con.execute(
+                    "UPDATE hpo_trials SET status='running', worker=?, started=?, lease_until=?"
+                    " WHERE study=? AND key=?",
+                    (worker, now, now + lease_s, study, row[0]),
+                )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return (row[0], json.loads(row[1])) if row is not None else None
+
+    def release_dead(self, study: str) -> int:
+        """Bu makinede ölmüş süreçlerin 'running' denemelerini kirası dolmadan 'pending'e döndürür."""
+        host = socket.gethostname()
+        con = self._conn()
+        rows = con.execute("SELECT key, worker FROM hpo_trials WHERE study=? AND status='running'",
+                           (study,)).fetchall()
+        dead = [k for k, w in rows if w and w.split(":")[0] == host and not _pid_alive(int(w.split(":")[1]))]
+        if dead:
+            con.executemany("UPDATE hpo_trials SET status='pending', worker=NULL, lease_until=NULL"
+                            " WHERE study=? AND key=? AND status='running'", [(study, k) for k in dead])
+        return len(dead)
+
+    def renew(self, study: str, key: str, worker: str, lease_s: float = HPO_TRIAL_LEASE_S) -> bool:
+        """Süren denemenin kirasını uzatır (kalp atışı); deneme artık bu işçide değilse False."""
+        cur = self._conn().execute(
+            "UPDATE hpo_trials SET lease_until=? WHERE study=? AND key=? AND worker=? AND status='running'",
+            (time.time() + lease_s, study, key, worker),
+        )
+        return cur.rowcount > 0
+
+    def finish(self, study: str, key: str, worker: str, scores: Sequence[float]) -> bool:
+        """
+        Fold skorlarını yazar (True). Sonlu olmayan (NaN/inf) skorda deneme 'failed' olur; deneme artık bu
+        işçinin değilse (kirası dolup başkası almış) hiçbir şey yazılmaz — ikisinde de False.
+        """
+        s = np.asarray(scores, dtype=float)
+        if s.size == 0 or not np.all(np.isfinite(s)):
+            self.fail(study, key, worker, f"sonlu olmayan CV skoru: {s.tolist()}")
+            return False
+        cur = self._conn().execute(
+            "UPDATE hpo_trials SET status='done', score=?, score_std=?, fold_scores=?, finished=?, error=NULL"
+            " WHERE study=? AND key=? AND worker=? AND status='running'",
+            (float(s.mean()), float(s.std()), json.dumps(s.tolist()), time.time(), study, key, worker),
+        )
+        return cur.rowcount > 0
+
+    def fail(self, study: str, key: str, worker: str, error: str) -> bool:
+        """Denemeyi 'failed' işaretler; yalnız deneme hâlâ bu işçideyse (True)."""
+        cur = self._conn().execute(
+            "UPDATE hpo_trials SET status='failed', error=?, finished=?"
+            " WHERE study=? AND key=? AND worker=? AND status='running'",
+            (str(error)[:2000], time.time(), study, key, worker),
+        )
+        return cur.rowcount > 0
+
+    def counts(self, study: Optional[str] = None) -> Dict[str, int]:
+        q = "SELECT status, COUNT(*) FROM hpo_trials" + (" WHERE study=?" if study else "") + " GROUP BY status"
+        return dict(self._conn().execute(q, (study,) if study else ()).fetchall())
+
+    def results(self, study: str) -> List[Dict[str, Any]]:
+        """Tamamlanan denemeler: params, mean/std skor, fold skorları, işçi, süre."""
+        rows = self._conn().execute(
+            "SELECT params, score, score_std, fold_scores, worker, started, finished FROM hpo_trials"
+            " WHERE study=? AND status='done' AND score IS NOT NULL ORDER BY finished",
+            (study,),
+        ).fetchall()
+        return [{"params": json.loads(p), "mean_test_score": s, "std_test_score": sd,
+                 "fold_scores": json.loads(fs), "worker": w, "seconds": (f - st) if f and st else None}
+                for p, s, sd, fs, w, st, f in rows if np.isfinite(s)]
+
+    def studies(self) -> List[str]:
+        return [r[0] for r in self._conn().execute("SELECT DISTINCT study FROM hpo_trials ORDER BY study")]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@contextmanager
+def _heartbeat(store: TrialStore, study: str, key: str, worker: str, lease_s: float):
+    """Blok boyunca kirayı lease_s/3 aralıkla yeniler → uzun CV denemeleri başka işçiye düşmez."""
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(max(1.0, lease_s / 3)):
+            try:
+                if not store.renew(study, key, worker, lease_s):
+                    return
+            except sqlite3.OperationalError:
+                pass   # kilit yoğunluğu: bir sonraki atışta yeniden denenir
+
+    t = threading.Thread(target=beat, name="aquaml-hpo-lease", daemon=True)
+    t.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        t.join()
+
+
+class StoredSearchCV:
+    """Depo üzerinden paylaşılan rastgele arama (RandomizedSearchCV'nin kullandığımız alt kümesi)."""
+
+    def __init__(self, estimator, param_distributions: Dict[str, Sequence], n_iter: int = 30,
+                 scoring: str = "r2", cv: Any = 5, n_jobs: int = 1, refit: bool = True,
+                 random_state: Optional[int] = None, store: Any = None, study: str = "default",
+                 lease_s: float = HPO_TRIAL_LEASE_S, poll_s: float = 5.0, verbose: int = 1):
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.scoring = scoring
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.refit = refit
+        self.random_state = random_state
+        self.store = store
+        self.study = study
+        self.lease_s = lease_s
+        self.poll_s = poll_s
+        self.verbose = verbose
+
+    def _loop(self, store: TrialStore, X, y, worker: str) -> int:
+        """Depoda iş kalmayana dek deneme çek → CV → yaz; başka işçilerin süren denemelerini bekler."""
+        from sklearn.base import clone
+        from sklearn.model_selection import cross_val_score
+
+        n_done = 0
+        while True:
+            got = store.claim(self.study, worker, self.lease_s)
+            if got is None:
+                if store.counts(self.study).get("running", 0) == 0:
+                    return n_done
+                time.sleep(self.poll_s)   # kirası dolarsa claim onu geri alır
+                continue
+            key, params = got
+            try:
+                est = clone(self.estimator).set_params(**params)
+                # error_score="raise": hatalı fit NaN skorla 'done' olmaz, aşağıda 'failed' işaretlenir
+                with _heartbeat(store, self.study, key, worker, self.lease_s):
+                    scores = cross_val_score(est, X, y, scoring=self.scoring, cv=self.cv, n_jobs=1,
+                                             error_score="raise")
+                n_done += store.finish(self.study, key, worker, scores)
+            except Exception as e:
+                store.fail(self.study, key, worker, repr(e))
+
+    def fit(self, X, y):
+        from joblib import Parallel, delayed
+        from sklearn.base import clone
+        from sklearn.model_selection import ParameterSampler
+
+        store = self.store if isinstance(self.store, TrialStore) else TrialStore(self.store)
+        candidates = list(ParameterSampler(self.param_distributions, self.n_iter, random_state=self.random_state))
+        added = store.add_trials(self.study, candidates)
+        store.release_dead(self.study)   # kesilen önceki koşunun yarım kalan denemeleri
+        before = store.counts(self.study)
+        if self.verbose:
+            print(f"[HPO] Deneme deposu: {store.path} | çalışma={self.study} | yeni={added} | "
+                  f"tamam={before.get('done', 0)} | bekleyen={before.get('pending', 0)}")
+
+        worker = worker_id()
+        t0 = time.perf_counter()
+        n_threads = max(1, int(self.n_jobs))
+        done_here = Parallel(n_jobs=n_threads, backend="threading")(
+            delayed(self._loop)(store, X, y, f"{worker}:{i}") for i in range(n_threads)
+        )
+        res = store.results(self.study)
+        if not res:
+            raise RuntimeError(f"Deneme deposu: '{self.study}' için tamamlanan deneme yok.")
+        if self.verbose:
+            print(f"[HPO] Deneme deposu: {len(res)} deneme tamam (bu süreç: {sum(done_here)}) | "
+                  f"{time.perf_counter() - t0:.1f} sn")
+
+        best = max(res, key=lambda r: r["mean_test_score"])
+        self.cv_results_ = {
+            "params": [r["params"] for r in res],
+            "mean_test_score": np.array([r["mean_test_score"] for r in res]),
+            "std_test_score": np.array([r["std_test_score"] for r in res]),
+        }
+        self.best_score_ = float(best["mean_test_score"])
+        self.best_params_ = dict(best["params"])
+        if self.refit:
+            self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
+
+
+def main():
+    import argparse
+
+    ap = argparse.ArgumentParser(description="HPO deneme deposu durumu")
+    ap.add_argument("command", choices=["status"])
+    ap.add_argument("--store", required=True)
+    args = ap.parse_args()
+
+    store = TrialStore(args.store)
+    for study in store.studies():
+        c = store.counts(study)
+        scores = [r["mean_test_score"] for r in store.results(study)]
+        best = max((s for s in scores if s is not None and np.isfinite(s)), default=float("nan"))
+        print(f"{study}: " + " | ".join(f"{k}={v}" for k, v in sorted(c.items())) + f" | en iyi={best:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
 # src/hpo.py
 import numpy as np
 import pandas as pd
+from sklearn.base import clone
 from sklearn.model_selection import RandomizedSearchCV, KFold
 
+from src.feature_cache import precompute, without_fe, restore_fe, frame_digest
+from src.thread_budget import thread_budget, apply_threads, thread_params
+from src.config import (
+    EARLY_STOPPING_ROUNDS, HPO_SEARCH, HALVING_FACTOR, HALVING_RESOURCE, HPO_TIME_BUDGET_S, HPO_TRIAL_STORE,
+)
+
+# Çok-doğruluklu (successive halving) aramada kaynak olarak kullanılabilecek boosting tur sayısı parametreleri
+_ROUND_PARAMS = ("reg__n_estimators", "reg__max_iter")
+
 def get_param_distributions(model_name: str):
     # ... (senin mevcut içeriğin aynen kalsın)
     # -- burada değişiklik yok --
@@ -48,15 +58,169 @@ def get_param_distributions(model_name: str):
     else:
         return {}
 
+def _halving_resource(param_dist: dict, resource: str = HALVING_RESOURCE):
+    """
+    (kaynak, max_resources, param_dist) — "auto": ızgarada boosting tur sayısı varsa o (ızgaradan çıkarılır,
+    en büyük değeri tam bütçe olur), yoksa eğitim alt örneklem boyutu ("n_samples").
+    """
+    if resource == "auto":
+        resource = next((p for p in _ROUND_PARAMS if p in param_dist), "n_samples")
+    if resource == "n_samples":
+        return resource, "auto", param_dist
+    dist = dict(param_dist)
+    values = dist.pop(resource, None)
+    if values is None:
+        raise ValueError(f"Halving kaynağı ızgarada yok: {resource}")
+    return resource, int(max(values)), dist
+
+
+def _study_name(cand: str, search: str, Xt, y, cv, early_stopping_rounds) -> str:
+    """Deneme deposu çalışma adı: model + arama modu + veri/CV/erken durdurma özeti (farklı veriler karışmaz)."""
+    import hashlib
+
+    y_digest = pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).to_numpy().tobytes()
+    spec = f"{frame_digest(Xt)}|{hashlib.sha1(y_digest).hexdigest()}|{cv!r}|es={early_stopping_rounds}"
+    return f"{cand}|{search}|{hashlib.sha1(spec.encode()).hexdigest()[:16]}"
+
+
+def _make_search(search: str, body, param_dist: dict, n_iter: int, cv, n_jobs: int, random_state: int,
+                 time_budget_s=None, warm_start=None, store=None, study=None, refit=True):
+    """
+    search="random" → RandomizedSearchCV; "halving" → HalvingRandomSearchCV; "tpe" → TPESearchCV
+    (aynı fit/best_* arayüzü). time_budget_s ve warm_start yalnız "tpe" için.
+    refit=False → arama sonunda best_estimator_ eğitilmez (kazanan run_hpo_top2'de ayrıca eğitilir).
+    store (SQLite yolu) verilirse: "random" → StoredSearchCV, "tpe" → Optuna RDB deposu (sürdürülebilir).
+    """
+    if search == "random" and store:
+        from src.trial_store import StoredSearchCV
+
+        return StoredSearchCV(
+            estimator=body,
+            param_distributions=param_dist,
+            n_iter=n_iter,
+            scoring="r2",
+            cv=cv,
+            n_jobs=n_jobs,
+            refit=refit,
+            random_state=random_state,
+            store=store,
+            study=study,
+        )
+    if search == "random":
+        return RandomizedSearchCV(
+            estimator=body,
+            param_distributions=param_dist,
+            n_iter=n_iter,
+            scoring="r2",
+            cv=cv,
+            n_jobs=n_jobs,
+            verbose=1,
+            refit=refit,
+            random_state=random_state,
+        )
+    if search == "halving":
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (deneysel API'yi açar)
+        from sklearn.model_selection import HalvingRandomSearchCV
+
+        resource, max_resources, dist = _halving_resource(param_dist)
+        print(f"[HPO] Successive halving: kaynak={resource} | faktör={HALVING_FACTOR} | aday={n_iter}")
+        return HalvingRandomSearchCV(
+            estimator=body,
+            param_distributions=dist,
+            n_candidates=n_iter,
+            resource=resource,
+            max_resources=max_resources,
+            min_resources="exhaust",   # son basamak tam bütçeyi kullanır
+            factor=HALVING_FACTOR,
+            aggressive_elimination=False,
+            scoring="r2",
+            cv=cv,
+            n_jobs=n_jobs,
+            verbose=1,
+            refit=refit,
+            random_state=random_state,
+        )
+    if search == "tpe":
+        from src.tpe_search import TPESearchCV
+
+        return TPESearchCV(
+            estimator=body,
+            param_distributions=param_dist,
+            n_iter=n_iter,
+            scoring="r2",
+            cv=cv,
+            n_jobs=n_jobs,
+            refit=refit,
+            random_state=random_state,
+            time_budget_s=time_budget_s,
+            warm_start=warm_start,
+            storage=store,
+            study_name=study,
+        )
+    raise ValueError(f"Bilinmeyen arama modu: {search} (random | halving | tpe)")
+
+
+def _rung_history(rsearch) -> list:
+    """Basamak (rung) bazlı deneme geçmişi: iter, n_resources, params, mean/std CV R2 (yalnız halving)."""
+    res = rsearch.cv_results_
+    if "iter" not in res:
+        return []
+    return [{"iter": int(res["iter"][i]),
+             "n_resources": int(res["n_resources"][i]),
+             "params": res["params"][i],
+             "mean_test_r2": float(res["mean_test_score"][i]),
+             "std_test_r2": float(res["std_test_score"][i])}
+            for i in range(len(res["params"]))]
+
+
+def _es_enabled(body) -> bool:
+    """Model adımında erken durdurma ayarlı mı (sarmalayıcılarda early_stopping_rounds, HistGBR'de early_stopping)."""
+    params = body.get_params()
+    return bool(params.get("reg__early_stopping_rounds")) or params.get("reg__early_stopping") not in (None, False)
+
+
+def _final_params(reg) -> dict:
+    """
+    Kazananın tüm satırlarda yeniden eğitimi için parametreler: erken durdurma kapatılır, tur sayısı
+    aramanın bulduğu en iyi iterasyona sabitlenir (sarmalayıcılarda n_estimators = best_iteration_ + 1,
+    HistGBR'de max_iter = n_iter_). Erken durdurma devrede değilse {}.
+    """
+    best_iter = getattr(reg, "best_iteration_", None)
+    if best_iter is not None:
+        return {"reg__early_stopping_rounds": None, "reg__n_estimators": int(best_iter) + 1}
+    n_iter_ = getattr(reg, "n_iter_", None)
+    if n_iter_ is not None and "early_stopping" in reg.get_params() and n_iter_ < reg.max_iter:
+        return {"reg__early_stopping": False, "reg__max_iter": int(n_iter_)}
+    return {}
+
+
 def run_hpo_top2(models,
                  res_sorted,
                  X_all, y_all,
                  random_state=42,
                  n_iter=30,
                  out_data_path=None,      # <-- verildiyse HP_Tuning sayfasını buraya yazar
-                 return_details=True):    # <-- True ise hp_results + best_params da döner
+                 return_details=True,     # <-- True ise hp_results + best_params da döner
+                 cv_results=None,         # <-- evaluate_and_plot()["cv_results"]: varsayılan CV R2 (yeniden eğitim yok)
+                 thread_split=None,       # <-- (dış, iç) thread bölmesi; None → thread_budget politikası
+                 early_stopping_rounds=EARLY_STOPPING_ROUNDS,  # <-- booster'larda erken durdurma (0/None → kapalı)
+                 search=HPO_SEARCH,       # <-- "random" | "halving" (successive halving; basamak geçmişi hp_results'ta) | "tpe"
+                 time_budget_s=HPO_TIME_BUDGET_S,  # <-- "tpe": aday başına duvar saati bütçesi (sn; None → yalnız n_iter)
+                 warm_start=True,         # <-- "tpe": True → best_model.meta.json hp_results; liste → verilen param sözlükleri
+                 trial_store=HPO_TRIAL_STORE):  # <-- SQLite yolu: denemeler bitince kalıcı; yeniden çalıştırma sürdürür
     """
     İlk CV sonuçlarından top-2 modeli seçip HPO yapar.
+    search="halving": n_iter aday az kaynakla (boosting turu / alt örneklem) denenir, her basamakta en iyi
+    1/HALVING_FACTOR'ü tam bütçeye yükselir; basamak geçmişi hp_results[i]["history"] ve HP_Rungs sayfasında.
+    search="tpe": Optuna TPE (src/tpe_search.py); n_iter ve/veya time_budget_s, meta'dan sıcak başlangıç,
+    dış thread bütçesi kadar paralel deneme (constant liar).
+    trial_store verilirse ("random"/"tpe") her deneme bitince SQLite'a yazılır; kesilen koşu kaldığı yerden
+    devam eder ve aynı dosyayı gören başka süreçler/makineler aynı aramaya işçi olarak katılır.
+    cv_results verilirse her adayın varsayılan parametreli CV R2'si hp_results'a "cv_r2_default" olarak eklenir.
+    Erken durdurmalı kazanan, kaydedilmeden önce tüm satırlarda erken durdurmasız ve en iyi iterasyon kadar
+    turla yeniden eğitilir (iç doğrulama payı modele katılır; kaydedilen model ES parametresi taşımaz).
+    Bu durumda arama refit=False ile çalışır: en iyi iterasyonu bulmak için yalnız kazanan bir kez ES ile
+    eğitilir, adayların arama içi refit'i yapılmaz (hp_results'ta best_iteration yalnız kazanan için dolu).
     Döndürür:
       - default: (best_name, best_pipe, best_score, hp_results, best_best_params)
       - return_details=False ise yalnız (best_name, best_pipe, best_score)
@@ -74,6 +238,7 @@ def run_hpo_top2(models,
 
     best_name, best_pipe, best_score = None, None, -np.inf
     best_best_params = None
+    best_body = best_fit = best_row = best_threads = None
     hp_results = []  # her aday için: {"model", "cv_r2", "best_params"}
 
     for cand in top2:
@@ -90,37 +255,81 @@ def run_hpo_top2(models,
             continue
 
         print(f"[HPO] Başlıyor → {cand}")
-        rsearch = RandomizedSearchCV(
-            estimator=base_pipe,
-            param_distributions=param_dist,
-            n_iter=n_iter,
-            scoring="r2",
-            cv=cv,
-            n_jobs=-1,
-            verbose=1,
-            refit=True,
-            random_state=random_state,
-        )
-        rsearch.fit(X_all, y_all)
+        # DomainFE matrisi bir kez (önbellekten); n_iter × 5 fold'da yalnız model adımları fit edilir
+        # Çekirdekler denemeler (dış) ile booster thread'leri (iç) arasında bölünür
+        fe, (Xt_all,) = precompute(base_pipe, X_all)
+        outer, inner = thread_split if thread_split is not None else (None, None)
+        with without_fe(base_pipe) as body, \
+                thread_budget(n_tasks=n_iter * cv.get_n_splits(), outer=outer, inner=inner) as (outer, inner):
+            threads = thread_params(body)              # kaydedilecek modele geri yazılır
+            body = apply_threads(clone(body), inner)   # çağıranın pipeline'ı değişmez
+            # Erken durdurma (CatBoostSk/LGBMSk/XGBSk): düz doğrulama kaybında denemeler tüm ağaçları eğitmez
+            if early_stopping_rounds and "reg__early_stopping_rounds" in body.get_params():
+                body.set_params(reg__early_stopping_rounds=int(early_stopping_rounds))
+            print(f"[HPO] Thread bütçesi: dış={outer} × iç={inner}")
+            warm = None
+            if search == "tpe" and warm_start:
+                from src.tpe_search import warm_start_from_meta
+                warm = warm_start_from_meta(cand) if warm_start is True else list(warm_start)
+            store = study = None
+            if trial_store:
+                if search == "halving":
+                    print("[HPO] Uyarı: deneme deposu halving modunda desteklenmiyor; bellekte çalışılıyor.")
+                else:
+                    store = trial_store
+                    study = _study_name(cand, search, Xt_all, y_all, cv, body.get_params().get("reg__early_stopping_rounds"))
+            # ES'li adayda arama sonu refit gereksiz: kazanan aşağıda ES ile ve ardından ES'siz yeniden eğitilir
+            es = _es_enabled(body)
+            rsearch = _make_search(search, body, param_dist, n_iter, cv, outer, random_state,
+                                   time_budget_s=time_budget_s, warm_start=warm, store=store, study=study,
+                                   refit=not es)
+            rsearch.fit(Xt_all, y_all)
         print(f"[HPO] {cand} en iyi (CV R2) = {rsearch.best_score_:.4f}")
         print(f"[HPO] {cand} en iyi paramlar: {rsearch.best_params_}")
+        base_cv = (cv_results or {}).get(cand)
+        if base_cv is not None:
+            print(f"[HPO] {cand} varsayılan (CV R2) = {base_cv['cv_r2']:.4f}")
 
         # kaydet
         hp_results.append({
             "model": cand,
             "cv_r2": float(rsearch.best_score_) if rsearch.best_score_ is not None else None,
-            "best_params": rsearch.best_params_
+            "cv_r2_default": base_cv["cv_r2"] if base_cv is not None else None,
+            "best_iteration": None,
+            "best_params": rsearch.best_params_,
+            "history": _rung_history(rsearch),
         })
 
         if rsearch.best_score_ > best_score:
             best_score = rsearch.best_score_
             best_name = cand
-            best_pipe = rsearch.best_estimator_
+            # ES'siz aramada kazanan zaten eğitildi; ES'lide model aşağıda eğitilir
+            best_pipe = restore_fe(rsearch.best_estimator_, fe) if not es else None  # ham girdi alan pipeline
             best_best_params = rsearch.best_params_
+            best_body, best_fit, best_row, best_threads = body, (fe, Xt_all), hp_results[-1], threads
 
-    if best_pipe is None:
+    if best_name is None:
         raise RuntimeError("run_hpo_top2: HPO sonucunda uygun bir model çıkmadı.")
 
+    # Erken durdurmalı kazanan: önce ES ile (en iyi iterasyon), sonra tüm satırlarla, ES kapalı ve
+    # sabit tur sayısıyla yeniden eğitim
+    if best_pipe is None:
+        fe, Xt_all = best_fit
+        with thread_budget(n_tasks=1) as (_, inner):
+            es_fit = apply_threads(clone(best_body), inner).set_params(**best_best_params).fit(Xt_all, y_all)
+            reg = es_fit.steps[-1][1]
+            best_iter = getattr(reg, "best_iteration_", None)
+            best_row["best_iteration"] = int(best_iter) if best_iter is not None else None
+            final = _final_params(reg)
+            if final:
+                print(f"[HPO] {best_name} tüm satırlarla yeniden eğitiliyor: {final}")
+                es_fit = apply_threads(clone(best_body), inner).set_params(**{**best_best_params, **final})
+                es_fit.fit(Xt_all, y_all)
+        best_pipe = restore_fe(es_fit, fe)
+    # İç thread bütçesi yalnız HPO içindir; kaydedilen model özgün thread ayarlarını taşır
+    if best_threads:
+        best_pipe.set_params(**best_threads)
+
     # İsteğe bağlı: HP_Tuning sayfasını hemen burada yaz
     if out_data_path is not None:
         try:
@@ -129,13 +338,21 @@ def run_hpo_top2(models,
                 rows.append({
                     "model": r.get("model"),
                     "cv_r2": r.get("cv_r2"),
+                    "cv_r2_default": r.get("cv_r2_default"),
+                    "best_iteration": r.get("best_iteration"),
                     "best_params": json.dumps(r.get("best_params"), ensure_ascii=False, default=str)
                                    if r.get("best_params") is not None else None
                 })
             if rows:
                 df_hp = pd.DataFrame(rows)
+                # Halving: basamak geçmişi ayrı sayfaya (model, iter, n_resources, params, mean/std R2)
+                rungs = [{"model": r.get("model"), **h,
+                          "params": json.dumps(h["params"], ensure_ascii=False, default=str)}
+                         for r in hp_results for h in (r.get("history") or [])]
                 with pd.ExcelWriter(out_data_path, mode="a", if_sheet_exists="replace") as xw:
                     df_hp.to_excel(xw, sheet_name="HP_Tuning", index=False)
+                    if rungs:
+                        pd.DataFrame(rungs).to_excel(xw, sheet_name="HP_Rungs", index=False)
                 print(f"[OK] HP sonuçları 'HP_Tuning' sayfasına yazıldı: {out_data_path}")
         except Exception as e:
             print(f"[Uyarı] HP sonuçlarını Excel'e yazarken sorun: {e}")
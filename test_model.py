@@ -6,19 +6,20 @@ Bu script, verilen girdilerle modele direkt istek atar ve sonucu gösterir.
 Arayüz sonucu ile karşılaştırma yapmak için kullanılır.
 """
 
+import time
+
 import pandas as pd
 import numpy as np
-import joblib
-import json
 from pathlib import Path
 
+from src.artifacts import load_artifacts
+from src.fast_predict import FastPredictor
+
 def load_model_and_meta():
     """Model ve metadata'yı yükle"""
     try:
-        pipe = joblib.load("best_model.joblib")
-        with open("best_model.meta.json", "r", encoding="utf-8") as f:
-            meta = json.load(f)
-            features = meta.get("features", [])
+        # Uygulama ve HTTP servisi ile aynı yükleyici
+        pipe, features, _ = load_artifacts()
         return pipe, features
     except Exception as e:
         print(f"Model yüklenirken hata: {e}")
@@ -108,9 +109,23 @@ def main():
     # Model tahmini yap
     print("4. Model tahmini yapılıyor...")
     try:
-        prediction = pipe.predict(df)
-        qe_value = float(prediction[0])
+        # Arayüzle aynı tek satır hızlı yolu (dict → NumPy → yerel model); şema uymazsa Pipeline
+        fast = FastPredictor(pipe, features)
+        fast.predict_one(test_data)  # ısınma
+        t0 = time.perf_counter()
+        qe_value = fast.predict_one(test_data)
+        dt_fast = time.perf_counter() - t0
         print(f"🎯 Tahmini qe değeri: {qe_value:.3f} mg/g")
+        if fast.enabled:
+            print(f"⚡ Hızlı yol: {dt_fast * 1000:.3f} ms")
+        else:
+            print(f"ℹ️ Hızlı yol kapalı ({fast.reason}); Pipeline kullanıldı: {dt_fast * 1000:.3f} ms")
+
+        # Karşılaştırma: tam Pipeline (DataFrame → DomainFE → model)
+        t0 = time.perf_counter()
+        pipe_value = float(pipe.predict(df)[0])
+        dt_pipe = time.perf_counter() - t0
+        print(f"🔁 Pipeline tahmini: {pipe_value:.3f} mg/g ({dt_pipe * 1000:.3f} ms, fark {abs(pipe_value - qe_value):.3g})")
         print()
         
         # Sonuç özeti